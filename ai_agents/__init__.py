@@ -14,6 +14,9 @@ from colorama import Fore, Style
 import base64
 from pathlib import Path
 
+from logging_folder.metrics import agent_label, metrics
+from logging_folder.tracing import span
+
 load_dotenv(find_dotenv())
 
 
@@ -24,6 +27,19 @@ def finish(message: str):
     """
     return f"[FINISHED] {message}"
 
+def step_usage(messages: list) -> dict:
+    """Model calls and token usage of the AI messages after the last human message (one graph run)."""
+    start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), -1)
+    usage = {"model_calls": 0, "input_tokens": 0, "output_tokens": 0, "tokens": 0}
+    for msg in messages[start + 1:]:
+        if isinstance(msg, AIMessage):
+            usage["model_calls"] += 1
+            metadata = msg.usage_metadata or {}
+            usage["input_tokens"] += metadata.get("input_tokens", 0)
+            usage["output_tokens"] += metadata.get("output_tokens", 0)
+            usage["tokens"] += metadata.get("total_tokens", 0)
+    return usage
+
 def encode_image_base64(path: str) -> str:
     with open(path, "rb") as f:
         return base64.b64encode(f.read()).decode("utf-8")
@@ -94,6 +110,7 @@ class LLMAgent:
                     print(f"[📎 Attachment]: {file}")
 
         final_output = None
+        step_seconds = metrics.histogram("agent_step_seconds", agent=agent_label(self.name))
 
         for step in range(50):
             input_dict = {"messages": messages}
@@ -105,8 +122,10 @@ class LLMAgent:
                 }
             }
 
-            result = await self._agent.ainvoke(input_dict, config=config)
-            new_messages = result.get("messages", [])
+            with step_seconds.time(), span("agent_step", kind="agent", agent=agent_label(self.name), step=step) as step_span:
+                result = await self._agent.ainvoke(input_dict, config=config)
+                new_messages = result.get("messages", [])
+                step_span.set(**step_usage(new_messages))
             messages.extend(new_messages)
 
             ai_msg = next((m for m in reversed(new_messages) if isinstance(m, AIMessage)), None)
@@ -4,8 +4,7 @@ from langchain_core.tools import BaseTool
 
 from ai_agents import LLMAgent
 from logging_folder import get_logger
-from langchain_deepseek.chat_models import ChatDeepSeek
-from langchain_openai.chat_models import ChatOpenAI
+from ai_agents.model_registry import get_model
 from collections import deque
 import uuid
 from langgraph.prebuilt import create_react_agent
@@ -13,12 +12,22 @@ from langgraph.checkpoint.memory import InMemorySaver
 
 log = get_logger(__name__)
 
-#main_model = ChatDeepSeek(model="deepseek-chat", temperature=0.1)
-main_model = ChatOpenAI(model="gpt-4o", temperature=0.1)
+
+def get_main_model():
+    """Default model for agents, shared through the model registry (see MISTERKNEW_MODEL_PROVIDER)."""
+    return get_model(temperature=0.1)
+
+
+def __getattr__(name):
+    if name == "main_model":
+        return get_main_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class AiAgentWorker(LLMAgent):
-    def __init__(self, name:str, tools:List, main_task: str="", local_task:str="", model=main_model):
+    def __init__(self, name:str, tools:List, main_task: str="", local_task:str="", model=None):
         name = f"{name}_{uuid.uuid4().hex}"
+        model = model or get_main_model()
         super().__init__(name=name,model=model,tools=tools)
         self.message_log: deque = deque(maxlen=500)
         self.main_task = main_task
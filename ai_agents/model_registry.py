@@ -0,0 +1,185 @@
+import importlib
+import importlib.util
+import os
+import threading
+import weakref
+
+import httpx
+
+from logging_folder import get_logger
+from utils import recording
+
+log = get_logger(__name__)
+
+# provider -> (module, class, default model)
+PROVIDERS = {
+    "openai": ("langchain_openai.chat_models", "ChatOpenAI", "gpt-4o"),
+    "deepseek": ("langchain_deepseek.chat_models", "ChatDeepSeek", "deepseek-chat"),
+}
+
+
+class ModelRegistry:
+    """
+    Creates chat models and shares them between agents.
+
+    Models are deduplicated by (provider, model, temperature, extra kwargs), and every model
+    talks through the same pair of httpx clients, so all agents reuse one keep-alive connection
+    pool (HTTP/2 when the ``h2`` package is installed) instead of opening their own sockets
+    and TLS sessions. The default provider comes from ``MISTERKNEW_MODEL_PROVIDER`` and can be
+    switched with ``set_default``. While a run is recorded or replayed (``utils.recording``)
+    models are wrapped by RecordingChatModel or replaced by ReplayChatModel.
+    """
+
+    def __init__(
+        self,
+        provider: str | None = None,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 120.0,
+        http2: bool | None = None,
+    ):
+        self.default_provider = provider or os.environ.get("MISTERKNEW_MODEL_PROVIDER", "openai")
+        self.default_model: str | None = os.environ.get("MISTERKNEW_MODEL")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(600.0, connect=10.0)
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self._models: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._requests = 0
+        # Streams already counted; weak, so a closed connection is dropped and a new one at its address counts again
+        self._seen_streams: weakref.WeakSet = weakref.WeakSet()
+        self._connections_used = 0
+
+    def set_default(self, provider: str, model: str | None = None):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider {provider!r}; known: {', '.join(PROVIDERS)}")
+        self.default_provider = provider
+        self.default_model = model
+
+    def _record_response(self, response: httpx.Response):
+        self._requests += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream not in self._seen_streams:
+                self._seen_streams.add(stream)
+                self._connections_used += 1
+        except TypeError:
+            # a transport whose streams cannot be weakly referenced
+            pass
+
+    async def _arecord_response(self, response: httpx.Response):
+        self._record_response(response)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(
+                limits=self.limits, timeout=self.timeout, http2=self.http2,
+                event_hooks={"response": [self._record_response]},
+            )
+        return self._client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, http2=self.http2,
+                event_hooks={"response": [self._arecord_response]},
+            )
+        return self._async_client
+
+    def get(self, model: str | None = None, provider: str | None = None, temperature: float = 0.1, **kwargs):
+        """Returns the shared model for this configuration, creating it on first request."""
+        provider = provider or self.default_provider
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider {provider!r}; known: {', '.join(PROVIDERS)}")
+        provider_default = PROVIDERS[provider][2]
+        if model is None:
+            model = self.default_model if provider == self.default_provider and self.default_model else provider_default
+        recorder = recording.recorder
+        key = (provider, model, temperature, repr(sorted(kwargs.items())), id(recorder))
+        with self._lock:
+            instance = self._models.get(key)
+            if instance is None:
+                instance = self._create(provider, model, temperature, recorder, **kwargs)
+                self._models[key] = instance
+                log.info(f"Model client created: {provider}/{model} (temperature={temperature})")
+        return instance
+
+    def _create(self, provider: str, model: str, temperature: float, recorder, **kwargs):
+        """A provider model, wrapped for recording, or a recorded stand-in when a run is replayed."""
+        from ai_agents.recorded_models import RecordingChatModel, ReplayChatModel
+        if recorder is not None and recorder.replaying:
+            return ReplayChatModel(recorder=recorder, model_name=f"{provider}/{model}")
+        module_name, class_name, _ = PROVIDERS[provider]
+        model_class = getattr(importlib.import_module(module_name), class_name)
+        instance = model_class(
+            model=model,
+            temperature=temperature,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            **kwargs,
+        )
+        if recorder is not None:
+            instance = RecordingChatModel(inner=instance, recorder=recorder, model_name=f"{provider}/{model}")
+        return instance
+
+    @staticmethod
+    def _pool_connections(client) -> list | None:
+        """
+        Connections of the client's pool, or None if they cannot be read. httpx has no public API
+        for this, so the private transport and pool attributes are read defensively.
+        """
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return None
+        try:
+            return list(connections)
+        except TypeError:
+            return None
+
+    def pool_stats(self) -> dict:
+        """
+        Shared pool usage: models, requests sent, connections used so far, and open/idle connections
+        per client (None when the installed httpx does not expose them).
+        """
+        stats = {
+            "models": len(self._models),
+            "requests": self._requests,
+            "connections_used": self._connections_used,
+            "http2": self.http2,
+        }
+        for name, client in (("sync", self._client), ("async", self._async_client)):
+            connections = self._pool_connections(client) if client is not None else []
+            if connections is None:
+                stats[f"{name}_open"] = stats[f"{name}_idle"] = None
+                continue
+            stats[f"{name}_open"] = len(connections)
+            stats[f"{name}_idle"] = sum(1 for c in connections if callable(getattr(c, "is_idle", None)) and c.is_idle())
+        return stats
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+
+
+model_registry = ModelRegistry()
+
+
+def get_model(model: str | None = None, provider: str | None = None, temperature: float = 0.1, **kwargs):
+    """Shortcut for ``model_registry.get``."""
+    return model_registry.get(model, provider, temperature, **kwargs)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from utils.recording import Recorder
+
+
+def _fingerprint(message: BaseMessage) -> dict:
+    """The parts of a message that identify a request; ids and response metadata change between runs."""
+    entry = {"type": message.type, "content": message.content}
+    for attribute in ("name", "tool_call_id"):
+        if getattr(message, attribute, None):
+            entry[attribute] = getattr(message, attribute)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        entry["tool_calls"] = [{"name": call["name"], "args": call["args"], "id": call.get("id")} for call in tool_calls]
+    return entry
+
+
+def model_request(model: str, messages: list[BaseMessage], stop, kwargs: dict) -> dict:
+    tools = [tool.get("function", tool).get("name") for tool in kwargs.get("tools") or []]
+    return {"model": model, "messages": [_fingerprint(m) for m in messages], "stop": stop, "tools": sorted(tools)}
+
+
+def _to_result(response: dict) -> ChatResult:
+    messages = messages_from_dict(response["messages"])
+    return ChatResult(generations=[ChatGeneration(message=m) for m in messages], llm_output=response.get("llm_output"))
+
+
+class _ToolBindingMixin:
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        # Tools are passed on as OpenAI-format definitions, which both providers accept
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+
+class RecordingChatModel(_ToolBindingMixin, BaseChatModel):
+    """Passes calls to ``inner`` and records each request and response with ``recorder``."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseChatModel
+    recorder: Recorder
+    model_name: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def _save(self, messages, stop, kwargs, result: ChatResult, started: float, duration: float):
+        response = {
+            "messages": [message_to_dict(generation.message) for generation in result.generations],
+            "llm_output": result.llm_output,
+        }
+        self.recorder.record("model", self.model_name, model_request(self.model_name, messages, stop, kwargs),
+                             response, started, duration)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started, start = time.time(), time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self._save(messages, stop, kwargs, result, started, time.perf_counter() - start)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        started, start = time.time(), time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self._save(messages, stop, kwargs, result, started, time.perf_counter() - start)
+        return result
+
+
+class ReplayChatModel(_ToolBindingMixin, BaseChatModel):
+    """Serves responses recorded by RecordingChatModel; never touches the network."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    recorder: Recorder
+    model_name: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        response, delay = self.recorder.replay("model", self.model_name, model_request(self.model_name, messages, stop, kwargs))
+        if delay:
+            time.sleep(delay)
+        return _to_result(response)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        response, delay = self.recorder.replay("model", self.model_name, model_request(self.model_name, messages, stop, kwargs))
+        if delay:
+            await asyncio.sleep(delay)
+        return _to_result(response)
@@ -1,9 +1,12 @@
 from langchain_core.tools import tool
+import asyncio
 import webbrowser
-import requests
-from utils import log_return
-from bs4 import BeautifulSoup, NavigableString
+import httpx
+from utils import ToolError, log_return
 from ai_agents.tools.web_tools.session_for_tool import PlaywrightSessionAsync
+from ai_agents.tools.web_tools.search_client import get_search_client
+from ai_agents.tools.web_tools.link_engine import default_link_engine
+from ai_agents.tools.web_tools.readability import extract_readable
 import json
 
 browser_session: PlaywrightSessionAsync | None = None
@@ -18,7 +21,7 @@ async def init_browser_session():
     global browser_session
 
     if browser_session is None:
-        browser_session = PlaywrightSessionAsync()
+        browser_session = PlaywrightSessionAsync(persistent=True)
         await browser_session.__aenter__()
         return 'Browser initialized (new instance).'
 
@@ -42,12 +45,12 @@ async def browser_navigate(link: str):
     """
     session = ensure_browser_session()
     if not session:
-        return "Browser session not initialized. Call init_browser_session() first."
+        return ToolError("Browser session not initialized. Call init_browser_session() first.")
     try:
         await session.goto_page(link)
         return f'You have successfully navigated to the page: {link}.'
     except Exception as ex:
-        return f'Error: {ex}'
+        return ToolError(f'Error: {ex}')
 
 
 @tool
@@ -65,7 +68,7 @@ async def browser_get_html_by_part(part_num: int = 0, chunk_size: int = 100) ->
      """
     session = ensure_browser_session()
     if not session:
-        return json.dumps({"error": "Browser session not initialized. Call init_browser_session() first."})
+        return ToolError(json.dumps({"error": "Browser session not initialized. Call init_browser_session() first."}))
     try:
         elements = await session.get_visible_text_elements()
         total_elements = len(elements)
@@ -87,9 +90,34 @@ async def browser_get_html_by_part(part_num: int = 0, chunk_size: int = 100) ->
             "part_num": part_num,
             "total_elements": total_elements,
             "chunk": chunk
-        }, ensure_ascii=False, indent=2)
+        }, ensure_ascii=False, separators=(",", ":"))
     except Exception as ex:
-        return json.dumps({"error": str(ex)})
+        return ToolError(json.dumps({"error": str(ex)}))
+
+@tool
+@log_return
+async def browser_get_readable_text(max_tokens: int = 0) -> str:
+    """
+    Returns the main content of the current page as compact Markdown (headings, lists, tables, code, links).
+    Navigation bars, footers, sidebars, cookie banners and hidden elements are dropped.
+    Prefer this over browser_get_html_by_part for reading articles, docs and search results;
+    use browser_get_html_by_part only when you need element classes/ids for automation.
+
+    :param max_tokens: token budget for the returned text; 0 returns everything. Blocks beyond the budget are cut.
+    :return:
+        str: Title, URL and token count header followed by the Markdown text.
+    """
+    session = ensure_browser_session()
+    if not session:
+        return ToolError("Browser session not initialized. Call init_browser_session() first.")
+    try:
+        html = await session.get_html()
+        result = await asyncio.to_thread(extract_readable, html, session.page.url, max_tokens)
+        truncated = f" of {result['total_tokens']} (truncated to budget)" if result["truncated"] else ""
+        return (f"Title: {result['title']}\nURL: {session.page.url}\n"
+                f"Tokens: {result['tokens']}{truncated}\n\n{result['markdown']}")
+    except Exception as ex:
+        return ToolError(f"Error: {ex}")
 
 @tool
 @log_return
@@ -108,88 +136,68 @@ async def browser_use_console(command: str):
     """
     session = ensure_browser_session()
     if not session:
-        return "Browser session not initialized. Call init_browser_session() first."
+        return ToolError("Browser session not initialized. Call init_browser_session() first.")
     try:
         return await session.eval_console(command)
     except Exception as ex:
-        return f"Error: {ex}"
+        return ToolError(f"Error: {ex}")
 
 
 @tool
 @log_return
-async def browser_get_all_links(part_num:int) -> str:
+async def browser_get_all_links(cursor: str = "", domain: str = "", path_pattern: str = "", text: str = "",
+                                limit: int = 40, refresh: bool = False) -> str:
     """
-    Extract all hyperlink URLs from the current page.
-    Link generator from a page
-    :param part_num: element in a chunk from lists of links
+    List the links of the current page with their anchor text, optionally filtered, page by page.
+
+    The page is scanned once per navigation; further pages and filters are served from that scan.
+    :param cursor: 'next_cursor' from the previous call to get the next page; empty for the first page
+    :param domain: keep only links on these domains (comma-separated, subdomains included), e.g. 'github.com'
+    :param path_pattern: keep only links whose path/query matches this regular expression, e.g. '/docs/'
+    :param text: keep only links whose anchor text contains this substring (case-insensitive)
+    :param limit: links per page
+    :param refresh: rescan the page (use after content was loaded without navigation, e.g. infinite scroll)
     :return:
-        str: A list of all href values from <a> tags on the page.
+        str: JSON with total_links, matched, links [{url, text}] and next_cursor (empty on the last page).
     """
     session = ensure_browser_session()
     if not session:
-        return "Browser session not initialized. Call init_browser_session() first."
+        return ToolError("Browser session not initialized. Call init_browser_session() first.")
     try:
-        links = await session.get_all_links()
-        chunks = [links[i:i + 40] for i in range(0, len(links), 40)]
-        if part_num < 0 or part_num > len(chunks):
-            return f'Error: part_num: {part_num} out of range {len(chunks)}'
-        return f'Length of links chunks: {len(chunks)}. The links part numbered {part_num}: {chunks[part_num]}'
+        index = await session.get_link_index(refresh=refresh)
+        return json.dumps(index.page(cursor, limit, domain, path_pattern, text), ensure_ascii=False)
     except Exception as ex:
-        return f'Error: {ex}'
+        return ToolError(f'Error: {ex}')
 
 
 
 
 @tool
 @log_return
-def get_working_links(query: str, max_results: int = 50) -> str:
+async def get_working_links(query: str, extra_queries: list[str] | None = None, max_results: int = 15) -> str:
     """
-    Perform a DuckDuckGo search and return result URLs as a newline-separated string.
+    Perform a DuckDuckGo search and return result URLs as a comma-separated string.
 
     Args:
         query (str): Search query.
-        max_results (int, optional): Maximum number of links to return. Defaults to 50.
+        extra_queries (list[str], optional): Additional variants of the query (synonyms, other language,
+            narrower wording). All variants are searched concurrently and the results are merged without duplicates.
+        max_results (int, optional): Maximum number of links to return. Defaults to 15.
 
     Returns:
-        str: Newline-separated valid URLs, or an error message.
+        str: Comma-separated canonical URLs without duplicates or banned domains, best matches first,
+            or an error message.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
-    params = {
-        "q": query,
-        "kl": "ru-ru",
-    }
-    url = "https://html.duckduckgo.com/html/"
-
     try:
-        response = requests.post(url, headers=headers, data=params, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        return f"Search failed: {str(e)}"
-
-    soup = BeautifulSoup(response.text, "html.parser")
-    raw_links = [a["href"] for a in soup.find_all("a", class_="result__a", href=True)]
-
-    banned_domains = [
-        "https://okko.tv", "https://rutube.ru", "https://yandex.ru",
-        "https://www.kinopoisk.ru", "https://www.netflix.com", "https://hd.kinopoisk.ru",
-        "https://premier.one/", "https://2x2tv.ru", "https://www.crunchyroll.com"
-    ]
-
-    filtered_links = []
-    for link in raw_links:
-        if any(link.startswith(banned) for banned in banned_domains):
-            continue
-        if link not in filtered_links:
-            filtered_links.append(link)
-        if len(filtered_links) >= max_results:
-            break
-
-    if not filtered_links:
+        raw_links = await get_search_client().search_many([query, *(extra_queries or [])])
+    except httpx.HTTPError as e:
+        return ToolError(f"Search failed: {str(e)}")
+
+    links = default_link_engine.rank(raw_links, query=" ".join([query, *(extra_queries or [])]), limit=max_results)
+    if not links:
         return "No valid links found."
 
-    return ", ".join(filtered_links)
+    return ", ".join(links)
 
 
 @tool
@@ -209,6 +217,6 @@ def open_link_in_browser(url: str):
         error: If the URL does not start with 'http://' or 'https://'.
     """
     if not url.startswith(("http://", "https://")):
-        return "Error: URL must start with 'http://' or 'https://'"
+        return ToolError("Error: URL must start with 'http://' or 'https://'")
     webbrowser.open_new_tab(url)
     return f"🔍 Открыл результаты поиска: {url}"
@@ -0,0 +1,241 @@
+import itertools
+import re
+import zlib
+from typing import Iterable
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "yclid", "ysclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_openstat", "_ga", "_gl", "srsltid", "spm", "ref_src", "from_block",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+DEFAULT_DENY_DOMAINS = {
+    "okko.tv", "rutube.ru", "yandex.ru", "kinopoisk.ru", "netflix.com",
+    "premier.one", "2x2tv.ru", "crunchyroll.com",
+}
+
+# Additive score per domain (suffix match); positive is preferred, negative is pushed down.
+DEFAULT_DOMAIN_SCORES = {
+    "wikipedia.org": 1.0,
+    "github.com": 0.8,
+    "stackoverflow.com": 0.8,
+    "habr.com": 0.6,
+    "python.org": 0.6,
+    "pinterest.com": -1.0,
+    "pinterest.ru": -1.0,
+    "tiktok.com": -0.8,
+}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_WORD_RE = re.compile(r"[^\W_]{3,}")
+
+
+def canonicalize_url(url: str) -> str | None:
+    """
+    Returns a canonical form of an http(s) URL, or None if it is not a web link.
+
+    Scheme and host are lowercased, default ports, fragments and tracking
+    parameters are removed, and DuckDuckGo ``/l/?uddg=`` redirects are unwrapped.
+    """
+    url = (url or "").strip()
+    if url.startswith("//"):
+        url = "https:" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip(".")
+    if host.endswith("duckduckgo.com") and parts.path == "/l/":
+        target = dict(parse_qsl(parts.query)).get("uddg")
+        return canonicalize_url(unquote(target)) if target else None
+
+    netloc = host if port in (None, _DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query, doseq=True), ""))
+
+
+def url_host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class DomainSet:
+    """
+    Set of domains matched by suffix: ``example.com`` also matches ``www.example.com``.
+
+    A lookup walks the labels of the host, so it costs one hash probe per label
+    regardless of how many domains are in the set.
+    """
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._domains: set[str] = set()
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str):
+        domain = domain.strip().lower()
+        if "://" in domain:
+            domain = url_host(domain)
+        domain = domain.strip(".")
+        if domain:
+            self._domains.add(domain)
+
+    def __len__(self):
+        return len(self._domains)
+
+    def match(self, host: str) -> str | None:
+        """Returns the most specific domain of the set that ``host`` belongs to."""
+        host = host.lower().rstrip(".")
+        while host:
+            if host in self._domains:
+                return host
+            _, _, host = host.partition(".")
+        return None
+
+    def __contains__(self, host: str) -> bool:
+        return self.match(host) is not None
+
+
+class LinkEngine:
+    """
+    Canonicalizes, filters, deduplicates and ranks candidate links.
+
+    ``deny`` domains are always dropped; when ``allow`` is given only those domains
+    are kept. Ranking combines the domain score, how many query words occur in the
+    URL, and the original position of the link.
+    """
+
+    def __init__(
+        self,
+        deny: Iterable[str] = DEFAULT_DENY_DOMAINS,
+        allow: Iterable[str] | None = None,
+        domain_scores: dict[str, float] | None = None,
+    ):
+        self.deny = DomainSet(deny)
+        self.allow = DomainSet(allow) if allow is not None else None
+        scores = DEFAULT_DOMAIN_SCORES if domain_scores is None else domain_scores
+        self.domain_scores = dict(scores)
+        self._scored_domains = DomainSet(self.domain_scores)
+
+    def is_allowed(self, url: str) -> bool:
+        host = url_host(url)
+        if host in self.deny:
+            return False
+        return self.allow is None or host in self.allow
+
+    def unique(self, urls: Iterable[str]) -> list[str]:
+        """Canonical, allowed URLs in first-seen order without duplicates."""
+        seen = {}
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if canonical and canonical not in seen and self.is_allowed(canonical):
+                seen[canonical] = None
+        return list(seen)
+
+    def score(self, url: str, query: str = "", position: int = 0) -> float:
+        domain = self._scored_domains.match(url_host(url))
+        value = self.domain_scores[domain] if domain else 0.0
+        query_words = set(_WORD_RE.findall(query.lower()))
+        if query_words:
+            url_words = set(_WORD_RE.findall(unquote(url).lower()))
+            value += len(query_words & url_words) / len(query_words)
+        return value + 0.5 / (1 + position)
+
+    def rank(self, urls: Iterable[str], query: str = "", limit: int | None = None) -> list[str]:
+        """Unique allowed URLs ordered by score, best first."""
+        unique = self.unique(urls)
+        scored = sorted(
+            enumerate(unique),
+            key=lambda item: self.score(item[1], query, item[0]),
+            reverse=True,
+        )
+        ranked = [url for _, url in scored]
+        return ranked[:limit] if limit is not None else ranked
+
+
+default_link_engine = LinkEngine()
+
+# Every LinkIndex gets its own generation, so a rescan of the same page invalidates old cursors
+_generations = itertools.count(1)
+
+
+class LinkIndex:
+    """
+    Deduplicated ``(url, anchor text)`` pairs of one page, with filtering and cursor paging.
+
+    An index belongs to a single scan of a page: cursors embed its ``navigation_id``, its
+    ``generation`` (new for every rescan, even of the same navigation) and the filter they were
+    issued for, so a cursor from another page, scan or filter is rejected instead of silently
+    returning a shifted slice.
+    """
+
+    def __init__(self, navigation_id: int, raw_links: Iterable[tuple[str, str]], engine: LinkEngine | None = None):
+        self.navigation_id = navigation_id
+        self.generation = next(_generations)
+        engine = engine or LinkEngine(deny=())
+        entries: dict[str, str] = {}
+        for href, text in raw_links:
+            canonical = canonicalize_url(href)
+            if not canonical or not engine.is_allowed(canonical):
+                continue
+            if not entries.get(canonical):
+                entries[canonical] = text or ""
+        self.entries: list[tuple[str, str]] = list(entries.items())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def filter(self, domain: str = "", path_pattern: str = "", text: str = "") -> list[tuple[str, str]]:
+        """
+        Entries matching every given filter: ``domain`` by suffix, ``path_pattern`` as a regex
+        searched in path and query, ``text`` as a case-insensitive substring of the anchor text.
+        """
+        domains = DomainSet(d for d in domain.split(",") if d.strip()) if domain else None
+        path_re = re.compile(path_pattern) if path_pattern else None
+        text = text.lower()
+        result = []
+        for url, anchor in self.entries:
+            if domains is not None and url_host(url) not in domains:
+                continue
+            if path_re is not None:
+                parts = urlsplit(url)
+                if not path_re.search(f"{parts.path}?{parts.query}" if parts.query else parts.path):
+                    continue
+            if text and text not in anchor.lower():
+                continue
+            result.append((url, anchor))
+        return result
+
+    def page(self, cursor: str = "", limit: int = 40, domain: str = "", path_pattern: str = "", text: str = "") -> dict:
+        """Returns one page of filtered entries and the cursor of the next page (empty on the last page)."""
+        filter_key = f"{zlib.crc32(f'{domain}|{path_pattern}|{text}'.encode()):08x}"
+        offset = 0
+        if cursor:
+            try:
+                navigation_id, generation, cursor_filter, raw_offset = cursor.split(":")
+                navigation_id, generation, offset = int(navigation_id), int(generation), int(raw_offset)
+            except ValueError:
+                raise ValueError(f"malformed cursor {cursor!r}")
+            if navigation_id != self.navigation_id:
+                raise ValueError("cursor belongs to a previous page; request the links again without a cursor")
+            if generation != self.generation:
+                raise ValueError("the page was rescanned after this cursor was issued; request the links again without a cursor")
+            if cursor_filter != filter_key:
+                raise ValueError("cursor was issued for different filters; repeat the same filters or drop the cursor")
+        limit = max(1, limit)
+        matched = self.filter(domain, path_pattern, text)
+        end = offset + limit
+        return {
+            "total_links": len(self.entries),
+            "matched": len(matched),
+            "links": [{"url": url, "text": anchor} for url, anchor in matched[offset:end]],
+            "next_cursor": f"{self.navigation_id}:{self.generation}:{filter_key}:{end}" if end < len(matched) else "",
+        }
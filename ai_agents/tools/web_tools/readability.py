@@ -0,0 +1,245 @@
+import os
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+DROP_TAGS = ["script", "style", "noscript", "svg", "iframe", "template", "canvas", "form", "button", "select", "input"]
+BOILERPLATE_TAGS = ["nav", "footer", "aside"]
+BOILERPLATE_RE = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|footer|sidebar|cookie|consent|banner|advert|ads|promo|share|social|"
+    r"breadcrumbs?|subscribe|popup|modal|related|comments?)($|[\s_-])",
+    re.IGNORECASE,
+)
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "td", "th", "pre",
+              "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "dl", "dt", "dd", "figure", "figcaption", "header"}
+_SPACE_RE = re.compile(r"\s+")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with the gpt-4o tokenizer; falls back to a 4-chars-per-token estimate without tiktoken.
+
+    MISTERKNEW_TOKENIZER=estimate always estimates: tiktoken downloads its encoding on first use,
+    which stalls offline and makes counts depend on whether that download succeeded.
+    """
+    global _encoding
+    if _encoding is None:
+        if os.environ.get("MISTERKNEW_TOKENIZER") == "estimate":
+            _encoding = False
+            return (len(text) + 3) // 4
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as ex:
+            log.warning(f"tiktoken unavailable, estimating token counts: {ex!r}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _is_boilerplate(tag: Tag) -> bool:
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    if tag.name == "header" and not tag.find_parent(["article", "main"]):
+        return True
+    if tag.get("hidden") is not None or tag.get("aria-hidden") == "true":
+        return True
+    if tag.get("role") in ("navigation", "banner", "contentinfo", "complementary"):
+        return True
+    style = (tag.get("style") or "").replace(" ", "").lower()
+    if "display:none" in style or "visibility:hidden" in style:
+        return True
+    if tag.name in ("body", "main", "article"):
+        return False
+    marker = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+    return bool(BOILERPLATE_RE.search(marker))
+
+
+def _clean(soup: BeautifulSoup):
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+    for tag in soup.find_all(DROP_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed:
+            continue
+        if tag.attrs is not None and _is_boilerplate(tag):
+            tag.decompose()
+
+
+def _text_length(tag: Tag) -> int:
+    return len(_SPACE_RE.sub(" ", tag.get_text(" ", strip=True)))
+
+
+def _link_density(tag: Tag) -> float:
+    total = _text_length(tag)
+    if not total:
+        return 1.0
+    return sum(_text_length(a) for a in tag.find_all("a")) / total
+
+
+def find_main_content(soup: BeautifulSoup) -> Tag:
+    """
+    Picks the element holding the main content: an explicit ``<main>``/``<article>`` if it carries
+    most of the text, otherwise the container whose paragraphs score highest (text length and
+    commas, penalized by link density).
+    """
+    body = soup.body or soup
+    body_length = _text_length(body) or 1
+    for candidate in (soup.find("main"), soup.find(attrs={"role": "main"}), soup.find("article")):
+        if candidate is not None and _text_length(candidate) >= 0.3 * body_length:
+            return candidate
+
+    scores: dict[int, float] = {}
+    nodes: dict[int, Tag] = {}
+    for paragraph in body.find_all(["p", "pre", "td", "li", "blockquote"]):
+        text = paragraph.get_text(" ", strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + text.count("，") + min(len(text) / 100, 3)
+        for depth, ancestor in enumerate((paragraph.parent, paragraph.parent.parent if paragraph.parent else None)):
+            if ancestor is None or not isinstance(ancestor, Tag):
+                continue
+            nodes[id(ancestor)] = ancestor
+            scores[id(ancestor)] = scores.get(id(ancestor), 0.0) + (score if depth == 0 else score / 2)
+
+    if not scores:
+        return body
+    best = max(scores, key=lambda key: scores[key] * (1 - _link_density(nodes[key])))
+    return nodes[best]
+
+
+class _MarkdownRenderer:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.blocks: list[str] = []
+
+    def render(self, root: Tag) -> list[str]:
+        self._block(root)
+        return [block for block in self.blocks if block.strip()]
+
+    def _inline(self, node) -> str:
+        if isinstance(node, NavigableString):
+            return _SPACE_RE.sub(" ", str(node))
+        if not isinstance(node, Tag):
+            return ""
+        if node.name == "br":
+            return "\n"
+        if node.name == "img":
+            return ""
+        inner = "".join(self._inline(child) for child in node.children)
+        if node.name == "a":
+            text = inner.strip()
+            href = node.get("href") or ""
+            if not text:
+                return ""
+            if not href or href.startswith(("#", "javascript:")):
+                return text
+            return f"[{text}]({urljoin(self.base_url, href)})"
+        if node.name in ("strong", "b") and inner.strip():
+            return f"**{inner.strip()}** "
+        if node.name in ("em", "i") and inner.strip():
+            return f"*{inner.strip()}* "
+        if node.name == "code" and inner.strip():
+            return f"`{inner.strip()}`"
+        return inner
+
+    def _flush_inline(self, parts: list[str]):
+        text = "".join(parts).strip()
+        text = re.sub(r"[ \t]+", " ", text)
+        if text:
+            self.blocks.append(text)
+        parts.clear()
+
+    def _block(self, node: Tag, list_prefix: str = ""):
+        pending: list[str] = []
+        for child in node.children:
+            if isinstance(child, Tag) and child.name in BLOCK_TAGS:
+                self._flush_inline(pending)
+                self._render_block(child, list_prefix)
+            else:
+                pending.append(self._inline(child))
+        self._flush_inline(pending)
+
+    def _render_block(self, tag: Tag, list_prefix: str):
+        name = tag.name
+        if name in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            text = self._inline(tag).strip()
+            if text:
+                self.blocks.append(f"{'#' * int(name[1])} {text}")
+        elif name in ("ul", "ol"):
+            items = []
+            for position, item in enumerate(tag.find_all("li", recursive=False), start=1):
+                marker = f"{position}." if name == "ol" else "-"
+                nested = _MarkdownRenderer(self.base_url)
+                nested._block(item, list_prefix + "  ")
+                lines = [line for line in nested.blocks if line.strip()]
+                if lines:
+                    items.append(f"{list_prefix}{marker} {lines[0]}")
+                    items.extend(line if line.startswith(list_prefix + "  ") else f"{list_prefix}  {line}" for line in lines[1:])
+            if items:
+                self.blocks.append("\n".join(items))
+        elif name == "pre":
+            code = tag.get_text().strip("\n")
+            if code.strip():
+                self.blocks.append(f"```\n{code}\n```")
+        elif name == "blockquote":
+            nested = _MarkdownRenderer(self.base_url)
+            nested._block(tag)
+            if nested.blocks:
+                self.blocks.append("\n".join(f"> {line}" for line in "\n\n".join(nested.blocks).splitlines()))
+        elif name == "table":
+            rows = []
+            for row in tag.find_all("tr"):
+                cells = [self._inline(cell).strip() for cell in row.find_all(["td", "th"])]
+                if any(cells):
+                    rows.append("| " + " | ".join(cells) + " |")
+            if rows:
+                self.blocks.append("\n".join(rows))
+        else:
+            self._block(tag, list_prefix)
+
+
+def extract_readable(html: str, base_url: str = "", max_tokens: int = 0) -> dict:
+    """
+    Converts a page to compact Markdown of its main content.
+
+    Navigation, footers, sidebars, hidden nodes and scripts are removed, the main content
+    container is located, and headings, lists, tables, code and links are kept.
+    With ``max_tokens`` > 0 whole blocks are emitted in document order until the budget is used.
+
+    :return: dict with title, markdown, tokens (of the returned markdown), total_tokens and truncated
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    _clean(soup)
+    blocks = _MarkdownRenderer(base_url).render(find_main_content(soup))
+
+    block_tokens = [count_tokens(block) for block in blocks]
+    total_tokens = sum(block_tokens)
+    kept = blocks
+    if max_tokens > 0 and total_tokens > max_tokens:
+        used = 0
+        kept = []
+        for block, tokens in zip(blocks, block_tokens):
+            if used + tokens > max_tokens:
+                break
+            kept.append(block)
+            used += tokens
+        kept.append(f"…[truncated: {total_tokens - used} more tokens]")
+
+    markdown = "\n\n".join(kept)
+    return {
+        "title": title,
+        "markdown": markdown,
+        "tokens": count_tokens(markdown),
+        "total_tokens": total_tokens,
+        "truncated": kept is not blocks,
+    }
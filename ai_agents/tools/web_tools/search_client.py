@@ -0,0 +1,135 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+DUCKDUCKGO_HTML_URL = "https://html.duckduckgo.com/html/"
+
+
+class AsyncSearchClient:
+    """
+    Async DuckDuckGo HTML search client backed by one pooled ``httpx.AsyncClient``.
+
+    Connections are kept alive between calls, and every request to a host goes
+    through a per-host semaphore so a batch of queries cannot flood one endpoint.
+    ``search_url`` can point at any server that answers with DuckDuckGo-like HTML
+    (``a.result__a`` anchors), e.g. a local fixture server.
+    """
+
+    def __init__(
+        self,
+        search_url: str = DUCKDUCKGO_HTML_URL,
+        region: str = "ru-ru",
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        per_host_limit: int = 4,
+        host_limits: dict[str, int] | None = None,
+    ):
+        self.search_url = search_url
+        self.region = region
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.per_host_limit = per_host_limit
+        self.host_limits = dict(host_limits or {})
+        self.headers = {"User-Agent": "Mozilla/5.0"}
+        self._client: httpx.AsyncClient | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.host_limits.get(host, self.per_host_limit))
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    def set_host_limit(self, host: str, limit: int):
+        """Changes the concurrency cap for ``host``; applies to requests started afterwards."""
+        self.host_limits[host.lower()] = limit
+        self._semaphores.pop(host.lower(), None)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def search(self, query: str) -> list[str]:
+        """Runs one query and returns result URLs in page order."""
+        async with self._host_semaphore(self.search_url):
+            response = await self._get_client().post(
+                self.search_url,
+                data={"q": query, "kl": self.region},
+            )
+        response.raise_for_status()
+        return parse_result_links(response.text)
+
+    async def search_many(self, queries: list[str]) -> list[str]:
+        """
+        Runs all queries concurrently and merges their results.
+
+        Results are interleaved round-robin (first hit of every query, then the
+        second, ...) so each variant contributes its best links, and duplicates
+        are dropped. A failed query is logged and skipped; if every query fails
+        the first error is raised.
+        """
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        outcomes = await asyncio.gather(*(self.search(q) for q in queries), return_exceptions=True)
+
+        result_lists = []
+        errors = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, BaseException):
+                log.warning(f"Search for {query!r} failed: {outcome!r}")
+                errors.append(outcome)
+            else:
+                result_lists.append(outcome)
+        if errors and not result_lists:
+            raise errors[0]
+
+        merged = {}
+        for position in range(max((len(r) for r in result_lists), default=0)):
+            for results in result_lists:
+                if position < len(results):
+                    merged.setdefault(results[position], None)
+        return list(merged)
+
+
+def parse_result_links(html: str) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [a["href"] for a in soup.find_all("a", class_="result__a", href=True)]
+
+
+_search_client: AsyncSearchClient | None = None
+
+
+def get_search_client() -> AsyncSearchClient:
+    """Returns the process-wide search client, so all tools share one connection pool."""
+    global _search_client
+    if _search_client is None:
+        _search_client = AsyncSearchClient()
+    return _search_client
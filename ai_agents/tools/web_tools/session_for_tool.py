@@ -1,13 +1,66 @@
 import asyncio
-from playwright.async_api import async_playwright
+import os
+import shutil
 import json
+from ai_agents.tools.web_tools.link_engine import LinkIndex
+from utils.cookie_store import CookieStore, cookie_store, url_site
+from logging_folder import get_logger
+from logging_folder.metrics import metrics
+from logging_folder.tracing import span
+from utils.paths import LEGACY_PROFILE_DIR, PROFILE_DIR
+
+log = get_logger(__name__)
+
+PROFILE_MAX_BYTES = 768 * 1024 * 1024
+DISK_CACHE_BYTES = 512 * 1024 * 1024
+COOKIES_STAMP_FILE = "misterknew_cookies.json"
+# Seconds to collect newly injected sites before the stamp file is rewritten
+STAMP_SAVE_DELAY = 2.0
+# Profile subdirectories that only hold caches and may be dropped to bound the profile size
+PROFILE_CACHE_DIRS = [
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    os.path.join("Default", "Service Worker", "ScriptCache"),
+    os.path.join("Default", "GPUCache"),
+    "GrShaderCache",
+    "ShaderCache",
+    "GraphiteDawnCache",
+]
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
 
-with open("ai_agents\\tools\\web_tools\\playwright_cookies.json", encoding="utf-8") as f:
-    chrome_cookies = json.load(f)
 
 class PlaywrightSessionAsync:
-    def __init__(self, headless: bool = True):
+    """
+    Playwright browser session used by the web tools.
+
+    With ``persistent=True`` Chromium runs on a reusable user data directory, so the HTTP disk
+    cache, service workers, local storage and cookies survive between runs. The profile is trimmed
+    to ``max_profile_bytes`` before launch.
+
+    Cookies are injected lazily per registrable domain: before each navigation for the target
+    site, and in the background for every other site the page requests. Request routing would
+    allow injecting before the very first subresource request, but it disables the HTTP cache,
+    so it is not used. In persistent mode the injected sites are remembered in the profile and
+    are not re-injected until the cookie store changes.
+    """
+    def __init__(self, headless: bool = True, persistent: bool = False, user_data_dir: str = PROFILE_DIR,
+                 max_profile_bytes: int = PROFILE_MAX_BYTES, disk_cache_bytes: int = DISK_CACHE_BYTES):
         self.headless = headless
+        self.persistent = persistent
+        self.user_data_dir = user_data_dir
+        self.max_profile_bytes = max_profile_bytes
+        self.disk_cache_bytes = disk_cache_bytes
         self.playwright = None
         self.browser = None
         self.page = None
@@ -17,28 +70,139 @@ class PlaywrightSessionAsync:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36'
         }
         self.context = None
-        self.cookies = chrome_cookies or []
+        self.cookie_store: CookieStore = cookie_store
+        self._injected_sites: set[str] = set()
+        self._injected_stamp: str | None = None
+        self._pending_injections: dict[str, asyncio.Task] = {}
+        self._stamp_save_task: asyncio.Task | None = None
         self.console_messages = []
+        self.navigation_id = 0
+        self._link_index: LinkIndex | None = None
 
     async def __aenter__(self):
+        from playwright.async_api import async_playwright
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=self.headless,
-                                                             args=[
-                                                                 "--disable-blink-features=AutomationControlled",
-                                                                 "--window-size=1920,1080"
-                                                             ]
-                                                             )
-        self.context = await self.browser.new_context(
-            user_agent=self.headers["User-Agent"],
-            viewport={"width": 1280, "height": 800}
-        )
-        if self.cookies:
-            await self.context.add_cookies(self.cookies)
-        self.page = await self.context.new_page()
+        args = [
+            "--disable-blink-features=AutomationControlled",
+            "--window-size=1920,1080"
+        ]
+        if self.persistent:
+            try:
+                await self._launch_persistent(args)
+            except Exception as ex:
+                log.warning(f"Persistent profile {self.user_data_dir} unavailable, using a fresh context: {ex!r}")
+                self.persistent = False
+        if not self.persistent:
+            self.browser = await self.playwright.chromium.launch(headless=self.headless, args=args)
+            self.context = await self.browser.new_context(
+                user_agent=self.headers["User-Agent"],
+                viewport={"width": 1280, "height": 800}
+            )
+            self.page = await self.context.new_page()
+        self.context.on("request", self._handle_request)
         self.page.on("console", self._handle_console_msg)
+        self.page.on("framenavigated", self._handle_frame_navigated)
         return self
 
+    async def _launch_persistent(self, args: list[str]):
+        if self.user_data_dir == PROFILE_DIR and not os.path.exists(PROFILE_DIR) and os.path.isdir(LEGACY_PROFILE_DIR):
+            # the old location is inside the agent workspace, where the file tools could read the cookies
+            os.makedirs(os.path.dirname(PROFILE_DIR), exist_ok=True)
+            await asyncio.to_thread(shutil.move, LEGACY_PROFILE_DIR, PROFILE_DIR)
+            log.info(f"Moved the browser profile from {LEGACY_PROFILE_DIR} to {PROFILE_DIR}")
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        await asyncio.to_thread(self._trim_profile)
+        self.context = await self.playwright.chromium.launch_persistent_context(
+            self.user_data_dir,
+            headless=self.headless,
+            args=args + [f"--disk-cache-size={self.disk_cache_bytes}"],
+            user_agent=self.headers["User-Agent"],
+            viewport={"width": 1280, "height": 800},
+        )
+        self._load_injected_sites()
+        self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+
+    def _stamp_path(self) -> str:
+        return os.path.join(self.user_data_dir, COOKIES_STAMP_FILE)
+
+    def _load_injected_sites(self):
+        try:
+            with open(self._stamp_path(), encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._injected_stamp = stored.get("stamp")
+        self._injected_sites = set(stored.get("sites", []))
+
+    def _write_stamp(self, stored: dict):
+        with open(self._stamp_path(), "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+
+    async def _save_injected_sites(self):
+        stored = {"stamp": self._injected_stamp, "sites": sorted(self._injected_sites)}
+        try:
+            await asyncio.to_thread(self._write_stamp, stored)
+        except OSError as ex:
+            log.warning(f"Failed to save injected cookie sites: {ex!r}")
+
+    async def _save_injected_sites_later(self):
+        await asyncio.sleep(STAMP_SAVE_DELAY)
+        await self._save_injected_sites()
+
+    def _schedule_stamp_save(self):
+        """Saves the injected sites after STAMP_SAVE_DELAY, once for all sites injected meanwhile."""
+        if self.persistent and (self._stamp_save_task is None or self._stamp_save_task.done()):
+            self._stamp_save_task = asyncio.create_task(self._save_injected_sites_later())
+
+    async def inject_cookies_for(self, url: str):
+        """Adds the stored cookies of the url's site to the context unless they are already there."""
+        site = url_site(url)
+        if not site or self.context is None:
+            return
+        stamp = await asyncio.to_thread(self.cookie_store.stamp)
+        if stamp != self._injected_stamp:
+            self._injected_stamp = stamp
+            self._injected_sites.clear()
+        if site in self._injected_sites:
+            return
+        self._injected_sites.add(site)
+        cookies = await asyncio.to_thread(self.cookie_store.cookies_for_site, site)
+        if cookies:
+            try:
+                await self.context.add_cookies(cookies)
+                log.debug(f"Injected {len(cookies)} cookies for {site}")
+            except Exception as ex:
+                log.warning(f"Failed to inject cookies for {site}: {ex!r}")
+        self._schedule_stamp_save()
+
+    def _handle_request(self, request):
+        site = url_site(request.url)
+        if not site or site in self._injected_sites:
+            return
+        if site not in self._pending_injections:
+            task = asyncio.create_task(self.inject_cookies_for(request.url))
+            self._pending_injections[site] = task
+            task.add_done_callback(lambda _: self._pending_injections.pop(site, None))
+
+    def _trim_profile(self):
+        """Drops cache directories while the profile exceeds max_profile_bytes; session data is kept."""
+        size = _dir_size(self.user_data_dir)
+        if size <= self.max_profile_bytes:
+            return
+        for cache_dir in PROFILE_CACHE_DIRS:
+            path = os.path.join(self.user_data_dir, cache_dir)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        trimmed = _dir_size(self.user_data_dir)
+        log.info(f"Browser profile trimmed from {size} to {trimmed} bytes")
+        if trimmed > self.max_profile_bytes:
+            log.warning(f"Browser profile is still {trimmed} bytes after dropping caches "
+                        f"(limit {self.max_profile_bytes})")
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._stamp_save_task is not None and not self._stamp_save_task.done():
+            self._stamp_save_task.cancel()
+            await self._save_injected_sites()
         if self.context:
             await self.context.close()
         if self.browser:
@@ -49,10 +213,17 @@ class PlaywrightSessionAsync:
     def _handle_console_msg(self, msg):
         self.console_messages.append(f"[{msg.type}] {msg.text}")
 
+    def _handle_frame_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.navigation_id += 1
+            self._link_index = None
+
     async def goto_page(self, url: str):
         if self.page is None:
             raise RuntimeError("Page is not initialized")
-        await self.page.goto(url)
+        await self.inject_cookies_for(url)
+        with metrics.histogram("page_load_seconds").time(), span("goto_page", kind="browser", url=url):
+            await self.page.goto(url)
         await asyncio.sleep(2)
 
     async def get_html(self) -> str:
@@ -62,6 +233,19 @@ class PlaywrightSessionAsync:
         links = await self.page.eval_on_selector_all("a", "elements => elements.map(e => e.href)")
         return links
 
+    async def get_link_index(self, refresh: bool = False) -> LinkIndex:
+        """
+        Returns the link index of the current page, querying the DOM only once per navigation
+        (or when ``refresh`` is set, e.g. after content was loaded by scrolling).
+        """
+        if self._link_index is None or refresh:
+            raw_links = await self.page.eval_on_selector_all(
+                "a[href]",
+                "elements => elements.map(e => [e.href, (e.textContent || e.title || '').replace(/\\s+/g, ' ').trim().slice(0, 120)])"
+            )
+            self._link_index = LinkIndex(self.navigation_id, raw_links)
+        return self._link_index
+
     async def eval_console(self, code: str) -> str:
         self.console_messages.clear()
 
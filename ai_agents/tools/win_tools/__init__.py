@@ -1,15 +1,107 @@
-from langchain_core.tools import tool
-import subprocess
+from langchain_core.tools import BaseTool, tool
+import ast
+import asyncio
+import json
 import os
+import re
 import shlex
-from utils import log_return
+from utils import ToolError, log_return
+from ai_agents.tools.win_tools.shell_engine import DEFAULT_TIMEOUT, ShellEngine
+from ai_agents.tools.win_tools.shell_session import ShellSession
+from ai_agents.tools.win_tools.python_pool import DEFAULT_PRELOAD, PythonPool
+from ai_agents.tools.win_tools.shell_batch import parse_steps, run_batch
+from ai_agents.tools.win_tools import file_tools
+from ai_agents.tools.win_tools.workspace_index import WorkspaceIndex
+from utils.paths import BASE_DIR
 
 
-BASE_DIR = r"C:\Users\bratx\Desktop\MisterKnewData"
+shell_engine = ShellEngine(BASE_DIR)
+# Smaller per-command output for batch reports; shares the output directory with shell_engine
+batch_engine = ShellEngine(BASE_DIR, head_bytes=1000, tail_bytes=1500)
+file_index = WorkspaceIndex(BASE_DIR)
+python_worker_pool = PythonPool(
+    preload=[name for name in os.environ.get("MISTERKNEW_PY_PRELOAD", "").split(",") if name] or DEFAULT_PRELOAD
+)
+
+
+def _resolve_path(filename: str) -> str | None:
+    """Absolute path of ``filename`` inside BASE_DIR, or None if it points outside."""
+    # Приводим к безопасному виду
+    filename = os.path.normpath(filename)
+    if os.path.isabs(filename):
+        filename = os.path.basename(filename)  # запрещаем абсолютные пути
+
+    full_path = os.path.abspath(os.path.join(BASE_DIR, filename))
+
+    # Безопасность: файл должен быть строго внутри BASE_DIR
+    if not full_path.startswith(os.path.abspath(BASE_DIR)):
+        return None
+    return full_path
+
+
+def _existing_file(filename: str) -> tuple[str | None, str | None]:
+    """(path, None) for a file inside BASE_DIR, otherwise (None, error message)."""
+    path = _resolve_path(filename)
+    if path is None:
+        return None, ToolError(f"ERROR: Access denied. File path must be inside {BASE_DIR}.")
+    if not os.path.isfile(path):
+        return None, ToolError(f"ERROR: File not found: {path}")
+    return path, None
+
+
+def _validate_command(command: str, cwd: str | None = None) -> str | None:
+    """
+    Returns an error message if the command touches paths outside BASE_DIR, otherwise None.
+    Relative paths are resolved against ``cwd`` (BASE_DIR by default).
+    """
+    cwd = cwd or BASE_DIR
+    tokens = shlex.split(command)
+    path_sensitive_ops = {"rm", "mv", "python", "pip", "curl", "wget", ">", ">>", "|", "&", ";", "shutdown", "format"}
+
+    for token in tokens:
+        if os.path.isabs(token):
+            norm = os.path.normpath(token)
+            if not norm.startswith(os.path.abspath(BASE_DIR)):
+                return ToolError(f"ERROR: Absolute path '{token}' is outside of {BASE_DIR}")
+
+    for token in tokens:
+        if token in path_sensitive_ops or any(op in token for op in path_sensitive_ops):
+            for arg in tokens:
+                if not arg.startswith("-") and ("/" in arg or "\\" in arg or arg.endswith(".py")):
+                    path = os.path.normpath(os.path.join(cwd, arg))
+                    if not path.startswith(os.path.abspath(BASE_DIR)):
+                        return ToolError(f"ERROR: Operation on path '{arg}' is outside of {BASE_DIR}")
+    return None
+
+
+def _validate_python_code(code: str, cwd: str | None = None) -> str | None:
+    """
+    The path checks of _validate_command for a Python snippet: string literals that are absolute
+    paths, or relative paths with a separator, must stay inside BASE_DIR. Code that does not
+    parse is left to the interpreter to report.
+    """
+    cwd = cwd or BASE_DIR
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Constant) or not isinstance(node.value, str) or "\n" in node.value:
+            continue
+        literal = node.value.strip()
+        if os.path.isabs(literal):
+            if not os.path.normpath(literal).startswith(os.path.abspath(BASE_DIR)):
+                return ToolError(f"ERROR: Absolute path '{literal}' is outside of {BASE_DIR}")
+        elif "/" in literal or "\\" in literal:
+            path = os.path.abspath(os.path.join(cwd, literal))
+            if not path.startswith(os.path.abspath(BASE_DIR)):
+                return ToolError(f"ERROR: Operation on path '{literal}' is outside of {BASE_DIR}")
+    return None
+
 
 @tool
 @log_return
-def run_shell_command(command: str) -> str:
+async def run_shell_command(command: str, timeout: int = DEFAULT_TIMEOUT) -> str:
     """
     Executes a shell command strictly within the allowed base directory.
 
@@ -20,44 +112,116 @@ def run_shell_command(command: str) -> str:
     - The command is executed with working directory set to BASE_DIR.
     - If any absolute path points outside BASE_DIR — command is rejected.
     - This includes paths used by commands like `python`, `pip`, `rm`, etc.
+    - The command is killed (with all its child processes) after `timeout` seconds.
+      Raise the timeout for long builds or installs (up to 1800).
+    - Only the beginning and the end of long output are returned; the full output can be
+      read with `read_command_output` using the command id from the result.
 
-    Returns:c
+    Returns:
         str: Command output or error.
     """
     try:
-        tokens = shlex.split(command)
-        path_sensitive_ops = {"rm", "mv", "python", "pip", "curl", "wget", ">", ">>", "|", "&", ";", "shutdown", "format"}
-
-        for token in tokens:
-            if os.path.isabs(token):
-                norm = os.path.normpath(token)
-                if not norm.startswith(os.path.abspath(BASE_DIR)):
-                    return f"ERROR: Absolute path '{token}' is outside of {BASE_DIR}"
-
-        for token in tokens:
-            if token in path_sensitive_ops or any(op in token for op in path_sensitive_ops):
-                for arg in tokens:
-                    if not arg.startswith("-") and ("/" in arg or "\\" in arg or arg.endswith(".py")):
-                        path = os.path.normpath(os.path.join(BASE_DIR, arg))
-                        if not path.startswith(os.path.abspath(BASE_DIR)):
-                            return f"ERROR: Operation on path '{arg}' is outside of {BASE_DIR}"
-
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=BASE_DIR,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
-        if result.returncode == 0:
-            return result.stdout.strip() or "(no output)"
-        else:
-            return f"ERROR:\n{result.stderr.strip()}"
+        error = _validate_command(command)
+        if error:
+            return error
+        result = await shell_engine.run(command, timeout=timeout)
+        return result.format()
 
     except Exception as e:
-        return f"Execution failed: {str(e)}"
+        return ToolError(f"Execution failed: {str(e)}")
+
+
+def make_shell_session_tool() -> BaseTool:
+    """Creates a run_in_shell_session tool bound to its own persistent shell; give one to each agent."""
+    session = ShellSession(BASE_DIR, shell_engine)
+
+    @tool
+    @log_return
+    async def run_in_shell_session(command: str, timeout: int = DEFAULT_TIMEOUT) -> str:
+        """
+        Executes a command in your persistent shell session (bash, or cmd on Windows).
+
+        Unlike run_shell_command, state is kept between calls: `cd`, environment variables
+        and activated virtualenvs stay in effect, and there is no process start-up per call,
+        so prefer it for sequences of small commands.
+
+        Rules:
+        - The session starts in BASE_DIR and is moved back there if it leaves it.
+        - The same path restrictions as in run_shell_command apply.
+        - On timeout the session is killed and restarts fresh on the next call.
+        - Long output is truncated; use read_command_output with the reported command id.
+
+        Returns:
+            str: Command output or error.
+        """
+        try:
+            error = _validate_command(command, session.cwd)
+            if error:
+                return error
+            result = await session.run(command, timeout=timeout)
+            return result.format()
+
+        except Exception as e:
+            return ToolError(f"Execution failed: {str(e)}")
+
+    return run_in_shell_session
+
+
+@tool
+@log_return
+async def run_shell_batch(steps: list[dict], max_parallel: int = 4) -> str:
+    """
+    Runs several shell commands in one call, e.g. mkdir, pip install and a test run.
+
+    Each step is a dict: {"id": "install", "command": "pip install x", "after": ["mkdir"], "timeout": 300}.
+    - "id" is optional (defaults to the step number, starting at 1).
+    - Without "after" a step runs after the previous one; list the ids it needs instead,
+      or pass "after": [] to let independent steps run in parallel.
+    - If a step fails, the steps that depend on it are skipped; independent steps still run.
+    All commands are checked against the BASE_DIR restrictions before anything runs.
+
+    Args:
+        steps: List of step dicts (up to 50).
+        max_parallel: How many commands may run at the same time (1-8).
+
+    Returns:
+        str: JSON report: {"ok", "duration", "steps": [{"id", "status", "exit_code", "duration", "output"}]}.
+            Status is ok/failed/timeout/skipped, or error (with an "error" message) when the command could not
+            be started; truncated outputs include a command_id for read_command_output.
+    """
+    try:
+        parsed = parse_steps(steps)
+        for step in parsed:
+            error = _validate_command(step.command)
+            if error:
+                return ToolError(f"ERROR in step {step.id!r}: {error.removeprefix('ERROR: ')}")
+        report = await run_batch(batch_engine, parsed, max_parallel)
+        return json.dumps(report, ensure_ascii=False, separators=(",", ":"))
+
+    except ValueError as e:
+        return ToolError(f"ERROR: {str(e)}")
+    except Exception as e:
+        return ToolError(f"Execution failed: {str(e)}")
+
+
+@tool
+@log_return
+def read_command_output(command_id: str, offset: int = 0, limit: int = 8000) -> str:
+    """
+    Reads the full saved output of a previous run_shell_command call whose output was truncated.
+
+    Args:
+        command_id: Id reported in the truncated result.
+        offset: Byte offset to start reading from.
+        limit: Maximum number of bytes to return (up to 65536).
+
+    Returns:
+        The requested part of the output and the offset to continue from.
+    """
+    try:
+        return shell_engine.read_output(command_id, offset, limit)
+    except Exception as e:
+        return ToolError(f"Failed to read command output: {str(e)}")
 
 
 @tool
@@ -76,23 +240,163 @@ def save_python_code(filename: str, code: str) -> str:
         Message about the result.
     """
     try:
-        # Приводим к безопасному виду
-        filename = os.path.normpath(filename)
-        if os.path.isabs(filename):
-            filename = os.path.basename(filename)  # запрещаем абсолютные пути
-
-        full_path = os.path.abspath(os.path.join(BASE_DIR, filename))
-
-        # Безопасность: файл должен быть строго внутри BASE_DIR
-        if not full_path.startswith(os.path.abspath(BASE_DIR)):
-            return f"ERROR: Access denied. File path must be inside {BASE_DIR}."
+        full_path = _resolve_path(filename)
+        if full_path is None:
+            return ToolError(f"ERROR: Access denied. File path must be inside {BASE_DIR}.")
 
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
 
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(code)
+        file_index.update_path(full_path)
 
         return f"Code saved to {full_path}"
 
     except Exception as e:
-        return f"Failed to save file: {str(e)}"
+        return ToolError(f"Failed to save file: {str(e)}")
+
+
+@tool
+@log_return
+async def run_python(code: str = "", filename: str = "", args: list[str] | None = None,
+                     timeout: int = DEFAULT_TIMEOUT) -> str:
+    """
+    Runs Python code in a warm interpreter (common libraries already imported), which is much
+    faster than `run_shell_command("python script.py")`. Use it for scripts and quick checks.
+
+    Pass either `code` (a snippet) or `filename` (a script inside BASE_DIR, e.g. one saved with
+    save_python_code). The working directory is BASE_DIR, stdin is empty, and each run starts
+    with fresh globals. Do not rely on state from previous runs.
+
+    Args:
+        code: Python source to run.
+        filename: Relative path of a script inside BASE_DIR.
+        args: Command line arguments (sys.argv[1:]).
+        timeout: Seconds before the script is killed (up to 1800).
+
+    Returns:
+        str: stdout (and stderr) of the script, or an error with the traceback.
+    """
+    try:
+        if bool(code) == bool(filename):
+            return ToolError("ERROR: Pass exactly one of `code` or `filename`.")
+        path = ""
+        if filename:
+            path, error = _existing_file(filename)
+        else:
+            error = _validate_python_code(code)
+        if error:
+            return error
+        result = await python_worker_pool.run(code=code, path=path, args=args, cwd=BASE_DIR, timeout=timeout)
+        return result.format()
+
+    except Exception as e:
+        return ToolError(f"Execution failed: {str(e)}")
+
+
+@tool
+@log_return
+async def read_file_range(filename: str, start_line: int = 1, num_lines: int = 100, byte_offset: int = -1) -> str:
+    """
+    Reads part of a file inside BASE_DIR without loading the whole file.
+
+    By default returns `num_lines` numbered lines starting at `start_line` (1-based, up to 500).
+    If `byte_offset` >= 0, returns up to 8000 bytes starting at that byte instead.
+    Use file_stat first to see the size and line count of large files.
+
+    Returns:
+        str: The requested lines or bytes and the position to continue from.
+    """
+    try:
+        path, error = _existing_file(filename)
+        if error:
+            return error
+        if byte_offset >= 0:
+            return await asyncio.to_thread(file_tools.read_bytes, path, byte_offset)
+        return await asyncio.to_thread(file_tools.read_lines, path, start_line, num_lines)
+
+    except Exception as e:
+        return ToolError(f"Failed to read file: {str(e)}")
+
+
+@tool
+@log_return
+async def search_in_file(filename: str, pattern: str, context_lines: int = 2, max_matches: int = 50,
+                         ignore_case: bool = False) -> str:
+    """
+    Searches a file inside BASE_DIR with a regular expression (Python syntax) and returns the
+    matching lines with line numbers and `context_lines` lines around them (matches marked with ">").
+    Works on large logs and CSV files without loading them.
+
+    Returns:
+        str: Matching lines with context, or "No matches.".
+    """
+    try:
+        path, error = _existing_file(filename)
+        if error:
+            return error
+        return await asyncio.to_thread(file_tools.search, path, pattern, context_lines, max_matches, ignore_case)
+
+    except re.error as e:
+        return ToolError(f"ERROR: Invalid regular expression: {str(e)}")
+    except Exception as e:
+        return ToolError(f"Failed to search file: {str(e)}")
+
+
+@tool
+@log_return
+async def tail_file(filename: str, num_lines: int = 50) -> str:
+    """
+    Returns the last `num_lines` lines (up to 500) of a file inside BASE_DIR, with line numbers.
+    """
+    try:
+        path, error = _existing_file(filename)
+        if error:
+            return error
+        return await asyncio.to_thread(file_tools.tail, path, num_lines)
+
+    except Exception as e:
+        return ToolError(f"Failed to read file: {str(e)}")
+
+
+@tool
+@log_return
+async def file_stat(filename: str) -> str:
+    """
+    Returns size, modification time, line count and whether the file looks binary,
+    for a file inside BASE_DIR.
+    """
+    try:
+        path, error = _existing_file(filename)
+        if error:
+            return error
+        info = await asyncio.to_thread(file_tools.stat, path)
+        return json.dumps(info, ensure_ascii=False)
+
+    except Exception as e:
+        return ToolError(f"Failed to stat file: {str(e)}")
+
+
+@tool
+@log_return
+async def find_workspace_files(name: str = "", contains: str = "", limit: int = 50) -> str:
+    """
+    Finds files in BASE_DIR from the workspace index, instead of listing directories with the shell.
+
+    Args:
+        name: Part of the relative path (e.g. "report") or a glob (e.g. "*.csv", "data/*.json").
+        contains: Text the file must contain (case-insensitive).
+        limit: Maximum number of files to return (up to 200), newest first.
+
+    Returns:
+        str: JSON {"total_files", "matched", "files": [{"path", "size", "modified", "hash"}]}.
+            Paths are relative to BASE_DIR; equal hashes mean identical contents.
+    """
+    try:
+        if file_index.last_scan is None:
+            await asyncio.to_thread(file_index.scan)
+        result = await asyncio.to_thread(file_index.find, name, contains, limit)
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
+    except Exception as e:
+        return ToolError(f"Failed to search workspace: {str(e)}")
@@ -0,0 +1,250 @@
+import bisect
+import codecs
+import locale
+import mmap
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+INDEX_CHUNK = 1024 * 1024
+MAX_RESULT_CHARS = 8000
+MAX_LINE_CHARS = 500
+MAX_LINES = 500
+MAX_MATCHES = 200
+INDEX_CACHE_SIZE = 32
+# search decodes the file in chunks of about this many bytes, cut at line ends
+SEARCH_CHUNK = 4 * 1024 * 1024
+
+
+@contextmanager
+def open_mmap(path: str):
+    """Read-only memory map of a file; empty files yield an empty bytes object (mmap cannot map them)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def decode(data: bytes) -> str:
+    """UTF-8, tolerating a character cut at either end of a byte range; otherwise the locale encoding."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    # only continuation bytes at the start or an unfinished sequence at the end are a cut character
+    start = 0
+    while start < min(3, len(data)) and 0x80 <= data[start] < 0xC0:
+        start += 1
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(data[start:], final=False)
+    except UnicodeDecodeError:
+        return data.decode(locale.getpreferredencoding(False), errors="replace")
+    return data.decode("utf-8", errors="replace")
+
+
+def _clip(line: str) -> str:
+    line = line.rstrip("\r\n")
+    if len(line) > MAX_LINE_CHARS:
+        return f"{line[:MAX_LINE_CHARS]}… [+{len(line) - MAX_LINE_CHARS} chars]"
+    return line
+
+
+class LineIndex:
+    """
+    Sparse line index: the number of lines before every ``INDEX_CHUNK`` bytes of a file.
+    Built in one pass with C-speed newline counting, so seeking to line N only scans
+    within one chunk.
+    """
+
+    def __init__(self, mm):
+        self.size = len(mm)
+        self.chunk_lines: list[int] = []
+        lines = 0
+        for offset in range(0, self.size, INDEX_CHUNK):
+            self.chunk_lines.append(lines)
+            lines += mm[offset:offset + INDEX_CHUNK].count(b"\n")
+        ends_with_newline = self.size > 0 and mm[self.size - 1:self.size] == b"\n"
+        self.total_lines = lines + (1 if self.size and not ends_with_newline else 0)
+
+    def line_offset(self, mm, line: int) -> int | None:
+        """Byte offset where 1-based ``line`` starts, or None past the end of the file."""
+        if line < 1 or line > self.total_lines:
+            return None
+        # the last chunk that starts before the target line (chunks may start mid-line), then scan forward
+        chunk = max(bisect.bisect_left(self.chunk_lines, line - 1) - 1, 0)
+        offset = chunk * INDEX_CHUNK
+        remaining = line - 1 - self.chunk_lines[chunk]
+        while remaining:
+            offset = mm.find(b"\n", offset) + 1
+            remaining -= 1
+        return offset
+
+    def line_at(self, mm, offset: int) -> int:
+        """1-based line number that contains byte ``offset``."""
+        chunk = min(offset // INDEX_CHUNK, len(self.chunk_lines) - 1)
+        start = chunk * INDEX_CHUNK
+        return self.chunk_lines[chunk] + mm[start:offset].count(b"\n") + 1
+
+
+_index_cache: "OrderedDict[str, tuple[int, int, LineIndex]]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def line_index(path: str, mm) -> LineIndex:
+    """LineIndex of ``path``, cached until the file's size or mtime changes."""
+    stat = os.stat(path)
+    with _index_lock:
+        cached = _index_cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            _index_cache.move_to_end(path)
+            return cached[2]
+    index = LineIndex(mm)
+    with _index_lock:
+        _index_cache[path] = (stat.st_size, stat.st_mtime_ns, index)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def _line_end(mm, offset: int) -> int:
+    end = mm.find(b"\n", offset)
+    return len(mm) if end < 0 else end + 1
+
+
+def _bounded(lines: list[str], footer: str = "") -> str:
+    out, used = [], 0
+    for index, line in enumerate(lines):
+        if used + len(line) + 1 > MAX_RESULT_CHARS:
+            out.append(f"[output limit reached, {len(lines) - index} more lines not shown]")
+            break
+        out.append(line)
+        used += len(line) + 1
+    if footer:
+        out.append(footer)
+    return "\n".join(out)
+
+
+def read_lines(path: str, start_line: int = 1, num_lines: int = 100) -> str:
+    num_lines = max(1, min(num_lines, MAX_LINES))
+    with open_mmap(path) as mm:
+        index = line_index(path, mm)
+        offset = index.line_offset(mm, max(start_line, 1))
+        if offset is None:
+            return f"(file has {index.total_lines} lines)"
+        out, line = [], max(start_line, 1)
+        while offset < len(mm) and len(out) < num_lines:
+            end = _line_end(mm, offset)
+            out.append(f"{line:>6}| {_clip(decode(mm[offset:end]))}")
+            offset, line = end, line + 1
+        last = line - 1
+        footer = f"[lines {max(start_line, 1)}-{last} of {index.total_lines}]"
+        return _bounded(out, footer)
+
+
+def read_bytes(path: str, offset: int = 0, length: int = MAX_RESULT_CHARS) -> str:
+    length = max(1, min(length, MAX_RESULT_CHARS))
+    with open_mmap(path) as mm:
+        size = len(mm)
+        offset = min(max(offset, 0), size)
+        data = mm[offset:offset + length]
+    end = offset + len(data)
+    return decode(data) + f"\n[bytes {offset}-{end} of {size}" + (f"; next offset {end}]" if end < size else "]")
+
+
+def tail(path: str, num_lines: int = 50) -> str:
+    num_lines = max(1, min(num_lines, MAX_LINES))
+    with open_mmap(path) as mm:
+        size = len(mm)
+        end = size - 1 if size and mm[size - 1:size] == b"\n" else size
+        start = end
+        for _ in range(num_lines):
+            start = mm.rfind(b"\n", 0, start)
+            if start < 0:
+                break
+        start = 0 if start < 0 else start + 1
+        first_line = line_index(path, mm).line_at(mm, start) if size else 1
+        lines = decode(mm[start:size]).splitlines()
+    out = [f"{first_line + i:>6}| {_clip(line)}" for i, line in enumerate(lines)]
+    return _bounded(out[-num_lines:]) if out else "(empty file)"
+
+
+def _matching_lines(mm, regex: re.Pattern, limit: int) -> tuple[list[int], bool]:
+    """
+    1-based numbers of the first ``limit`` lines ``regex`` matches, and whether more exist.
+    The file is decoded chunk by chunk on line boundaries, so the regex sees characters
+    rather than bytes; after a hit the search resumes at the end of that line.
+    """
+    matched: list[int] = []
+    start, first_line = 0, 1
+    while start < len(mm):
+        end = len(mm) if start + SEARCH_CHUNK >= len(mm) else _line_end(mm, start + SEARCH_CHUNK - 1)
+        text = decode(mm[start:end])
+        pos, line = 0, first_line
+        while match := regex.search(text, pos):
+            if match.start() == len(text) and text.endswith("\n"):
+                break  # an empty match after the last newline belongs to the next chunk
+            line += text.count("\n", pos, match.start())
+            if len(matched) == limit:
+                return matched, True
+            matched.append(line)
+            pos = text.find("\n", match.start()) + 1
+            if not pos:
+                break
+            line += 1
+        first_line += text.count("\n")
+        start = end
+    return matched, False
+
+
+def search(path: str, pattern: str, context_lines: int = 2, max_matches: int = 50, ignore_case: bool = False) -> str:
+    """Regex search over the decoded file; returns matching lines with context, line-numbered."""
+    context_lines = max(0, min(context_lines, 10))
+    max_matches = max(1, min(max_matches, MAX_MATCHES))
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    regex = re.compile(pattern, flags)
+    with open_mmap(path) as mm:
+        if not mm:
+            return "(empty file)"
+        index = line_index(path, mm)
+        matched, more = _matching_lines(mm, regex, max_matches)
+
+        out, last_printed, marked = [], 0, set(matched)
+        for line in matched:
+            first = max(line - context_lines, last_printed + 1)
+            last = min(line + context_lines, index.total_lines)
+            if first > last:
+                continue
+            if out and first > last_printed + 1:
+                out.append("--")
+            offset = index.line_offset(mm, first)
+            for number in range(first, last + 1):
+                end = _line_end(mm, offset)
+                marker = ">" if number in marked else " "
+                out.append(f"{marker}{number:>5}| {_clip(decode(mm[offset:end]))}")
+                offset = end
+            last_printed = last
+    matches = len(matched)
+    if not matches:
+        return "No matches."
+    footer = (f"[first {max_matches} matching lines shown, more exist]" if more
+              else f"[{matches} matching lines]")
+    return _bounded(out, footer)
+
+
+def stat(path: str) -> dict:
+    info = os.stat(path)
+    result = {
+        "path": path,
+        "size": info.st_size,
+        "modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(info.st_mtime)),
+    }
+    with open_mmap(path) as mm:
+        result["binary"] = b"\x00" in mm[:8192]
+        if not result["binary"]:
+            result["lines"] = line_index(path, mm).total_lines if mm else 0
+    return result
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from ai_agents.tools.win_tools.shell_engine import DEFAULT_TIMEOUT, MAX_TIMEOUT, kill_process_tree
+from logging_folder import get_logger
+from utils import ToolError
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+log = get_logger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_worker.py")
+# Imported by every worker before its first job; missing packages are skipped
+DEFAULT_PRELOAD = (
+    "json", "re", "math", "datetime", "collections", "itertools", "functools", "pathlib", "csv",
+    "random", "statistics", "decimal", "requests", "httpx", "bs4", "numpy", "pandas",
+)
+OUTPUT_LIMIT = 8000
+MEMORY_LIMIT_MB = 1024
+MAX_RUNS = 50
+STARTUP_TIMEOUT = 60
+
+
+@dataclass
+class PythonResult:
+    exit_code: int | None
+    stdout: str
+    stderr: str
+    duration: float
+    timeout: float
+    error: str = ""
+    recycled: list[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        """Tool-facing summary in the same shape as run_shell_command results; failures are ToolError."""
+        stdout, stderr = self.stdout.strip(), self.stderr.strip()
+        if self.error:
+            text = f"ERROR: {self.error}"
+            if stdout:
+                text += f"\n{stdout}"
+            return ToolError(text)
+        if self.exit_code == 0:
+            text = stdout or "(no output)"
+            if stderr:
+                text += f"\n--- stderr ---\n{stderr}"
+            return text
+        text = f"ERROR (exit code {self.exit_code}):"
+        if stdout:
+            text += f"\n{stdout}"
+        if stderr:
+            text += f"\n--- stderr ---\n{stderr}"
+        return ToolError(text)
+
+
+class _Worker:
+    def __init__(self, proc: asyncio.subprocess.Process, info: dict):
+        self.proc = proc
+        self.info = info
+        self.runs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def kill(self):
+        if self.alive:
+            await asyncio.to_thread(kill_process_tree, self.proc.pid)
+        await self.proc.wait()
+
+
+class PythonPool:
+    """
+    Pool of pre-started Python processes that run agent scripts and snippets.
+
+    Workers import ``preload`` modules once at start, so a run costs a pipe round-trip instead
+    of an interpreter start-up plus imports. Each job runs with its own stdout/stderr capture
+    (bounded to ``output_limit`` characters), ``sys.argv``, empty stdin and the working
+    directory it asks for; modules imported from that directory are dropped after the job so
+    edited helper files are picked up next time.
+
+    A worker is replaced after ``max_runs`` jobs, and right away when a job timed out, crashed
+    the process, exceeded ``memory_limit_mb`` (RLIMIT_AS on POSIX, RSS polling via psutil
+    elsewhere) or left global state changed (cwd, sys.path, os.environ, running threads).
+    Replacements are started in the background so the pool stays warm. Without RLIMIT_AS
+    (Windows) and without psutil the memory limit cannot be enforced; a warning is logged
+    when the pool is created.
+    """
+
+    def __init__(self, size: int = 2, preload=DEFAULT_PRELOAD, max_runs: int = MAX_RUNS,
+                 memory_limit_mb: int = MEMORY_LIMIT_MB, output_limit: int = OUTPUT_LIMIT,
+                 python: str = sys.executable):
+        self.size = size
+        self.preload = tuple(preload)
+        self.max_runs = max_runs
+        self.memory_limit_mb = memory_limit_mb
+        self.output_limit = output_limit
+        self.python = python
+        self._idle: asyncio.Queue[_Worker] | None = None
+        self._count = 0
+        if memory_limit_mb > 0 and os.name != "posix" and psutil is None:
+            log.warning(f"psutil is not installed: the {memory_limit_mb} MB memory limit of Python workers "
+                        f"is not enforced (pip install psutil)")
+
+    def _queue(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        return self._idle
+
+    async def _spawn(self) -> _Worker:
+        env = dict(os.environ)
+        env.update({
+            "MISTERKNEW_WORKER_PRELOAD": ",".join(self.preload),
+            "MISTERKNEW_WORKER_OUTPUT_LIMIT": str(self.output_limit),
+            "MISTERKNEW_WORKER_MEMORY_MB": str(self.memory_limit_mb),
+            "PYTHONIOENCODING": "utf-8",
+        })
+        kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+        proc = await asyncio.create_subprocess_exec(
+            self.python, "-u", WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=env,
+            limit=4 * 1024 * 1024,
+            **kwargs,
+        )
+        try:
+            line = await asyncio.wait_for(proc.stdout.readline(), STARTUP_TIMEOUT)
+            info = json.loads(line)
+        except (asyncio.TimeoutError, ValueError) as ex:
+            await asyncio.to_thread(kill_process_tree, proc.pid)
+            raise RuntimeError(f"Python worker failed to start: {ex!r}")
+        log.info(f"Python worker {info['pid']} ready, preloaded: {', '.join(info['preloaded']) or '-'}")
+        return _Worker(proc, info)
+
+    async def _acquire(self) -> _Worker:
+        queue = self._queue()
+        while not queue.empty():
+            worker = queue.get_nowait()
+            if worker.alive:
+                return worker
+            self._count -= 1
+        if self._count < self.size:
+            self._count += 1
+            try:
+                return await self._spawn()
+            except BaseException:
+                self._count -= 1
+                raise
+        return await queue.get()
+
+    def _release(self, worker: _Worker):
+        self._queue().put_nowait(worker)
+
+    async def _replace(self, worker: _Worker, reasons: list[str]):
+        log.info(f"Recycling Python worker {worker.info['pid']}: {', '.join(reasons)}")
+        await worker.kill()
+        try:
+            self._release(await self._spawn())
+        except Exception as ex:
+            self._count -= 1
+            log.error(f"Failed to restart Python worker: {ex!r}")
+
+    async def warm_up(self):
+        """Starts all workers ahead of the first job."""
+        while self._count < self.size:
+            self._count += 1
+            try:
+                self._release(await self._spawn())
+            except Exception:
+                self._count -= 1
+                raise
+
+    async def _watch_memory(self, worker: _Worker, exceeded: asyncio.Event):
+        limit = self.memory_limit_mb * 1024 * 1024
+        process = psutil.Process(worker.proc.pid)
+        while worker.alive:
+            try:
+                if process.memory_info().rss > limit:
+                    exceeded.set()
+                    await worker.kill()
+                    return
+            except psutil.NoSuchProcess:
+                return
+            await asyncio.sleep(0.2)
+
+    async def run(self, code: str = "", path: str = "", args: list[str] | None = None, cwd: str | None = None,
+                  timeout: float = DEFAULT_TIMEOUT) -> PythonResult:
+        timeout = min(max(float(timeout), 1.0), MAX_TIMEOUT)
+        worker = await self._acquire()
+        job = {"id": uuid.uuid4().hex, "code": code, "path": path, "args": args or [], "cwd": cwd}
+        started = time.perf_counter()
+        exceeded = asyncio.Event()
+        watcher = None
+        if self.memory_limit_mb > 0 and not worker.info.get("rlimit") and psutil is not None:
+            watcher = asyncio.create_task(self._watch_memory(worker, exceeded))
+        error, reasons, reply = "", [], None
+        try:
+            worker.proc.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+            await worker.proc.stdin.drain()
+            line = await asyncio.wait_for(worker.proc.stdout.readline(), timeout)
+            if line:
+                reply = json.loads(line)
+        except asyncio.TimeoutError:
+            error, reasons = f"script timed out after {timeout:g}s and was killed.", ["timeout"]
+        except asyncio.CancelledError:
+            asyncio.create_task(self._replace(worker, ["cancelled"]))
+            raise
+        except (BrokenPipeError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+        worker.runs += 1
+
+        if reply is None and not error:
+            if exceeded.is_set():
+                error, reasons = f"memory limit of {self.memory_limit_mb} MB exceeded, script was killed.", ["memory"]
+            else:
+                returncode = await worker.proc.wait()
+                error, reasons = f"the Python process crashed (exit code {returncode}).", ["crash"]
+        elif reply is not None:
+            reasons = list(reply.get("contaminated", []))
+            if worker.runs >= self.max_runs:
+                reasons.append(f"{worker.runs} runs")
+
+        if reasons:
+            asyncio.create_task(self._replace(worker, reasons))
+        else:
+            self._release(worker)
+        reply = reply or {}
+        return PythonResult(
+            exit_code=reply.get("exit_code"),
+            stdout=reply.get("stdout", ""),
+            stderr=reply.get("stderr", ""),
+            duration=reply.get("duration", time.perf_counter() - started),
+            timeout=timeout,
+            error=error,
+            recycled=reasons,
+        )
+
+    async def aclose(self):
+        queue = self._queue()
+        while not queue.empty():
+            await queue.get_nowait().kill()
+            self._count -= 1
@@ -0,0 +1,173 @@
+"""
+Worker process of PythonPool. Started as a script, it preloads modules, then executes jobs
+read as JSON lines from the original stdin and answers on the original stdout. Both are
+detached from fds 0/1 first, so user code can neither read the protocol nor corrupt it.
+Kept free of project imports so it starts fast.
+"""
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+
+class _Capture(io.TextIOBase):
+    """Text stream that keeps the first and the last ``limit // 2`` characters written to it."""
+
+    def __init__(self, limit: int):
+        self.half = limit // 2
+        self.head: list[str] = []
+        self.head_len = 0
+        self.tail = ""
+        self.total = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        written = len(text)
+        self.total += written
+        room = self.half - self.head_len
+        if room > 0:
+            self.head.append(text[:room])
+            self.head_len += len(text[:room])
+            text = text[room:]
+        if text:
+            self.tail = (self.tail + text)[-self.half:]
+        return written
+
+    def value(self) -> str:
+        head = "".join(self.head)
+        omitted = self.total - len(head) - len(self.tail)
+        if omitted > 0:
+            return f"{head}\n... [{omitted} characters omitted] ...\n{self.tail}"
+        return head + self.tail
+
+
+def _set_memory_limit(limit_mb: int) -> bool:
+    if limit_mb <= 0:
+        return False
+    try:
+        import resource
+    except ImportError:
+        return False
+    limit = limit_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        return False
+    return True
+
+
+def _run_job(job: dict, output_limit: int) -> dict:
+    stdout, stderr = _Capture(output_limit), _Capture(output_limit)
+    cwd, path, environ = os.getcwd(), list(sys.path), dict(os.environ)
+    modules_before = set(sys.modules)
+    filename = job.get("path") or "<snippet>"
+    job_cwd = job.get("cwd") or cwd
+    exit_code = 0
+    out_of_memory = False
+    started = time.perf_counter()
+
+    saved = sys.stdout, sys.stderr, sys.stdin, sys.argv
+    sys.stdout, sys.stderr, sys.stdin = stdout, stderr, io.StringIO("")
+    sys.argv = [filename] + list(job.get("args") or [])
+    if job.get("path"):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(job["path"])))
+    try:
+        os.chdir(job_cwd)
+        if job.get("path"):
+            with open(job["path"], encoding="utf-8") as f:
+                source = f.read()
+        else:
+            source = job.get("code", "")
+        code = compile(source, filename, "exec")
+        exec(code, {"__name__": "__main__", "__file__": filename, "__builtins__": __builtins__})
+    except SystemExit as ex:
+        if ex.code is None:
+            exit_code = 0
+        elif isinstance(ex.code, int):
+            exit_code = ex.code
+        else:
+            print(ex.code, file=stderr)
+            exit_code = 1
+    except BaseException as ex:
+        # skip this function's frame, the traceback starts at the user's code
+        traceback.print_exception(type(ex), ex, ex.__traceback__.tb_next, file=stderr)
+        exit_code = 1
+        out_of_memory = isinstance(ex, MemoryError)
+    finally:
+        sys.stdout, sys.stderr, sys.stdin, sys.argv = saved
+    duration = time.perf_counter() - started
+
+    if job.get("path"):
+        try:
+            sys.path.remove(os.path.dirname(os.path.abspath(job["path"])))
+        except ValueError:
+            pass
+    # Modules imported from the job's directory may be edited before the next run: forget them
+    for name in set(sys.modules) - modules_before:
+        module_file = getattr(sys.modules[name], "__file__", None) or ""
+        if module_file and os.path.abspath(module_file).startswith(os.path.abspath(job_cwd)):
+            del sys.modules[name]
+
+    contaminated = []
+    try:
+        if os.getcwd() != job_cwd:
+            contaminated.append("cwd")
+    except OSError:
+        contaminated.append("cwd")
+    os.chdir(cwd)
+    if sys.path != path:
+        contaminated.append("sys.path")
+    if dict(os.environ) != environ:
+        contaminated.append("environ")
+    if threading.active_count() > 1:
+        contaminated.append("threads")
+    if out_of_memory:
+        contaminated.append("memory")
+    return {
+        "id": job.get("id"),
+        "exit_code": exit_code,
+        "stdout": stdout.value(),
+        "stderr": stderr.value(),
+        "duration": duration,
+        "contaminated": contaminated,
+    }
+
+
+def main():
+    preload = [name for name in os.environ.get("MISTERKNEW_WORKER_PRELOAD", "").split(",") if name]
+    output_limit = int(os.environ.get("MISTERKNEW_WORKER_OUTPUT_LIMIT", "8000"))
+    memory_limit_mb = int(os.environ.get("MISTERKNEW_WORKER_MEMORY_MB", "0"))
+
+    protocol_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    protocol_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    loaded = []
+    for name in preload:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    rlimit = _set_memory_limit(memory_limit_mb)
+    protocol_out.write(json.dumps({"ready": True, "pid": os.getpid(), "preloaded": loaded, "rlimit": rlimit}) + "\n")
+    protocol_out.flush()
+
+    for line in protocol_in:
+        if not line.strip():
+            continue
+        result = _run_job(json.loads(line), output_limit)
+        protocol_out.write(json.dumps(result) + "\n")
+        protocol_out.flush()
+
+
+if __name__ == "__main__":
+    main()
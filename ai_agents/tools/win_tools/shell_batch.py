@@ -0,0 +1,98 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from ai_agents.tools.win_tools.shell_engine import DEFAULT_TIMEOUT, CommandResult, ShellEngine
+from utils.graph import check_dependency_graph
+
+MAX_STEPS = 50
+MAX_PARALLEL = 8
+
+
+@dataclass
+class BatchStep:
+    id: str
+    command: str
+    after: tuple[str, ...] = ()
+    timeout: float = DEFAULT_TIMEOUT
+    status: str = "pending"
+    result: CommandResult | None = None
+    error: str = ""
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def report(self) -> dict:
+        entry = {"id": self.id, "status": self.status}
+        if self.result is not None:
+            entry["exit_code"] = self.result.returncode
+            entry["duration"] = round(self.result.duration, 2)
+            entry["output"] = self.result.output.strip()
+            if self.result.truncated and self.result.output_path:
+                entry["command_id"] = self.result.command_id
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+def parse_steps(steps: list[dict]) -> list[BatchStep]:
+    """
+    Builds steps from tool input. A step without ``after`` runs after the previous step;
+    ``after: []`` starts it right away. Raises ValueError on unknown ids and cycles.
+    """
+    if not steps:
+        raise ValueError("No steps given")
+    if len(steps) > MAX_STEPS:
+        raise ValueError(f"Too many steps ({len(steps)}), the limit is {MAX_STEPS}")
+    parsed: list[BatchStep] = []
+    for index, raw in enumerate(steps):
+        if not isinstance(raw, dict) or not str(raw.get("command", "")).strip():
+            raise ValueError(f"Step {index} must be a dict with a non-empty 'command'")
+        step_id = str(raw.get("id", index + 1))
+        if any(step.id == step_id for step in parsed):
+            raise ValueError(f"Duplicate step id {step_id!r}")
+        after = raw.get("after")
+        if after is None:
+            after = [parsed[-1].id] if parsed else []
+        elif isinstance(after, (str, int)):
+            after = [after]
+        parsed.append(BatchStep(step_id, str(raw["command"]), tuple(str(a) for a in after),
+                                float(raw.get("timeout") or DEFAULT_TIMEOUT)))
+
+    check_dependency_graph({step.id: step.after for step in parsed}, "step")
+    return parsed
+
+
+async def run_batch(engine: ShellEngine, steps: list[BatchStep], max_parallel: int = 4) -> dict:
+    """
+    Runs steps as a dependency graph with at most ``max_parallel`` commands at once. A step whose
+    dependency did not succeed is skipped; independent steps keep running. A step whose command
+    could not be run at all gets the status "error" and does not stop the other steps.
+    """
+    by_id = {step.id: step for step in steps}
+    semaphore = asyncio.Semaphore(min(max(max_parallel, 1), MAX_PARALLEL))
+    started = time.perf_counter()
+
+    async def run_step(step: BatchStep):
+        try:
+            for dependency in step.after:
+                await by_id[dependency]._done.wait()
+            if any(by_id[dependency].status != "ok" for dependency in step.after):
+                step.status = "skipped"
+                return
+            async with semaphore:
+                step.status = "running"
+                step.result = await engine.run(step.command, timeout=step.timeout)
+            if step.result.timed_out:
+                step.status = "timeout"
+            else:
+                step.status = "ok" if step.result.returncode == 0 else "failed"
+        except Exception as ex:
+            step.status, step.error = "error", repr(ex)
+        finally:
+            step._done.set()
+
+    await asyncio.gather(*(run_step(step) for step in steps))
+    return {
+        "ok": all(step.status == "ok" for step in steps),
+        "duration": round(time.perf_counter() - started, 2),
+        "steps": [step.report() for step in steps],
+    }
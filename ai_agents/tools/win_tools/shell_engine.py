@@ -0,0 +1,249 @@
+import asyncio
+import locale
+import os
+import re
+import signal
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+from logging_folder import get_logger
+from utils import ToolError
+
+log = get_logger(__name__)
+
+OUTPUT_DIR_NAME = ".shell_output"
+DEFAULT_TIMEOUT = 60
+MAX_TIMEOUT = 30 * 60
+HEAD_BYTES = 4000
+TAIL_BYTES = 4000
+READ_CHUNK = 64 * 1024
+MAX_OUTPUT_FILES = 200
+_COMMAND_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+
+
+class HeadTailBuffer:
+    """Keeps the first ``head_bytes`` and the last ``tail_bytes`` of a stream and counts the rest."""
+
+    def __init__(self, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self, encoding: str) -> str:
+        head = self.head.decode(encoding, errors="replace")
+        if not self.truncated:
+            return head + self.tail.decode(encoding, errors="replace")
+        omitted = self.total - len(self.head) - len(self.tail)
+        return f"{head}\n... [{omitted} bytes omitted] ...\n{self.tail.decode(encoding, errors='replace')}"
+
+
+@dataclass
+class CommandResult:
+    command_id: str
+    command: str
+    returncode: int | None
+    output: str
+    total_bytes: int
+    truncated: bool
+    duration: float
+    timeout: float
+    timed_out: bool = False
+    output_path: str | None = None
+
+    def format(self) -> str:
+        """
+        Tool-facing summary: the bounded output, the failure reason and, if truncated, how to read
+        the rest. A timeout or a nonzero exit code is returned as ToolError.
+        """
+        output = self.output.strip()
+        if self.timed_out:
+            text = f"ERROR: command timed out after {self.timeout:g}s and was killed.\n{output}"
+        elif self.returncode != 0:
+            text = f"ERROR (exit code {self.returncode}):\n{output}"
+        else:
+            text = output or "(no output)"
+        if self.truncated and self.output_path:
+            text += (f"\n[Output truncated, {self.total_bytes} bytes in total. "
+                     f"Use read_command_output(command_id='{self.command_id}') to read the full output.]")
+        return ToolError(text) if self.timed_out or self.returncode != 0 else text
+
+
+def kill_process_tree(pid: int):
+    """Kills a process and all of its descendants."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            processes = parent.children(recursive=True) + [parent]
+        except psutil.NoSuchProcess:
+            return
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        return
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+    else:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class ShellEngine:
+    """
+    Runs shell commands as asyncio subprocesses.
+
+    Output (stderr merged into stdout) is read incrementally: the full stream is written to
+    ``<base_dir>/.shell_output/<command_id>.log`` and only its head and tail are kept in memory
+    and returned, so chatty commands cannot flood the agent's context. Each call has its own
+    timeout; on timeout or cancellation the whole process tree is killed. Output files of
+    commands that did not overflow the buffer are removed right away, the rest are kept up to
+    ``max_output_files`` and can be read back with ``read_output``.
+    """
+
+    def __init__(self, base_dir: str, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES,
+                 max_output_files: int = MAX_OUTPUT_FILES):
+        self.base_dir = base_dir
+        self.output_dir = os.path.join(base_dir, OUTPUT_DIR_NAME)
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.max_output_files = max_output_files
+        self.encoding = locale.getpreferredencoding(False)
+
+    def output_path(self, command_id: str) -> str:
+        return os.path.join(self.output_dir, f"{command_id}.log")
+
+    async def _spawn(self, command: str, cwd: str) -> asyncio.subprocess.Process:
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        return await asyncio.create_subprocess_shell(
+            command,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            **kwargs,
+        )
+
+    async def run(self, command: str, timeout: float = DEFAULT_TIMEOUT, cwd: str | None = None,
+                  on_output: Callable[[bytes], None] | None = None) -> CommandResult:
+        timeout = min(max(float(timeout), 1.0), MAX_TIMEOUT)
+        command_id = uuid.uuid4().hex[:12]
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self.output_path(command_id)
+        buffer = HeadTailBuffer(self.head_bytes, self.tail_bytes)
+        started = time.perf_counter()
+        timed_out = False
+
+        proc = await self._spawn(command, cwd or self.base_dir)
+        with open(path, "wb") as spill:
+            async def pump():
+                while True:
+                    chunk = await proc.stdout.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    buffer.write(chunk)
+                    spill.write(chunk)
+                    if on_output:
+                        on_output(chunk)
+                await proc.wait()
+
+            try:
+                await asyncio.wait_for(pump(), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                await asyncio.to_thread(kill_process_tree, proc.pid)
+                await proc.wait()
+            except asyncio.CancelledError:
+                await asyncio.to_thread(kill_process_tree, proc.pid)
+                spill.close()
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                raise
+
+        duration = time.perf_counter() - started
+        kept = buffer.truncated
+        if not kept:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        else:
+            self._prune_outputs()
+        log.info(f"Command {command_id} finished in {duration:.2f}s with code {proc.returncode}, "
+                 f"{buffer.total} bytes of output{' (timed out)' if timed_out else ''}")
+        return CommandResult(
+            command_id=command_id,
+            command=command,
+            returncode=proc.returncode,
+            output=buffer.text(self.encoding),
+            total_bytes=buffer.total,
+            truncated=buffer.truncated,
+            duration=duration,
+            timeout=timeout,
+            timed_out=timed_out,
+            output_path=path if kept else None,
+        )
+
+    def _prune_outputs(self):
+        try:
+            entries = [entry for entry in os.scandir(self.output_dir) if entry.name.endswith(".log")]
+        except OSError:
+            return
+        if len(entries) <= self.max_output_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_output_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def read_output(self, command_id: str, offset: int = 0, limit: int = 8000) -> str:
+        """Returns ``limit`` bytes of a kept command output starting at ``offset``."""
+        if not _COMMAND_ID_RE.match(command_id):
+            return ToolError(f"ERROR: Invalid command id '{command_id}'")
+        path = self.output_path(command_id)
+        if not os.path.isfile(path):
+            return ToolError(f"ERROR: No saved output for command '{command_id}'")
+        size = os.path.getsize(path)
+        offset = max(0, offset)
+        limit = max(1, min(limit, 64 * 1024))
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(limit)
+        end = offset + len(data)
+        text = data.decode(self.encoding, errors="replace")
+        footer = f"\n[bytes {offset}-{end} of {size}" + (f"; next offset {end}]" if end < size else "; end of output]")
+        return text + footer
@@ -0,0 +1,219 @@
+import asyncio
+import atexit
+import os
+import shutil
+import subprocess
+import time
+import uuid
+import weakref
+
+from ai_agents.tools.win_tools.shell_engine import (
+    DEFAULT_TIMEOUT, MAX_TIMEOUT, READ_CHUNK, CommandResult, HeadTailBuffer, ShellEngine, kill_process_tree,
+)
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+IDLE_TIMEOUT = 10 * 60
+_live_sessions: "weakref.WeakSet[ShellSession]" = weakref.WeakSet()
+
+
+class ShellSession:
+    """
+    A long-lived bash (or cmd.exe on Windows) process that runs commands one after another,
+    so the current directory, environment variables and activated virtualenvs persist between
+    calls and no process is spawned per command.
+
+    Each command is written to a script that the shell sources (``. script`` / ``call script``)
+    with stdin from the null device, followed by a line that prints a unique sentinel with the
+    exit code and the working directory; output is read up to the sentinel. Sourcing keeps
+    syntax errors and unbalanced quotes inside the command from breaking the framing. Output
+    is bounded and spilled like ``ShellEngine.run`` and can be read back with the engine's
+    ``read_output``.
+
+    The shell is started on first use, restarted after a crash, an ``exit`` or a timeout
+    (which kills its process tree), and closed after ``idle_timeout`` seconds without commands.
+    If a command leaves ``base_dir``, the shell is moved back to it.
+    """
+
+    def __init__(self, base_dir: str, engine: ShellEngine, idle_timeout: float = IDLE_TIMEOUT):
+        self.base_dir = base_dir
+        self.engine = engine
+        self.idle_timeout = idle_timeout
+        self.session_id = uuid.uuid4().hex[:12]
+        self.cwd = base_dir
+        self.proc: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+        self._idle_handle: asyncio.TimerHandle | None = None
+        # the event loop keeps only weak references to tasks
+        self._tasks: set[asyncio.Task] = set()
+        self._windows = os.name == "nt"
+        _live_sessions.add(self)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    def _script_path(self) -> str:
+        return os.path.join(self.engine.output_dir, f"session_{self.session_id}.{'cmd' if self._windows else 'sh'}")
+
+    async def start(self):
+        os.makedirs(self.engine.output_dir, exist_ok=True)
+        if self._windows:
+            argv = ["cmd.exe", "/Q", "/D", "/K"]
+            kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            shell = shutil.which("bash")
+            argv = [shell, "--noprofile", "--norc"] if shell else ["/bin/sh"]
+            kwargs = {"start_new_session": True}
+        self.proc = await asyncio.create_subprocess_exec(
+            *argv,
+            cwd=self.base_dir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            **kwargs,
+        )
+        self.cwd = self.base_dir
+        log.info(f"Shell session {self.session_id} started (pid {self.proc.pid})")
+
+    async def close(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        proc, self.proc = self.proc, None
+        if proc is not None and proc.returncode is None:
+            await asyncio.to_thread(kill_process_tree, proc.pid)
+            await proc.wait()
+            log.info(f"Shell session {self.session_id} closed")
+        try:
+            os.remove(self._script_path())
+        except OSError:
+            pass
+
+    def _close_if_idle(self):
+        self._idle_handle = None
+        if not self._lock.locked():
+            task = asyncio.create_task(self.close())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _schedule_idle_close(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = asyncio.get_running_loop().call_later(self.idle_timeout, self._close_if_idle)
+
+    def _frame(self, marker: str) -> bytes:
+        script = self._script_path()
+        if self._windows:
+            line = f'call "{script}" < NUL\r\necho.\r\necho {marker} %ERRORLEVEL% %CD%\r\n'
+        else:
+            line = f". '{script}' < /dev/null\nprintf '\\n%s %s %s\\n' '{marker}' \"$?\" \"$PWD\"\n"
+        return line.encode(self.engine.encoding, errors="replace")
+
+    async def run(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> CommandResult:
+        timeout = min(max(float(timeout), 1.0), MAX_TIMEOUT)
+        async with self._lock:
+            if not self.alive:
+                await self.start()
+            command_id = uuid.uuid4().hex[:12]
+            marker = f"__MK_{uuid.uuid4().hex}__"
+            path = self.engine.output_path(command_id)
+            buffer = HeadTailBuffer(self.engine.head_bytes, self.engine.tail_bytes)
+            with open(self._script_path(), "w", encoding=self.engine.encoding, errors="replace") as f:
+                f.write(command + "\n")
+            started = time.perf_counter()
+            timed_out = False
+            returncode: int | None = None
+            note = ""
+
+            with open(path, "wb") as spill:
+                def emit(data: bytes):
+                    buffer.write(data)
+                    spill.write(data)
+
+                async def pump() -> bytes | None:
+                    marker_bytes = marker.encode()
+                    pending = bytearray()
+                    while True:
+                        chunk = await self.proc.stdout.read(READ_CHUNK)
+                        if not chunk:
+                            emit(bytes(pending))
+                            return None
+                        pending += chunk
+                        index = pending.find(marker_bytes)
+                        if index >= 0:
+                            end = pending.find(b"\n", index)
+                            if end >= 0:
+                                emit(bytes(pending[:index]))
+                                return bytes(pending[index + len(marker_bytes):end])
+                        elif len(pending) > len(marker_bytes):
+                            emit(bytes(pending[:-len(marker_bytes)]))
+                            del pending[:-len(marker_bytes)]
+
+                try:
+                    self.proc.stdin.write(self._frame(marker))
+                    await self.proc.stdin.drain()
+                    status = await asyncio.wait_for(pump(), timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    status = None
+                    note = "The shell session was killed and will restart in the data directory."
+                    await self.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    status = None
+                except asyncio.CancelledError:
+                    await self.close()
+                    raise
+
+            if status is not None:
+                code, _, cwd = status.decode(self.engine.encoding, errors="replace").strip().partition(" ")
+                returncode = int(code) if code.lstrip("-").isdigit() else None
+                self.cwd = cwd.strip() or self.cwd
+                if not os.path.normpath(self.cwd).startswith(os.path.abspath(self.base_dir)):
+                    note = f"Working directory {self.cwd} is outside of {self.base_dir}; moved back."
+                    await self._reset_cwd()
+            elif not timed_out:
+                if self.proc is not None:
+                    returncode = await self.proc.wait()
+                note = "The shell exited; a new session will be started for the next command."
+                await self.close()
+
+            if self.alive:
+                self._schedule_idle_close()
+            kept = buffer.truncated
+            if not kept:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                self.engine._prune_outputs()
+            output = buffer.text(self.engine.encoding)
+            if note:
+                output = f"{output.rstrip()}\n[{note}]"
+            return CommandResult(
+                command_id=command_id,
+                command=command,
+                returncode=returncode,
+                output=output,
+                total_bytes=buffer.total,
+                truncated=buffer.truncated,
+                duration=time.perf_counter() - started,
+                timeout=timeout,
+                timed_out=timed_out,
+                output_path=path if kept else None,
+            )
+
+    async def _reset_cwd(self):
+        line = f'cd /d "{self.base_dir}"\r\n' if self._windows else f"cd '{self.base_dir}'\n"
+        self.proc.stdin.write(line.encode(self.engine.encoding, errors="replace"))
+        await self.proc.stdin.drain()
+        self.cwd = self.base_dir
+
+
+@atexit.register
+def _kill_live_sessions():
+    for session in list(_live_sessions):
+        if session.alive:
+            kill_process_tree(session.proc.pid)
@@ -0,0 +1,265 @@
+import asyncio
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from ai_agents.tools.win_tools.file_tools import decode, open_mmap
+from ai_agents.tools.win_tools.shell_engine import OUTPUT_DIR_NAME
+from logging_folder import get_logger
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+log = get_logger(__name__)
+
+SKIP_DIRS = {OUTPUT_DIR_NAME, ".git", "__pycache__", ".venv", "venv", "node_modules", "browser_profile", ".idea"}
+MAX_TEXT_INDEX_BYTES = 512 * 1024
+SCAN_INTERVAL = 30
+HASH_CHUNK = 1024 * 1024
+# Content queries decode files in chunks of this many bytes
+CONTAINS_CHUNK = 4 * 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    digest = xxhash.xxh3_64() if xxhash is not None else hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class FileEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    hash: str
+    text_indexed: bool = False
+    binary: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "size": self.size,
+            "modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.mtime_ns / 1e9)),
+            "hash": self.hash,
+        }
+
+
+class WorkspaceIndex:
+    """
+    In-memory index of the files under ``root``: relative path, size, mtime, content hash
+    (xxh3, blake2b without xxhash) and, for text files up to ``max_text_bytes``, a trigram
+    index of their contents.
+
+    ``scan()`` walks the tree and only re-hashes files whose size or mtime changed; removed
+    files are dropped. ``start()`` runs the first scan and then rescans every ``interval``
+    seconds in a thread; tools that write files call ``update_path`` so their changes are
+    visible immediately. mtime polling is used instead of inotify because the workspace is
+    on Windows. ``find`` answers name and content queries from memory: trigram postings narrow
+    content queries down to candidate files, which are then verified.
+    """
+
+    def __init__(self, root: str, skip_dirs=SKIP_DIRS, max_text_bytes: int = MAX_TEXT_INDEX_BYTES,
+                 interval: float = SCAN_INTERVAL):
+        self.root = root
+        self.skip_dirs = set(skip_dirs)
+        self.max_text_bytes = max_text_bytes
+        self.interval = interval
+        self.files: dict[str, FileEntry] = {}
+        self.last_scan: float | None = None
+        self._postings: dict[str, set[str]] = {}
+        self._file_trigrams: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        self._task: asyncio.Task | None = None
+
+    def _walk(self):
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _drop_text(self, rel: str):
+        for gram in self._file_trigrams.pop(rel, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(rel)
+                if not posting:
+                    del self._postings[gram]
+
+    def _index_file(self, path: str, stat: os.stat_result, previous: FileEntry | None) -> FileEntry | None:
+        rel = self._relative(path)
+        try:
+            digest = file_hash(path)
+        except OSError:
+            return None
+        entry = FileEntry(rel, stat.st_size, stat.st_mtime_ns, digest)
+        if previous is not None and previous.hash == digest:
+            # touched but unchanged: keep the text index
+            entry.text_indexed, entry.binary = previous.text_indexed, previous.binary
+            return entry
+        grams = set()
+        try:
+            with open(path, "rb") as f:
+                head = f.read(self.max_text_bytes + 1)
+            entry.binary = b"\x00" in head[:8192]
+            if not entry.binary and len(head) <= self.max_text_bytes:
+                grams = trigrams(decode(head))
+                entry.text_indexed = True
+        except OSError:
+            pass
+        with self._lock:
+            self._drop_text(rel)
+            if entry.text_indexed:
+                self._file_trigrams[rel] = grams
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(rel)
+        return entry
+
+    def scan(self) -> tuple[int, int, int]:
+        """Synchronises the index with the file system; returns (added, changed, removed)."""
+        started = time.perf_counter()
+        added = changed = 0
+        seen = set()
+        for path, stat in self._walk():
+            rel = self._relative(path)
+            seen.add(rel)
+            previous = self.files.get(rel)
+            if previous is not None and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+                continue
+            entry = self._index_file(path, stat, previous)
+            if entry is None:
+                continue
+            with self._lock:
+                self.files[rel] = entry
+            if previous is None:
+                added += 1
+            else:
+                changed += 1
+        with self._lock:
+            removed = [rel for rel in self.files if rel not in seen]
+            for rel in removed:
+                del self.files[rel]
+                self._drop_text(rel)
+        self.last_scan = time.time()
+        if added or changed or removed:
+            log.info(f"Workspace index: +{added} ~{changed} -{len(removed)} files "
+                     f"({len(self.files)} total) in {time.perf_counter() - started:.2f}s")
+        return added, changed, len(removed)
+
+    def update_path(self, path: str):
+        """Re-indexes one file (or drops it if it no longer exists) without a full scan."""
+        rel = self._relative(path)
+        if rel.startswith(".."):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self.files.pop(rel, None)
+                self._drop_text(rel)
+            return
+        entry = self._index_file(path, stat, self.files.get(rel))
+        if entry is not None:
+            with self._lock:
+                self.files[rel] = entry
+
+    async def start(self):
+        """Runs the first scan, then keeps rescanning in the background."""
+        await asyncio.to_thread(self.scan)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rescan_loop())
+
+    async def _rescan_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.scan)
+            except Exception as ex:
+                log.error(f"Workspace scan failed: {ex!r}")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _name_matcher(self, name: str):
+        name = name.lower()
+        if any(ch in name for ch in "*?["):
+            # globs match the relative path or just the file name
+            return lambda rel: (fnmatch.fnmatchcase(rel.lower(), name)
+                                or fnmatch.fnmatchcase(rel.rsplit("/", 1)[-1].lower(), name))
+        return lambda rel: name in rel.lower()
+
+    def _contains(self, entry: FileEntry, needle: str) -> bool:
+        """Case-insensitive for any script: chunks are decoded and compared casefolded."""
+        if entry.binary:
+            return False
+        needle = needle.casefold()
+        # a match spans at most 4 bytes per casefolded character, so chunks overlap by that much
+        overlap = 4 * len(needle)
+        path = os.path.join(self.root, entry.path)
+        try:
+            with open_mmap(path) as mm:
+                for start in range(0, len(mm), CONTAINS_CHUNK):
+                    if needle in decode(mm[start:start + CONTAINS_CHUNK + overlap]).casefold():
+                        return True
+        except (OSError, ValueError):
+            pass
+        return False
+
+    def find(self, name: str = "", contains: str = "", limit: int = 50) -> dict:
+        """
+        Files whose relative path matches ``name`` (substring, or glob if it has * ? [) and whose
+        content contains ``contains`` (case-insensitive literal).
+        """
+        with self._lock:
+            entries = list(self.files.values())
+            candidates = None
+            if contains and len(contains) >= 3:
+                grams = sorted(trigrams(contains), key=lambda g: len(self._postings.get(g, ())))
+                candidates = set(self._postings.get(grams[0], ())) if grams else set()
+                for gram in grams[1:]:
+                    candidates &= self._postings.get(gram, set())
+                    if not candidates:
+                        break
+        if name:
+            matcher = self._name_matcher(name)
+            entries = [entry for entry in entries if matcher(entry.path)]
+        if contains:
+            entries = [
+                entry for entry in entries
+                if (candidates is None or not entry.text_indexed or entry.path in candidates)
+                and self._contains(entry, contains)
+            ]
+        entries.sort(key=lambda entry: entry.mtime_ns, reverse=True)
+        return {
+            "total_files": len(self.files),
+            "matched": len(entries),
+            "files": [entry.to_dict() for entry in entries[:min(max(1, limit), 200)]],
+        }
@@ -2,9 +2,10 @@ import asyncio
 
 from ai_agents.advance_ai_agent import AiAgentWorker
 from communicator import Communicator
+from ai_agents.tools.win_tools import make_shell_session_tool
 from typing import List, Dict
 from langchain_core.tools import tool
-from utils import log_return
+from utils import ToolError, log_return
 from logging_folder import get_logger
 log = get_logger(__name__)
 
@@ -165,14 +166,16 @@ class Operator:
                     job = agent.get('job')
                     tools = []
                     if not name or not task or not job:
-                        return "Error: wrong format of agent dict! Example of agent: {'name': 'example', 'task': 'do example'},'job': 'system_worker'|'web_worker'|'manager'"
+                        return ToolError("Error: wrong format of agent dict! Example of agent: {'name': 'example', 'task': 'do example'},'job': 'system_worker'|'web_worker'|'manager'")
                     if job:
                         if job == 'manager':
                             tools = self.manager_agents[0]._tools
                         elif job == "system_worker":
                             for agent in self.worker_agents:
                                 if agent.name.startswith('os') or agent.name.startswith('system'):
-                                    tools = agent._tools
+                                    # every worker gets its own shell session instead of sharing one
+                                    tools = [make_shell_session_tool() if t.name == "run_in_shell_session" else t
+                                             for t in agent._tools]
                                     break
                         elif job == "web_worker":
                             for agent in self.worker_agents:
@@ -186,5 +189,5 @@ class Operator:
                 await self.activate_all()
                 return "agents was successfully added, use 'get_known_agents' for get list of them"
             except Exception as ex:
-                return f"Error while creating agents:{ex}"
+                return ToolError(f"Error while creating agents:{ex}")
         return create_agents_for_work
\ No newline at end of file
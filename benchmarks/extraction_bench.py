@@ -0,0 +1,261 @@
+"""
+Microbenchmarks of the web extraction hot paths on the pages in benchmarks/pages.
+
+Pages are served by the local fixture server. For every page the script times:
+  bs4_result_links   parse_result_links (the BeautifulSoup parse behind get_working_links), search pages only
+  readability        extract_readable (browser_get_readable_text)
+  link_index         anchor extraction with BeautifulSoup + LinkIndex build and first page
+  link_rank          LinkEngine.rank over the page's links
+  pw_visible_text    PlaywrightSessionAsync.get_visible_text_elements  (Playwright + Chromium only)
+  pw_all_links       PlaywrightSessionAsync.get_all_links              (Playwright + Chromium only)
+  pw_link_index      PlaywrightSessionAsync.get_link_index             (Playwright + Chromium only)
+and records element and token counts. Token counts always use the 4-chars-per-token estimate so
+they do not depend on whether tiktoken is installed or could download its encoding.
+
+Results are compared with benchmarks/baseline.json: a case whose fastest run is more than
+--threshold slower than its baseline is a regression and makes the script exit with 1. The
+minimum is compared rather than the median because on a shared machine the median drifts with
+background load by more than the threshold. Timings are only gated when the baseline was recorded
+on the same machine (CPU model, core count, OS and Python version); otherwise slowdowns are
+reported but do not fail the run, and the baseline should be re-recorded on that machine.
+
+    python -m benchmarks.extraction_bench
+    python -m benchmarks.extraction_bench --filter readability --repeat 20
+    python -m benchmarks.extraction_bench --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+
+from ai_agents.tools.web_tools.link_engine import LinkIndex, default_link_engine
+from ai_agents.tools.web_tools.readability import count_tokens, extract_readable
+from ai_agents.tools.web_tools.search_client import parse_result_links
+from benchmarks.fixtures import PAGES_DIR, FixtureServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+# Differences below this are noise whatever the ratio
+MIN_REGRESSION_MS = 0.5
+
+
+def _anchors(html: str, url: str) -> list[tuple[str, str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [(urljoin(url, a["href"]), a.get_text(" ", strip=True)[:120]) for a in soup.find_all("a", href=True)]
+
+
+def _link_index(html: str, url: str) -> dict:
+    index = LinkIndex(0, _anchors(html, url))
+    index.page()
+    return {"elements": len(index)}
+
+
+def _readability(html: str, url: str) -> dict:
+    result = extract_readable(html, url)
+    return {"elements": len(result["markdown"].split("\n\n")) if result["markdown"] else 0, "tokens": result["total_tokens"]}
+
+
+def _is_search_page(html: str) -> bool:
+    return "result__a" in html
+
+
+# name -> (case, applies to page); a case run on pages without its input measures nothing
+PARSER_CASES = {
+    "bs4_result_links": (lambda html, url: {"elements": len(parse_result_links(html))}, _is_search_page),
+    "readability": (_readability, None),
+    "link_index": (_link_index, None),
+}
+
+
+def machine() -> str:
+    """Describes the hardware and interpreter the timings come from."""
+    cpu = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", encoding="utf-8", errors="replace") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    return (f"{platform.system()} {platform.machine()} {cpu or 'unknown CPU'} x{os.cpu_count()} "
+            f"Python {platform.python_version()}")
+
+
+def measure(func, repeat: int) -> tuple[list[float], dict]:
+    func()
+    times, counts = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = func()
+        times.append(time.perf_counter() - start)
+    return times, counts
+
+
+async def ameasure(func, repeat: int) -> tuple[list[float], dict]:
+    await func()
+    times, counts = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = await func()
+        times.append(time.perf_counter() - start)
+    return times, counts
+
+
+def _result(times: list[float], counts: dict) -> dict:
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        **counts,
+    }
+
+
+def run_parser_cases(pages: dict[str, tuple[str, str]], repeat: int, selected) -> dict:
+    results = {}
+    for page, (url, html) in pages.items():
+        for name, (case, applies) in PARSER_CASES.items():
+            if selected(f"{page}/{name}") and (applies is None or applies(html)):
+                results[f"{page}/{name}"] = _result(*measure(lambda: case(html, url), repeat))
+        if selected(f"{page}/link_rank"):
+            urls = [href for href, _ in _anchors(html, url)]
+            results[f"{page}/link_rank"] = _result(*measure(
+                lambda: {"elements": len(default_link_engine.rank(urls, query="python docs"))}, repeat))
+    return results
+
+
+async def run_browser_cases(pages: dict[str, tuple[str, str]], repeat: int, selected) -> tuple[dict, str]:
+    """Playwright cases; returns ({}, reason) when Playwright or Chromium is unavailable."""
+    session = None
+    try:
+        from ai_agents.tools.web_tools.session_for_tool import PlaywrightSessionAsync
+        session = PlaywrightSessionAsync(persistent=False)
+        await session.__aenter__()
+    except Exception as ex:
+        if session is not None:
+            await session.__aexit__(None, None, None)
+        first_line = str(ex).strip().splitlines()[0] if str(ex).strip() else ""
+        return {}, f"Playwright unavailable: {type(ex).__name__}: {first_line}"
+
+    async def visible_text():
+        elements = await session.get_visible_text_elements()
+        return {"elements": len(elements), "tokens": count_tokens(" ".join(e["value"] for e in elements))}
+
+    async def all_links():
+        return {"elements": len(await session.get_all_links())}
+
+    async def link_index():
+        return {"elements": len(await session.get_link_index(refresh=True))}
+
+    results = {}
+    try:
+        for page, (url, _) in pages.items():
+            cases = {"pw_visible_text": visible_text, "pw_all_links": all_links, "pw_link_index": link_index}
+            cases = {name: case for name, case in cases.items() if selected(f"{page}/{name}")}
+            if not cases:
+                continue
+            # page.goto directly: goto_page adds cookie injection and a fixed 2s wait
+            await session.page.goto(url, wait_until="load")
+            for name, case in cases.items():
+                results[f"{page}/{name}"] = _result(*await ameasure(case, repeat))
+    finally:
+        await session.__aexit__(None, None, None)
+    return results, ""
+
+
+def compare(results: dict, baseline: dict, threshold: float, gated: bool = True) -> tuple[list[str], int]:
+    """Formats the comparison table and counts regressions; with gated=False slowdowns are not counted."""
+    lines = [f"{'case':<40} {'min ms':>10} {'baseline':>10} {'change':>8} {'elements':>9} {'tokens':>8}  status"]
+    regressions = 0
+    for case, result in sorted(results.items()):
+        base = baseline.get(case)
+        status, change, base_ms = "new", "", ""
+        if base:
+            base_ms = f"{base['min_ms']:.3f}"
+            ratio = result["min_ms"] / base["min_ms"] if base["min_ms"] else 1.0
+            change = f"{ratio - 1:+.0%}"
+            if ratio > 1 + threshold and result["min_ms"] - base["min_ms"] > MIN_REGRESSION_MS:
+                if gated:
+                    status = "REGRESSION"
+                    regressions += 1
+                else:
+                    status = "slower"
+            elif ratio < 1 - threshold:
+                status = "faster"
+            else:
+                status = "ok"
+            if (result.get("elements"), result.get("tokens")) != (base.get("elements"), base.get("tokens")):
+                status += ", output changed"
+        lines.append(f"{case:<40} {result['min_ms']:>10.3f} {base_ms:>10} {change:>8} "
+                     f"{result.get('elements', ''):>9} {result.get('tokens', ''):>8}  {status}")
+    return lines, regressions
+
+
+async def run(args) -> int:
+    os.environ["MISTERKNEW_TOKENIZER"] = "estimate"
+    selected = (lambda case: args.filter in case) if args.filter else (lambda case: True)
+    names = sorted(name[:-5] for name in os.listdir(args.pages) if name.endswith(".html"))
+    if not names:
+        print(f"No pages in {args.pages}; run python -m benchmarks.make_pages", file=sys.stderr)
+        return 1
+
+    with FixtureServer(pages_dir=args.pages) as server:
+        pages = {}
+        async with httpx.AsyncClient() as client:
+            for name in names:
+                url = f"{server.url}/page/{name}"
+                pages[name] = (url, (await client.get(url)).text)
+        results = run_parser_cases(pages, args.repeat, selected)
+        browser_results, skipped = await run_browser_cases(pages, args.repeat, selected) if not args.no_browser else ({}, "--no-browser")
+        results.update(browser_results)
+
+    baseline, baseline_machine, current_machine = {}, None, machine()
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline, baseline_machine = stored.get("cases", {}), stored.get("machine")
+    same_machine = baseline_machine == current_machine
+    lines, regressions = compare(results, baseline, args.threshold, gated=same_machine)
+    print("\n".join(lines))
+    if skipped:
+        print(f"\nBrowser cases skipped: {skipped}")
+    if baseline and not same_machine:
+        print(f"\nWARNING: the baseline was recorded on {baseline_machine!r}, this is {current_machine!r}; "
+              f"timings are not comparable and slowdowns are not gated. Re-record the baseline on this "
+              f"machine with --update-baseline.")
+
+    if args.update_baseline:
+        # cases that did not run here (e.g. browser cases without Chromium) keep their baseline,
+        # unless it was recorded on another machine
+        merged = {**baseline, **results} if same_machine else results
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": current_machine, "repeat": args.repeat,
+                       "cases": dict(sorted(merged.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline updated: {args.baseline} ({len(results)} cases)")
+        return 0
+    if regressions:
+        print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.extraction_bench",
+                                     description="Microbenchmarks of the web extraction paths")
+    parser.add_argument("--pages", default=PAGES_DIR, help="directory with the .html corpus")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case, after one warm-up run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the fastest run counted as a regression")
+    parser.add_argument("--filter", default="", help="only cases whose 'page/path' name contains this")
+    parser.add_argument("--no-browser", action="store_true", help="skip the Playwright cases")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import random
+import re
+import time
+from typing import Any, Callable
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+# policy(messages) -> the next AI message (text, or tool calls via ``call``)
+Policy = Callable[[list[BaseMessage]], AIMessage]
+
+_call_ids = itertools.count(1)
+
+
+def call(name: str, **args) -> AIMessage:
+    return AIMessage("", tool_calls=[{"name": name, "args": args, "id": f"call_{next(_call_ids)}"}])
+
+
+def last_tool(messages: list[BaseMessage]) -> ToolMessage | None:
+    return messages[-1] if messages and isinstance(messages[-1], ToolMessage) else None
+
+
+def is_activation(messages: list[BaseMessage]) -> bool:
+    """True for the first request of an agent (the role prompt sent by Operator.activate_agent)."""
+    return sum(isinstance(m, HumanMessage) for m in messages) == 1 and isinstance(messages[-1], HumanMessage)
+
+
+def supervisor_policy(worker_prefix: str = "web_worker") -> Policy:
+    """Looks up the worker, sends it the task, then finishes with the worker's answer."""
+    def policy(messages):
+        if is_activation(messages):
+            return AIMessage("Ready.")
+        tool_message = last_tool(messages)
+        if tool_message is None:
+            return call("get_known_agents")
+        if tool_message.name == "get_known_agents":
+            worker = next((name.strip() for name in tool_message.content.split(",")
+                           if name.strip().startswith(worker_prefix)), worker_prefix)
+            task = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+            return call("send_message", to=worker, type="TASK", message=str(task))
+        if tool_message.name == "send_message":
+            return call("finish", message=tool_message.content[:500])
+        # after finish: repeat its report as the final answer
+        return AIMessage(str(tool_message.content))
+    return policy
+
+
+def search_worker_policy() -> Policy:
+    """Searches for the task text with get_working_links and reports the links."""
+    def policy(messages):
+        if is_activation(messages):
+            return AIMessage("Ready.")
+        tool_message = last_tool(messages)
+        if tool_message is None:
+            task = str(messages[-1].content)
+            query = re.sub(r"^Сообщение: \[\w+\][^:]*: ", "", task)[:200]
+            return call("get_working_links", query=query, max_results=5)
+        if tool_message.name == "get_working_links":
+            return call("finish", message=f"Links: {tool_message.content}")
+        # after finish: repeat its report as the final answer
+        return AIMessage(str(tool_message.content))
+    return policy
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model for offline load tests: answers come from ``policy`` after ``latency`` seconds
+    (± ``jitter``, uniformly), tools bound by the agent are accepted and ignored. ``calls``
+    counts requests.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    policy: Any
+    latency: float = 0.0
+    jitter: float = 0.0
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages) -> ChatResult:
+        self._calls += 1
+        return ChatResult(generations=[ChatGeneration(message=self.policy(list(messages)))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return self._respond(messages)
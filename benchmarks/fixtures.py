@@ -0,0 +1,105 @@
+import html
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+SEARCH_RESULTS = 10
+
+
+def search_results_html(base_url: str, query: str, count: int = SEARCH_RESULTS) -> str:
+    """A results page in DuckDuckGo's HTML layout (``a.result__a`` anchors) linking to fixture pages."""
+    items = "\n".join(
+        f'<div class="result"><h2 class="result__title"><a class="result__a" rel="nofollow" '
+        f'href="{base_url}/page/result-{i}?q={html.escape(query)}">{html.escape(query)} — result {i}</a></h2>'
+        f'<a class="result__snippet">Snippet {i} for {html.escape(query)}</a></div>'
+        for i in range(count)
+    )
+    return f"<html><body><div id=\"links\">{items}</div></body></html>"
+
+
+def generated_page(name: str, paragraphs: int = 20) -> str:
+    body = "\n".join(f"<p>Paragraph {i} of {html.escape(name)}: lorem ipsum dolor sit amet.</p>" for i in range(paragraphs))
+    links = "\n".join(f'<a href="/page/{html.escape(name)}-{i}">Related {i}</a>' for i in range(10))
+    return f"<html><head><title>{html.escape(name)}</title></head><body><h1>{html.escape(name)}</h1>{body}<nav>{links}</nav></body></html>"
+
+
+class FixtureServer:
+    """
+    Local HTTP server for offline runs: ``/html/`` answers like DuckDuckGo's HTML search and
+    ``/page/<name>`` serves ``<pages_dir>/<name>.html`` or a generated page. ``latency`` adds a
+    fixed delay to every response. Runs in a daemon thread; use as a context manager.
+    """
+
+    def __init__(self, pages_dir: str = PAGES_DIR, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.pages_dir = pages_dir
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: str):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, form: dict):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = urlsplit(self.path)
+                if parts.path.rstrip("/") == "/html":
+                    query = (form.get("q") or parse_qs(parts.query).get("q") or [""])[0]
+                    self._send(200, search_results_html(server.url, query))
+                elif parts.path.startswith("/page/"):
+                    self._send(200, server.page(unquote(parts.path[len("/page/"):])))
+                else:
+                    self._send(404, "<html><body>not found</body></html>")
+
+            def do_GET(self):
+                self._handle({})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._handle(parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, name: str) -> str:
+        path = os.path.join(self.pages_dir, os.path.basename(name) + ".html")
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return generated_page(name)
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
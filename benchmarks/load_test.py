@@ -0,0 +1,167 @@
+"""
+Offline load test of the agent system.
+
+Each session is a supervisor and a web worker bound by an Operator, as in run.py, but both
+agents talk to FakeChatModel (scripted tool calls, configurable latency) and the worker's
+get_working_links searches a local fixture server instead of DuckDuckGo. N sessions run
+concurrently, each sending its tasks one after another, so the numbers measure the
+orchestration overhead (agent graph, Operator/Communicator, tools, logging, tracing) under load.
+
+    python -m benchmarks.load_test --sessions 16 --tasks 10 --latency 0.2 --jitter 0.05
+
+Needs no network or API keys. Task traces go to a temporary file unless --trace-file or
+MISTERKNEW_TRACE_FILE names one, so synthetic traces stay out of the real trace store.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from ai_agents.advance_ai_agent import AiAgentWorker
+from ai_agents.tools import web_tools
+from ai_agents.tools.web_tools import search_client
+from ai_agents_operator import Operator
+from benchmarks.fake_model import FakeChatModel, search_worker_policy, supervisor_policy
+from benchmarks.fixtures import FixtureServer
+from logging_folder.metrics import Histogram
+from logging_folder.tracing import trace, tracer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class PeakMemory:
+    """Samples the process RSS in a thread and keeps the peak (ru_maxrss when psutil is missing)."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="peak-memory", daemon=True)
+
+    @staticmethod
+    def rss() -> int:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+async def run_session(index: int, args, latencies: Histogram, totals: dict):
+    supervisor_model = FakeChatModel(policy=supervisor_policy(), latency=args.latency, jitter=args.jitter)
+    worker_model = FakeChatModel(policy=search_worker_policy(), latency=args.latency, jitter=args.jitter)
+    supervisor = AiAgentWorker("MisterKnew", tools=[], model=supervisor_model)
+    web_worker = AiAgentWorker("web_worker", tools=[web_tools.get_working_links], model=worker_model)
+    operator = Operator([supervisor, web_worker])
+    for agent in (supervisor, web_worker):
+        if not await operator.activate_agent(agent):
+            raise RuntimeError(f"Session {index}: activation of {agent.name} failed")
+    activation_calls = supervisor_model.calls + worker_model.calls
+
+    for number in range(args.tasks):
+        started = time.perf_counter()
+        try:
+            with trace("load_test_task", session=index, task=number):
+                response = await supervisor.ainvoke(f"Find documentation for topic {index}-{number}", silent=True)
+            if "Links:" not in str(response):
+                totals["failed"] += 1
+        except Exception as ex:
+            totals["failed"] += 1
+            totals.setdefault("errors", []).append(repr(ex))
+        latencies.observe(time.perf_counter() - started)
+        totals["tasks"] += 1
+    totals["model_calls"] += supervisor_model.calls + worker_model.calls - activation_calls
+
+
+async def run(args) -> dict:
+    latencies = Histogram()
+    totals = {"tasks": 0, "failed": 0, "model_calls": 0}
+    with FixtureServer(latency=args.server_latency) as server:
+        client = search_client.AsyncSearchClient(search_url=f"{server.url}/html/", per_host_limit=args.search_concurrency)
+        search_client._search_client = client
+        try:
+            with PeakMemory() as memory:
+                started = time.perf_counter()
+                await asyncio.gather(*(run_session(i, args, latencies, totals) for i in range(args.sessions)))
+                duration = time.perf_counter() - started
+        finally:
+            await client.aclose()
+            search_client._search_client = None
+        search_requests = server.requests
+
+    tasks = totals["tasks"]
+    return {
+        "sessions": args.sessions,
+        "tasks": tasks,
+        "failed": totals["failed"],
+        "duration_s": round(duration, 3),
+        "tasks_per_s": round(tasks / duration, 2) if duration else 0.0,
+        "latency_p50_s": round(latencies.quantile(0.5), 4),
+        "latency_p95_s": round(latencies.quantile(0.95), 4),
+        "latency_p99_s": round(latencies.quantile(0.99), 4),
+        "latency_max_s": round(latencies.max, 4),
+        "model_calls_per_task": round(totals["model_calls"] / tasks, 2) if tasks else 0.0,
+        "search_requests": search_requests,
+        "peak_rss_mb": round(memory.peak / 2 ** 20, 1),
+        "rss_growth_mb": round((memory.peak - memory.baseline) / 2 ** 20, 1),
+        "model_latency_s": args.latency,
+        "trace_file": tracer.path,
+        "errors": totals.get("errors", [])[:5],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent supervisor sessions")
+    parser.add_argument("--tasks", type=int, default=5, help="tasks per session, sent one after another")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake model latency per call, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± uniform jitter of the model latency, seconds")
+    parser.add_argument("--server-latency", type=float, default=0.0, help="fixture server delay per request, seconds")
+    parser.add_argument("--search-concurrency", type=int, default=4,
+                        help="search requests in flight per host (the search client's production default is 4)")
+    parser.add_argument("--trace-file", default=os.environ.get("MISTERKNEW_TRACE_FILE"),
+                        help="where to write the task traces (default: a new temporary file)")
+    parser.add_argument("--json", metavar="OUT", help="also write the report as JSON")
+    parser.add_argument("--log", action="store_true", help="keep INFO/DEBUG logging (off by default to keep the console readable)")
+    args = parser.parse_args(argv)
+
+    if not args.log:
+        logging.disable(logging.INFO)
+    tracer.path = args.trace_file or os.path.join(tempfile.mkdtemp(prefix="misterknew_load_"), "traces.jsonl")
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        if key != "errors":
+            print(f"{key:>22}: {value}")
+    for error in report["errors"]:
+        print(f"error: {error}", file=sys.stderr)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Writes the synthetic part of the extraction benchmark corpus into benchmarks/pages.
+
+The pages are generated from a fixed seed, so the corpus (and the baseline measured on it)
+stays the same between runs; saved real pages can be added to the directory next to them.
+
+    python -m benchmarks.make_pages
+"""
+import html
+import json
+import os
+import random
+
+from benchmarks.fixtures import PAGES_DIR
+
+WORDS = ("agent model browser page search result python shell token request latency cache index "
+         "document table value market price weather news update release version support guide").split()
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _nav(rng: random.Random, links: int, base: str = "https://example.com") -> str:
+    items = "".join(f'<li><a href="{base}/section/{i}">{html.escape(rng.choice(WORDS).title())} {i}</a></li>'
+                    for i in range(links))
+    return f'<nav class="navbar"><ul>{items}</ul></nav>'
+
+
+def small_static(rng: random.Random) -> str:
+    body = "".join(f"<p>{_paragraph(rng, 3)}</p>" for _ in range(4))
+    return (f"<!doctype html><html><head><title>Small static page</title></head><body>"
+            f"<h1>Small static page</h1>{body}<p><a href=\"https://example.com/about\">About</a></p></body></html>")
+
+
+def news_article(rng: random.Random) -> str:
+    paragraphs = "".join(
+        (f"<h2>{_sentence(rng, 5)}</h2>" if i % 8 == 0 else "") + f"<p>{_paragraph(rng)}</p>" for i in range(40))
+    related = "".join(f'<li><a href="https://news.example.com/story/{i}?utm_source=related">{_sentence(rng, 6)}</a></li>'
+                      for i in range(30))
+    return (
+        "<!doctype html><html><head><title>News article</title><style>.ad{display:none}</style>"
+        "<script>window.dataLayer=[];</script></head><body>"
+        f"<header>{_nav(rng, 40, 'https://news.example.com')}</header>"
+        '<div class="cookie-banner">We use cookies. <button>Accept</button></div>'
+        f'<main><article><h1>{_sentence(rng, 8)}</h1><p class="byline">By Reporter</p>{paragraphs}'
+        "<figure><img src=\"/img/1.jpg\" alt=\"chart\"><figcaption>Chart</figcaption></figure></article></main>"
+        f'<aside class="sidebar related"><ul>{related}</ul></aside>'
+        f'<div class="ad advert">{_paragraph(rng, 2)}</div>'
+        f"<footer>{_nav(rng, 25, 'https://news.example.com/footer')}</footer></body></html>"
+    )
+
+
+def search_results(rng: random.Random) -> str:
+    results = []
+    for i in range(30):
+        host = rng.choice(["docs.python.org", "stackoverflow.com", "github.com", "habr.com", "example.org", "wiki.example.com"])
+        target = f"https://{host}/{rng.choice(WORDS)}/{i}"
+        results.append(
+            f'<div class="result results_links"><div class="links_main"><h2 class="result__title">'
+            f'<a class="result__a" rel="nofollow" href="//duckduckgo.com/l/?uddg={html.escape(target)}&amp;rut=abc{i}">'
+            f"{_sentence(rng, 7)}</a></h2>"
+            f'<a class="result__url" href="{target}">{host}</a>'
+            f'<a class="result__snippet" href="{target}">{_paragraph(rng, 2)}</a></div></div>'
+        )
+    ads = "".join(f'<div class="result result--ad"><a class="result__a" href="https://ads.example.net/{i}">Ad {i}</a></div>'
+                  for i in range(3))
+    return (f"<!doctype html><html><head><title>query at DuckDuckGo</title></head><body>"
+            f'<form class="header__form"><input name="q" value="query"></form>'
+            f'<div id="links" class="results">{ads}{"".join(results)}</div></body></html>')
+
+
+def docs_heavy(rng: random.Random) -> str:
+    sidebar = "".join(f'<li><a href="/docs/api/{i}">{rng.choice(WORDS)}.{rng.choice(WORDS)}()</a></li>' for i in range(1500))
+    sections = []
+    for i in range(60):
+        rows = "".join(f"<tr><td><code>{rng.choice(WORDS)}_{j}</code></td><td>{_sentence(rng, 8)}</td></tr>" for j in range(12))
+        sections.append(
+            f'<section id="s{i}"><h2>{_sentence(rng, 4)}</h2><p>{_paragraph(rng)}</p>'
+            f"<pre><code>def {rng.choice(WORDS)}_{i}(x):\n    return x * {i}\n</code></pre>"
+            f"<table><tr><th>Name</th><th>Description</th></tr>{rows}</table>"
+            f'<p>See <a href="/docs/api/{i}">the API reference</a>.</p></section>'
+        )
+    return (f"<!doctype html><html><head><title>Documentation</title></head><body>"
+            f"<header>{_nav(rng, 20, 'https://docs.example.com')}</header>"
+            f'<div class="layout"><aside class="sidebar"><ul>{sidebar}</ul></aside>'
+            f'<main class="content"><h1>Reference</h1>{"".join(sections)}</main></div>'
+            f"<footer>{_nav(rng, 30, 'https://docs.example.com/footer')}</footer></body></html>")
+
+
+def spa_dashboard(rng: random.Random) -> str:
+    state = {"rows": [{"id": i, "name": f"{rng.choice(WORDS)} {i}", "value": round(rng.random() * 1000, 2),
+                       "href": f"/item/{i}"} for i in range(2500)]}
+    script = """
+    const state = JSON.parse(document.getElementById('__STATE__').textContent);
+    const root = document.getElementById('root');
+    const nav = document.createElement('nav');
+    for (let i = 0; i < 50; i++) { const a = document.createElement('a'); a.href = '/menu/' + i; a.textContent = 'Menu ' + i; nav.appendChild(a); }
+    root.appendChild(nav);
+    const table = document.createElement('table');
+    for (const row of state.rows) {
+      const tr = document.createElement('tr');
+      tr.innerHTML = `<td>${row.id}</td><td><a href="${row.href}">${row.name}</a></td><td>${row.value}</td>`;
+      table.appendChild(tr);
+    }
+    root.appendChild(table);
+    """
+    return (f"<!doctype html><html><head><title>Dashboard</title></head><body>"
+            f'<div id="root"><noscript>Enable JavaScript</noscript></div>'
+            f'<script id="__STATE__" type="application/json">{json.dumps(state)}</script>'
+            f"<script>{script}</script></body></html>")
+
+
+PAGES = {
+    "small_static": small_static,
+    "news_article": news_article,
+    "search_results": search_results,
+    "docs_heavy": docs_heavy,
+    "spa_dashboard": spa_dashboard,
+}
+
+
+def main():
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    for name, build in PAGES.items():
+        page = build(random.Random(name))
+        with open(os.path.join(PAGES_DIR, f"{name}.html"), "w", encoding="utf-8", newline="\n") as f:
+            f.write(page)
+        print(f"{name}.html: {len(page.encode('utf-8')) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
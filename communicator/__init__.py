@@ -2,6 +2,8 @@ from ai_agents.advance_ai_agent import AiAgentWorker
 from typing import List
 from langchain_core.tools import BaseTool, tool
 from logging_folder import get_logger
+from logging_folder.metrics import agent_label, metrics
+from logging_folder.tracing import span
 
 log = get_logger(__name__)
 
@@ -71,9 +73,12 @@ class Communicator:
 
                 log.info(f"[{type}]{from_agent.name} → {to_agent.name}: {message}")
 
-                response = await to_agent.ainvoke(
-                    f"Сообщение: [{type}]{from_agent}: {message}", silent=True
-                )
+                hop = metrics.histogram("message_hop_seconds", to=agent_label(to_agent.name), type=type.upper())
+                with hop.time(), span("send_message", kind="message", agent=agent_label(from_agent.name),
+                                      to=agent_label(to_agent.name), type=type.upper(), message=message):
+                    response = await to_agent.ainvoke(
+                        f"Сообщение: [{type}]{from_agent}: {message}", silent=True
+                    )
 
                 log.info(f"response [{to_agent.name}] → {from_agent.name}: {response}")
 
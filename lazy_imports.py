@@ -0,0 +1,128 @@
+import importlib
+import importlib.abc
+import importlib.util
+import sys
+import threading
+import time
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Returns the module if it is already imported, otherwise a LazyModule that imports it on first use."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def missing_modules(*names: str) -> list[str]:
+    """Names of top-level modules that cannot be found, checked without importing them."""
+    missing = []
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
+        except (ImportError, ValueError):
+            missing.append(name)
+    return missing
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Records how long each module takes to import, like ``python -X importtime``.
+
+    ``cumulative`` includes nested imports, ``self`` excludes them. Only modules imported
+    after ``install()`` are measured.
+    """
+
+    def __init__(self):
+        self.records: dict[str, tuple[float, float]] = {}
+        self.total = 0.0
+        self._local = threading.local()
+        self._finding = threading.local()
+
+    def install(self) -> "ImportProfiler":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._finding, "active", False):
+            return None
+        self._finding.active = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding.active = False
+
+    def _enter(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+
+    def _leave(self, name: str, elapsed: float):
+        stack = self._local.stack
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        else:
+            self.total += elapsed
+        self.records[name] = (elapsed, elapsed - children)
+
+    def report(self, top: int = 25) -> str:
+        lines = [f"Imports measured: {len(self.records)}, total {self.total:.3f}s",
+                 f"{'cumulative':>11} {'self':>9}  module"]
+        ranked = sorted(self.records.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        lines += [f"{cumulative:>10.3f}s {own:>8.3f}s  {name}" for name, (cumulative, own) in ranked]
+        return "\n".join(lines)
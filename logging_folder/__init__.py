@@ -1,10 +1,13 @@
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from colorama import Fore, Style, init
 import asyncio
 from functools import wraps
+import atexit
+import json
+import queue
+import threading
 import time
-import copy
 import os
 
 # Initialize colorama for colored console output
@@ -32,12 +35,218 @@ class ColoredFormatter(logging.Formatter):
         'SUCCESS': Fore.GREEN
     }
 
+    def formatMessage(self, record):
+        # Colors only the message part; the record is restored instead of copied
+        color = self.COLORS.get(record.levelname, '')
+        if not color:
+            return super().formatMessage(record)
+        message = record.message
+        record.message = f"{color}{message}{Style.RESET_ALL}"
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
+
+
+class BatchedFileHandler(SafeTimedRotatingFileHandler):
+    """
+    Rotating file handler that flushes in batches: after ``batch_size`` records, when
+    ``flush_interval`` seconds passed since the last flush, for records at ``flush_level``
+    or above, and when the log listener is idle.
+    """
+    def __init__(self, *args, batch_size=100, flush_interval=1.0, flush_level=logging.ERROR, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._force = False
+
+    def emit(self, record):
+        self._force = record.levelno >= self.flush_level
+        super().emit(record)
+
+    def flush(self):
+        # Called by StreamHandler.emit after every record; only flushes when a batch is due
+        self._pending += 1
+        if self._force or self._pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_pending()
+
+    def flush_pending(self):
+        if self._pending:
+            super().flush()
+            self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush_pending()
+        super().close()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and exception text."""
     def format(self, record):
-        record_copy = copy.copy(record)
-        color = self.COLORS.get(record_copy.levelname, '')
-        if color:
-            record_copy.msg = f"{color}{record_copy.getMessage()}{Style.RESET_ALL}"
-        return super().format(record_copy)
+        entry = {
+            "time": self.formatTime(record),
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class Deferred:
+    """
+    Base for log arguments that are safe to format later, in the listener thread: they must
+    not change after the log call. Records whose arguments are all Deferred or immutable
+    primitives are queued unformatted.
+    """
+
+
+_DEFERRABLE = (Deferred, str, int, float, bool, bytes, type(None))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue without blocking. When the queue is full, a record below
+    WARNING is dropped; a WARNING or higher record replaces the oldest queued record.
+    Dropped records are counted in ``dropped``.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener thread formats the record; here only the message is merged, without copying,
+        # and not even that when the arguments can be formatted later
+        if record.args and not (isinstance(record.args, tuple) and all(isinstance(arg, _DEFERRABLE) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self.queue.put_nowait(record)
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def __init__(self, log_queue, *handlers, idle_interval=0.5, on_idle=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.idle_interval = idle_interval
+        self.on_idle = on_idle
+
+    def enqueue_sentinel(self):
+        # The queue may be full at shutdown; wait for room instead of failing
+        self.queue.put(self._sentinel)
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.idle_interval if block else None)
+            except queue.Empty:
+                if not block:
+                    raise
+                if self.on_idle:
+                    self.on_idle()
+
+
+class LogPipeline:
+    """
+    Asynchronous log output shared by all loggers writing to one file.
+
+    Loggers only put records on a bounded queue (``DroppingQueueHandler``); a background
+    listener thread formats them and writes to the console, the rotating log file (flushed in
+    batches) and, if enabled, a JSON-lines file next to it. Drops are reported in the log
+    periodically. The listener is stopped, and everything queued is written, at exit.
+    """
+    def __init__(self, log_file, queue_size=10000, json_lines=False):
+        self.queue = queue.Queue(queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self._reported_drops = 0
+
+        console = logging.StreamHandler()
+        console.setFormatter(ColoredFormatter('%(name)s - %(levelname)s - %(message)s'))
+        self.file_handlers = [self._file_handler(log_file, logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))]
+        if json_lines:
+            self.file_handlers.append(self._file_handler(os.path.splitext(log_file)[0] + '.jsonl', JsonLinesFormatter()))
+        self.listener = _Listener(self.queue, console, *self.file_handlers, on_idle=self._on_idle)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    @staticmethod
+    def _file_handler(path, formatter):
+        # File handler with delayed open and safe rollover
+        fh = BatchedFileHandler(
+            path,
+            when='midnight',
+            interval=1,
+            backupCount=7,
+            encoding='utf-8',
+            delay=True
+        )
+        fh.suffix = "%Y-%m-%d"
+        formatter.converter = time.localtime
+        fh.setFormatter(formatter)
+        return fh
+
+    def _on_idle(self):
+        for fh in self.file_handlers:
+            fh.acquire()
+            try:
+                fh.flush_pending()
+            finally:
+                fh.release()
+        dropped = self.handler.dropped
+        if dropped != self._reported_drops:
+            record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                       f"{dropped - self._reported_drops} log records dropped (queue full)", None, None)
+            self._reported_drops = dropped
+            self.listener.handle(record)
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+            self._on_idle()
+        for fh in self.file_handlers:
+            fh.close()
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(log_file) -> LogPipeline:
+    with _pipelines_lock:
+        pipeline = _pipelines.get(log_file)
+        if pipeline is None:
+            json_lines = os.environ.get("MISTERKNEW_LOG_JSON", "").lower() in ("1", "true", "yes")
+            queue_size = int(os.environ.get("MISTERKNEW_LOG_QUEUE", "10000"))
+            pipeline = _pipelines[log_file] = LogPipeline(log_file, queue_size=queue_size, json_lines=json_lines)
+        return pipeline
 
 class Logger:
     def __init__(self, name=__name__, level=logging.INFO, log_file='app.log'):
@@ -56,35 +265,21 @@ class Logger:
 
         # Prevent adding duplicate handlers
         if not self.logger.handlers:
-            # Console handler
-            ch = logging.StreamHandler()
-            ch.setFormatter(ColoredFormatter('%(name)s - %(levelname)s - %(message)s'))
-            self.logger.addHandler(ch)
-
-            # File handler with delayed open and safe rollover
-            fh = SafeTimedRotatingFileHandler(
-                log_file,
-                when='midnight',
-                interval=1,
-                backupCount=7,
-                encoding='utf-8',
-                delay=True
-            )
-            fh.suffix = "%Y-%m-%d"
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            formatter.converter = time.localtime
-            fh.setFormatter(formatter)
-            self.logger.addHandler(fh)
+            # Records go through the shared queue; console and file output happen in the listener thread
+            self.logger.addHandler(get_pipeline(log_file).handler)
 
     def __get_time(self, func):
+        # Durations also go into a histogram, so percentiles are available besides the log lines
+        from logging_folder.metrics import metrics
+        histogram = metrics.histogram("function_seconds", function=func.__qualname__)
+
         if asyncio.iscoroutinefunction(func):
             @wraps(func)
             async def async_wrapper(*args, **kwargs):
                 start = time.perf_counter()
                 result = await func(*args, **kwargs)
                 elapsed = time.perf_counter() - start
+                histogram.observe(elapsed)
                 self.success(f"Async function {func.__name__} executed in {elapsed:.4f} seconds")
                 return result
             return async_wrapper
@@ -94,6 +289,7 @@ class Logger:
                 start = time.perf_counter()
                 result = func(*args, **kwargs)
                 elapsed = time.perf_counter() - start
+                histogram.observe(elapsed)
                 self.success(f"Sync function {func.__name__} executed in {elapsed:.4f} seconds")
                 return result
             return sync_wrapper
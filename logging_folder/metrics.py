@@ -0,0 +1,307 @@
+import atexit
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+# Histogram values are kept in microseconds with 2**SUB_BUCKET_BITS buckets per power of two
+SUB_BUCKET_BITS = 6
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+SUMMARY_INTERVAL = 60
+_LABEL_RE = re.compile(r"[^a-zA-Z0-9_]")
+# Agent names carry a uuid4 hex suffix; it is dropped from label values to keep cardinality low
+_AGENT_SUFFIX_RE = re.compile(r"_[0-9a-f]{32}$")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def agent_label(name: str) -> str:
+    return _AGENT_SUFFIX_RE.sub("", str(name))
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class Histogram:
+    """
+    Latency histogram with HdrHistogram-style log-linear buckets: values below
+    2**SUB_BUCKET_BITS µs are exact, above that every power of two is split into
+    2**SUB_BUCKET_BITS buckets, so quantiles are within ~1.6% of the true value at
+    any scale while recording stays O(1) and memory grows only with the value range.
+    """
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, micros: int) -> int:
+        if micros < self.sub_buckets:
+            return micros
+        exponent = micros.bit_length() - self.sub_bucket_bits - 1
+        return (exponent + 1) * self.sub_buckets + (micros >> exponent) - self.sub_buckets
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        if index < 2 * self.sub_buckets:
+            return index, index + 1
+        exponent = index // self.sub_buckets - 1
+        mantissa = index % self.sub_buckets + self.sub_buckets
+        return mantissa << exponent, (mantissa + 1) << exponent
+
+    def observe(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        index = self._index(int(seconds * 1e6))
+        with self._lock:
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Value (in seconds) below which a ``q`` share of observations fall."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if seen >= rank:
+                    low, high = self._bounds(index)
+                    return min(max((low + high) / 2e6, self.min), self.max)
+            return self.max
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and latency histograms, addressed by name and labels:
+    ``metrics.histogram("tool_seconds", tool="run_python").observe(elapsed)``.
+
+    ``render()`` produces the Prometheus text format (histograms as summaries with p50/p95/p99),
+    ``write_textfile`` writes it atomically for the node_exporter textfile collector, ``serve``
+    exposes it on a local /metrics endpoint, and ``summary()`` is the one-line-per-series log
+    digest that ``start_export`` writes periodically.
+    """
+
+    def __init__(self):
+        self._series: dict[tuple[str, tuple], object] = {}
+        self._kinds: dict[str, str] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._export_thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _get(self, kind: str, name: str, labels: dict):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                if self._kinds.setdefault(name, kind) != kind:
+                    raise ValueError(f"Metric {name!r} is a {self._kinds[name]}, not a {kind}")
+                series = self._series.setdefault(key, _KINDS[kind]())
+        return series
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get("counter", name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get("gauge", name, labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get("histogram", name, labels)
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def timed(self, name: str, **labels):
+        """Decorator recording the duration of every call (sync or async) in histogram ``name``."""
+        def decorator(func):
+            histogram = self.histogram(name, **labels)
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with histogram.time():
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with histogram.time():
+                    return func(*args, **kwargs)
+            return sync_wrapper
+        return decorator
+
+    def _sorted_series(self):
+        with self._lock:
+            return sorted(self._series.items(), key=lambda item: item[0])
+
+    @staticmethod
+    def _labels(labels: tuple, extra: tuple = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{_LABEL_RE.sub("_", k)}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        lines, described = [], set()
+        for (name, labels), series in self._sorted_series():
+            kind = self._kinds[name]
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {'summary' if kind == 'histogram' else kind}")
+            if kind == "histogram":
+                for q in SUMMARY_QUANTILES:
+                    lines.append(f"{name}{self._labels(labels, (('quantile', q),))} {series.quantile(q):.6f}")
+                lines.append(f"{name}_sum{self._labels(labels)} {series.sum:.6f}")
+                lines.append(f"{name}_count{self._labels(labels)} {series.count}")
+            else:
+                lines.append(f"{name}{self._labels(labels)} {series.value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Human-readable digest: counters and gauges, then count and p50/p95/p99/max of every histogram."""
+        lines = []
+        for (name, labels), series in self._sorted_series():
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            series_name = f"{name}{{{label_text}}}" if label_text else name
+            if isinstance(series, Histogram):
+                if series.count:
+                    lines.append(f"{series_name} n={series.count} " + " ".join(
+                        f"p{int(q * 100)}={series.quantile(q) * 1000:.1f}ms" for q in SUMMARY_QUANTILES
+                    ) + f" max={series.max * 1000:.1f}ms")
+            else:
+                lines.append(f"{series_name} {series.value:g}")
+        return "\n".join(lines)
+
+    def write_textfile(self, path: str):
+        """Writes ``render()`` to ``path`` via a temporary file, so scrapers never see a partial file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves ``render()`` at http://host:port/metrics from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        log.info(f"Metrics endpoint on http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    def start_export(self, textfile: str | None = None, port: int | None = None,
+                     interval: float | None = None):
+        """
+        Starts the exporters configured here or by MISTERKNEW_METRICS_FILE, MISTERKNEW_METRICS_PORT and
+        MISTERKNEW_METRICS_INTERVAL: every ``interval`` seconds the summary is logged and the text file
+        rewritten. Calling it again is a no-op.
+        """
+        if self._export_thread is not None:
+            return
+        textfile = textfile or os.environ.get("MISTERKNEW_METRICS_FILE") or None
+        port = port if port is not None else int(os.environ.get("MISTERKNEW_METRICS_PORT", "0"))
+        interval = interval or float(os.environ.get("MISTERKNEW_METRICS_INTERVAL", SUMMARY_INTERVAL))
+        if port:
+            try:
+                self.serve(port)
+            except OSError as ex:
+                log.error(f"Failed to start metrics endpoint on port {port}: {ex!r}")
+
+        def export():
+            summary = self.summary()
+            if summary:
+                log.info("Metrics summary:\n" + summary)
+            if textfile:
+                try:
+                    self.write_textfile(textfile)
+                except OSError as ex:
+                    log.error(f"Failed to write metrics to {textfile}: {ex!r}")
+
+        def loop():
+            while not self._stop.wait(interval):
+                export()
+
+        self._export_thread = threading.Thread(target=loop, name="metrics-export", daemon=True)
+        self._export_thread.start()
+        atexit.register(lambda: (self._stop.set(), textfile and export()))
+
+
+metrics = MetricsRegistry()
+metrics.describe("agent_step_seconds", "Duration of one agent graph invocation (model calls and tools)")
+metrics.describe("tool_seconds", "Tool call duration")
+metrics.describe("tool_errors_total", "Tool calls that raised or returned an error")
+metrics.describe("message_hop_seconds", "send_message round trip between agents")
+metrics.describe("page_load_seconds", "Browser navigation time in goto_page")
+metrics.describe("function_seconds", "Duration of functions decorated with Logger.timeit")
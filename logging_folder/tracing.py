@@ -0,0 +1,331 @@
+"""
+Span-based tracing of agent runs.
+
+A trace starts at a user query (``with trace("user_query"): ...``); agent steps, tool calls and
+messages between agents open child spans with ``span(...)``. The current span lives in a
+contextvar, so it follows the call chain through ``send_message`` into the receiving agent and
+into tools, including tools run in threads by langchain (which copies the context). Spans opened
+outside a trace are not recorded.
+
+Finished traces are appended as one JSON line each to ``logging_folder/traces/traces.jsonl``
+(MISTERKNEW_TRACE_FILE, MISTERKNEW_TRACING=0 disables them). To inspect them:
+
+    python -m logging_folder.tracing                 # waterfall of the last trace
+    python -m logging_folder.tracing --list 20       # recent traces
+    python -m logging_folder.tracing <trace_id> --chrome trace.json   # for chrome://tracing / Perfetto
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+TRACE_FILE = os.environ.get("MISTERKNEW_TRACE_FILE", "logging_folder/traces/traces.jsonl")
+MAX_TRACE_FILE_BYTES = 50 * 1024 * 1024
+MAX_ATTR_CHARS = 300
+WATERFALL_WIDTH = 40
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    kind: str = "internal"
+    start: float = 0.0
+    duration: float | None = None
+    status: str = "ok"
+    attrs: dict = field(default_factory=dict)
+    recording: bool = True
+
+    @property
+    def end(self) -> float:
+        return self.start + (self.duration or 0.0)
+
+    def set(self, **attrs):
+        if self.recording:
+            for key, value in attrs.items():
+                if isinstance(value, str) and len(value) > MAX_ATTR_CHARS:
+                    value = value[:MAX_ATTR_CHARS] + "…"
+                self.attrs[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration": round(self.duration or 0.0, 6),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+    @classmethod
+    def from_dict(cls, trace_id: str, data: dict) -> "Span":
+        return cls(trace_id, data["span_id"], data["parent_id"], data["name"], data.get("kind", "internal"),
+                   data["start"], data["duration"], data.get("status", "ok"), data.get("attrs", {}))
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("misterknew_span", default=None)
+_NOT_RECORDING = Span("", "", None, "", recording=False)
+
+
+def current_span() -> Span | None:
+    span = _current.get()
+    return span if span is not None and span.recording else None
+
+
+class Tracer:
+    """Collects the spans of open traces and appends each trace to the store when its root span ends."""
+
+    def __init__(self, path: str = TRACE_FILE, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._open: dict[str, list[Span]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _run(self, span: Span):
+        token = _current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as ex:
+            span.status = "cancelled" if isinstance(ex, asyncio.CancelledError) else "error"
+            span.set(error=repr(ex))
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current.reset(token)
+            self._finish(span)
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        """Starts a new trace with a root span ``name``, even inside another trace."""
+        if not self.enabled:
+            yield _NOT_RECORDING
+            return
+        trace_id = uuid.uuid4().hex
+        span = Span(trace_id, uuid.uuid4().hex[:16], None, name, "root", time.time())
+        span.set(**attrs)
+        with self._lock:
+            self._open[trace_id] = []
+        with self._run(span):
+            yield span
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs):
+        """Child span of the current span; a no-op span when no trace is active."""
+        parent = current_span()
+        if parent is None or parent.trace_id not in self._open:
+            yield _NOT_RECORDING
+            return
+        span = Span(parent.trace_id, uuid.uuid4().hex[:16], parent.span_id, name, kind, time.time())
+        span.set(**attrs)
+        with self._run(span):
+            yield span
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._open.get(span.trace_id)
+            if spans is None:
+                return
+            spans.append(span)
+            if span.parent_id is not None:
+                return
+            del self._open[span.trace_id]
+        try:
+            self._write(span, spans)
+        except OSError as ex:
+            log.error(f"Failed to store trace {span.trace_id}: {ex!r}")
+
+    def _write(self, root: Span, spans: list[Span]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        record = {
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "start": round(root.start, 6),
+            "duration": round(root.duration or 0.0, 6),
+            "spans": [s.to_dict() for s in sorted(spans, key=lambda s: s.start)],
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_TRACE_FILE_BYTES:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        log.debug(f"Trace {root.trace_id} ({root.name}): {len(spans)} spans, {root.duration:.2f}s")
+
+
+tracer = Tracer(enabled=os.environ.get("MISTERKNEW_TRACING", "1").lower() not in ("0", "false", "no"))
+trace = tracer.trace
+span = tracer.span
+
+
+# ----------------------------- Trace store readers ----------------------------- #
+def load_traces(path: str = TRACE_FILE) -> list[dict]:
+    traces = []
+    for name in (path + ".1", path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    traces.append(json.loads(line))
+                except ValueError:
+                    continue
+    return traces
+
+
+def _spans(record: dict) -> list[Span]:
+    return [Span.from_dict(record["trace_id"], data) for data in record["spans"]]
+
+
+def _children(spans: list[Span]) -> dict[str | None, list[Span]]:
+    children: dict[str | None, list[Span]] = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+    for group in children.values():
+        group.sort(key=lambda s: s.start)
+    return children
+
+
+def critical_path(spans: list[Span]) -> list[Span]:
+    """
+    Spans that determine the trace's duration: walking back from the end of each span, the child
+    that finished last before the cursor is on the path, then the one before its start, and so on;
+    the same is repeated inside every span on the path.
+    """
+    children = _children(spans)
+    roots = children.get(None, [])
+    path: list[Span] = []
+
+    def walk(s: Span):
+        path.append(s)
+        cursor = s.end + 1e-6
+        chain = []
+        for child in sorted(children.get(s.span_id, []), key=lambda c: c.end, reverse=True):
+            if child.end <= cursor:
+                chain.append(child)
+                cursor = child.start + 1e-6
+        for child in reversed(chain):
+            walk(child)
+
+    for root in roots:
+        walk(root)
+    return path
+
+
+def _label(s: Span) -> str:
+    details = [f"{key}={value}" for key, value in s.attrs.items() if key in ("agent", "to", "tool", "tokens", "error")]
+    return s.name + (f" [{', '.join(details)}]" if details else "") + ("" if s.status == "ok" else f" !{s.status}")
+
+
+def waterfall(record: dict) -> str:
+    """Indented span tree with offset/duration bars; spans on the critical path are marked with *."""
+    spans = _spans(record)
+    children = _children(spans)
+    on_path = {s.span_id for s in critical_path(spans)}
+    start, total = record["start"], max(record["duration"], 1e-6)
+    lines = [f"trace {record['trace_id']} {record['name']} {total:.3f}s, {len(spans)} spans"]
+
+    def render(s: Span, depth: int):
+        offset = int((s.start - start) / total * WATERFALL_WIDTH)
+        width = max(1, int((s.duration or 0.0) / total * WATERFALL_WIDTH))
+        bar = " " * offset + "█" * min(width, WATERFALL_WIDTH - offset)
+        marker = "*" if s.span_id in on_path else " "
+        lines.append(f"{marker} {s.start - start:8.3f}s {s.duration:8.3f}s |{bar:<{WATERFALL_WIDTH}}| "
+                     f"{'  ' * depth}{_label(s)}")
+        for child in children.get(s.span_id, []):
+            render(child, depth + 1)
+
+    for root in children.get(None, []):
+        render(root, 0)
+
+    self_times: dict[str, float] = {}
+    for s in critical_path(spans):
+        busy = sum(c.duration or 0.0 for c in children.get(s.span_id, []) if c.span_id in on_path)
+        self_times[_label(s)] = self_times.get(_label(s), 0.0) + max((s.duration or 0.0) - busy, 0.0)
+    lines.append("")
+    lines.append("critical path, self time:")
+    for label, seconds in sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:10]:
+        lines.append(f"  {seconds:8.3f}s {seconds / total:6.1%}  {label}")
+    return "\n".join(lines)
+
+
+def chrome_trace(records: list[dict]) -> dict:
+    """Chrome trace event format (chrome://tracing, Perfetto): one process per trace, one thread per agent."""
+    events = []
+    for pid, record in enumerate(records, start=1):
+        events.append({"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+                       "args": {"name": f"{record['name']} {record['trace_id'][:8]}"}})
+        threads: dict[str, int] = {}
+        by_id = {s["span_id"]: s for s in record["spans"]}
+        for s in record["spans"]:
+            # Spans are laid out per agent; tools and messages inherit the agent of their parent
+            owner, agent = s, None
+            while owner is not None and agent is None:
+                agent = owner["attrs"].get("agent")
+                owner = by_id.get(owner["parent_id"])
+            lane = agent or "main"
+            if lane not in threads:
+                threads[lane] = len(threads) + 1
+                events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": threads[lane], "args": {"name": lane}})
+            events.append({
+                "ph": "X", "name": s["name"], "cat": s["kind"], "pid": pid, "tid": threads[lane],
+                "ts": int(s["start"] * 1e6), "dur": max(int(s["duration"] * 1e6), 1),
+                "args": {**s["attrs"], "status": s["status"]},
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logging_folder.tracing", description="Inspect stored agent traces")
+    parser.add_argument("trace_id", nargs="?", help="trace id or prefix (default: the last trace)")
+    parser.add_argument("--file", default=TRACE_FILE)
+    parser.add_argument("--list", type=int, metavar="N", help="list the last N traces")
+    parser.add_argument("--chrome", metavar="OUT", help="write the trace(s) in Chrome trace format")
+    parser.add_argument("--all", action="store_true", help="with --chrome: export every stored trace")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.file)
+    if not traces:
+        print(f"No traces in {args.file}", file=sys.stderr)
+        return 1
+    if args.list:
+        for record in traces[-args.list:]:
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["start"]))
+            print(f"{record['trace_id']}  {started}  {record['duration']:8.2f}s  {len(record['spans']):4} spans  {record['name']}")
+        return 0
+    if args.trace_id:
+        selected = [record for record in traces if record["trace_id"].startswith(args.trace_id)]
+        if not selected:
+            print(f"No trace {args.trace_id!r}", file=sys.stderr)
+            return 1
+    else:
+        selected = traces if args.all else traces[-1:]
+    if args.chrome:
+        with open(args.chrome, "w", encoding="utf-8") as f:
+            json.dump(chrome_trace(selected), f, ensure_ascii=False)
+        print(f"Wrote {len(selected)} trace(s) to {args.chrome}")
+        return 0
+    print(waterfall(selected[-1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
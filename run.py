@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
 import json
 import os
 import sys
@@ -12,25 +13,32 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 
-# --- Attempt project imports early; fail gracefully with a dialog.
+_T0 = time.perf_counter()
+
+# Top-level module: importing the utils package here would load logging and colorama before the probe
+from lazy_imports import ImportProfiler, lazy_import, missing_modules
+
+# --- `python run.py --profile-startup` prints an import-time breakdown once startup finishes.
+_import_profiler = ImportProfiler().install() if "--profile-startup" in sys.argv else None
+
+# --- Probe dependencies without importing them; fail gracefully with a dialog.
+# Project modules are imported lazily by the startup pipeline, after the window is shown.
 _missing_reason = None
-try:
-    from ai_agents.advance_ai_agent import AiAgentWorker
-    from ai_agents_operator import Operator
-    from ai_agents.tools.win_tools import run_shell_command, save_python_code  # noqa: F401 (used by os_worker tool list)
-    from ai_agents.tools.web_tools import (
-        init_browser_session,
-        browser_navigate,
-        browser_get_html_by_part,
-        browser_use_console,
-        browser_get_all_links,
-        get_working_links,
-        open_link_in_browser,
-    )
-    from utils.key_getter import extract_and_save_chrome_key
-    from utils.db_decoder import extract_cookies_for_playwright
-except Exception as e:  # noqa: BLE001
-    _missing_reason = str(e)
+_missing = missing_modules("langchain_core", "langgraph", "langchain_openai", "langchain_deepseek", "playwright",
+                           "bs4", "httpx", "Crypto", "colorama", "dotenv", "pypsexec")
+if _missing:
+    _missing_reason = "No module named " + ", ".join(repr(name) for name in _missing)
+
+advance_ai_agent = lazy_import("ai_agents.advance_ai_agent")
+ai_agents_operator = lazy_import("ai_agents_operator")
+win_tools = lazy_import("ai_agents.tools.win_tools")
+web_tools = lazy_import("ai_agents.tools.web_tools")
+key_getter = lazy_import("utils.key_getter")
+db_decoder = lazy_import("utils.db_decoder")
+startup = lazy_import("utils.startup")
+metrics = lazy_import("logging_folder.metrics")
+tracing = lazy_import("logging_folder.tracing")
+recording = lazy_import("utils.recording")
 
 # --- Tkinter only after dependency probe, so we can show a message box if needed.
 import tkinter as tk
@@ -42,6 +50,19 @@ DATA_DIR = Path(r"C:\Users\bratx\Desktop\MisterKnewData")  # matches your OS age
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 HISTORY_PATH = DATA_DIR / "chat_history.json"
 
+# Startup stages shown in the sidebar, in display order
+STARTUP_STAGES = {
+    "imports": "Модули",
+    "agents": "Агенты",
+    "supervisor": "Супервизор",
+    "workers": "Исполнители",
+    "chrome_key": "Ключ Chrome",
+    "cookies": "Cookies",
+    "browser": "Браузер",
+    "python_pool": "Python",
+    "workspace": "Рабочая папка",
+}
+
 # ----------------------------- Theming --------------------------------- #
 class Theme:
     """Centralized theme palette and dimensions."""
@@ -178,14 +199,19 @@ SUPERVISOR_PROMPT = (
 def build_agents():
     """Create supervisor + specialized workers, apply prompts, and return (operator, [workers])."""
     # tool sets
-    web_tools = [init_browser_session, browser_navigate, browser_get_html_by_part,
-                 browser_use_console, browser_get_all_links, get_working_links, open_link_in_browser]
-    os_tools = [run_shell_command, save_python_code]
+    web_tool_set = [web_tools.init_browser_session, web_tools.browser_navigate, web_tools.browser_get_html_by_part,
+                    web_tools.browser_get_readable_text, web_tools.browser_use_console, web_tools.browser_get_all_links,
+                    web_tools.get_working_links, web_tools.open_link_in_browser]
+    os_tool_set = [win_tools.run_shell_command, win_tools.run_shell_batch, win_tools.make_shell_session_tool(),
+                   win_tools.read_command_output, win_tools.save_python_code, win_tools.run_python,
+                   win_tools.read_file_range, win_tools.search_in_file, win_tools.tail_file, win_tools.file_stat,
+                   win_tools.find_workspace_files]
 
     # workers
+    AiAgentWorker = advance_ai_agent.AiAgentWorker
     supervisor = AiAgentWorker("MisterKnew", tools=[])
-    web_worker = AiAgentWorker("web_worker", tools=web_tools)
-    os_worker = AiAgentWorker("os_worker", tools=os_tools)
+    web_worker = AiAgentWorker("web_worker", tools=web_tool_set)
+    os_worker = AiAgentWorker("os_worker", tools=os_tool_set)
 
     # prompts
     supervisor.change_prompt(SUPERVISOR_PROMPT)
@@ -194,8 +220,14 @@ def build_agents():
 You are an expert agent in operating systems, scripting, and low-level automation.
 - Working directory: "C:\\Users\\bratx\\Desktop\\MisterKnewData"
 - Tools:
-  • run_shell_command — for shell/terminal operations.
+  • run_shell_command — for one-off shell/terminal operations (pass a larger timeout for long builds/installs).
+  • run_shell_batch — to run a known sequence of commands (with parallel independent steps) in one call.
+  • run_in_shell_session — your persistent shell: cd, env vars and virtualenvs persist; prefer it for sequences of commands.
+  • read_command_output — to page through the full output of a truncated command.
   • save_python_code — to create/update Python scripts.
+  • run_python — to run a saved script or a snippet in a warm interpreter; prefer it over `python script.py`.
+  • find_workspace_files — to find files by name or content instead of listing directories.
+  • file_stat, read_file_range, search_in_file, tail_file — to inspect files (logs, CSV) without dumping them via the shell.
 - On each task:
   1) Break into minimal actionable steps using the available tools.
   2) Choose the optimal order and execute.
@@ -213,6 +245,7 @@ You are an expert in search, data extraction, and browser automation.
 - Tools:
   • get_working_links — main link retrieval tool.
   • open_link_in_browser — open final link for the user.
+  • browser_get_readable_text — read page content as compact Markdown (use a max_tokens budget for long pages).
   • Browser tools (browser_navigate, browser_get_html_by_part, etc.) for scraping/automation.
 - For each task:
   1) Analyze requirements and pick the single best, high-quality link (rarely up to two).
@@ -223,7 +256,7 @@ You are an expert in search, data extraction, and browser automation.
 """)
 
     # operator binds agents together
-    operator = Operator([supervisor, web_worker, os_worker])
+    operator = ai_agents_operator.Operator([supervisor, web_worker, os_worker])
     supervisor.add_tool(operator.make_create_agents_for_work())
     return operator, [supervisor, web_worker, os_worker]
 
@@ -413,16 +446,19 @@ class App:
         self.running = True
 
         # Agent state
+        self.startup: Optional[startup.StartupPipeline] = None
         self.operator = None
-        self.supervisor: Optional[AiAgentWorker] = None
-        self.web_worker: Optional[AiAgentWorker] = None
-        self.os_worker: Optional[AiAgentWorker] = None
+        self.supervisor: Optional[advance_ai_agent.AiAgentWorker] = None
+        self.web_worker: Optional[advance_ai_agent.AiAgentWorker] = None
+        self.os_worker: Optional[advance_ai_agent.AiAgentWorker] = None
 
         # History
         self.messages: List[ChatMessage] = load_history()
 
         # UI build
         self._build_ui()
+        self.root.update_idletasks()
+        self.time_to_window = time.perf_counter() - _T0
 
         # Start async bootstrap
         self.loop.create_task(self._bootstrap())
@@ -511,6 +547,18 @@ class App:
                          bg=Theme.surface, fg=Theme.text, relief="flat")
         btn2.pack(fill="x", padx=12, pady=4)
 
+        sep = tk.Frame(parent, height=1, bg=Theme.outline)
+        sep.pack(fill="x", padx=12, pady=12)
+
+        tk.Label(parent, text="Подсистемы", bg=Theme.bg_alt, fg=Theme.text_dim,
+                 font=("Segoe UI Semibold", 10)).pack(anchor="w", padx=12)
+        self.stage_labels = {}
+        for name, title in STARTUP_STAGES.items():
+            label = tk.Label(parent, text=f"○ {title}", bg=Theme.bg_alt, fg=Theme.text_dim,
+                             font=("Segoe UI", 9), anchor="w")
+            label.pack(fill="x", padx=12)
+            self.stage_labels[name] = label
+
         self.status_label = tk.Label(parent, text="Статус: —", bg=Theme.bg_alt, fg=Theme.text_dim,
                                      font=("Segoe UI", 9), justify="left", wraplength=220)
         self.status_label.pack(anchor="w", padx=12, pady=12)
@@ -601,6 +649,9 @@ class App:
             Toast(self.root, "Ссылка не найдена", "error")
 
     def _send_clicked(self):
+        if not self.startup or self.startup.stages["supervisor"].status != startup.DONE:
+            Toast(self.root, "Супервизор ещё не готов", "error")
+            return
         if self.current_task and not self.current_task.done():
             Toast(self.root, "Дождитесь завершения текущего запроса или нажмите Стоп", "error")
             return
@@ -623,34 +674,106 @@ class App:
             self.btn_stop.configure(state="disabled")
 
     # ------------------ Async Tasks ------------------ #
-    async def _bootstrap(self):
-        """Activate agents and run preflight (Chrome key + cookies) without blocking UI."""
-        try:
-            self._status("Инициализация агентов…")
-            operator, workers = build_agents()
-            self.operator = operator
-            self.supervisor, self.web_worker, self.os_worker = workers
-            await self.operator.activate_all()
-
-            self.preflight_label.configure(text="Получение ключа и cookies…")
-            # Run preflight in thread (may do IO)
-            await asyncio.to_thread(extract_and_save_chrome_key)
-            await asyncio.to_thread(extract_cookies_for_playwright)
+    def _on_stage_change(self, stage: startup.Stage):
+        icon, color = {
+            startup.RUNNING: ("◌", Theme.warn),
+            startup.DONE: ("✓", Theme.good),
+            startup.FAILED: ("✗", Theme.bad),
+            startup.SKIPPED: ("–", Theme.text_dim),
+        }.get(stage.status, ("○", Theme.text_dim))
+        took = f" · {stage.duration:.1f}s" if stage.duration is not None else ""
+        self.stage_labels[stage.name].configure(text=f"{icon} {STARTUP_STAGES[stage.name]}{took}", fg=color)
+        if stage.name == "supervisor" and stage.status == startup.DONE:
+            self._status("Супервизор готов — можно отправлять запросы.")
+
+    @staticmethod
+    def _stage_import_modules():
+        for module in (advance_ai_agent, ai_agents_operator, win_tools, web_tools):
+            importlib.import_module(module.__name__)
+
+    def _stage_build_agents(self):
+        # MISTERKNEW_RECORD / MISTERKNEW_REPLAY; must be active before the models are created
+        recording.set_recorder(recording.recorder_from_env())
+        operator, workers = build_agents()
+        self.operator = operator
+        self.supervisor, self.web_worker, self.os_worker = workers
+
+    async def _stage_activate_supervisor(self):
+        if not await self.operator.activate_agent(self.supervisor):
+            raise RuntimeError("supervisor activation failed")
+
+    async def _stage_activate_workers(self):
+        results = await asyncio.gather(*(self.operator.activate_agent(w) for w in (self.web_worker, self.os_worker)))
+        if not all(results):
+            raise RuntimeError("worker activation failed")
+
+    def _stage_chrome_key(self):
+        # key and cookie extraction log their own errors and report failure as False;
+        # a key saved by an earlier run still decrypts the cookies, so only a missing key is fatal
+        if not key_getter.extract_and_save_chrome_key(db_decoder.KEY_PATH) and not os.path.isfile(db_decoder.KEY_PATH):
+            raise RuntimeError("Chrome key extraction failed, see the log")
+
+    def _stage_sync_cookies(self):
+        if not db_decoder.extract_cookies_for_playwright(db_decoder.KEY_PATH):
+            raise RuntimeError("Chrome cookie sync failed, see the log")
+
+    async def _stage_prewarm_browser(self):
+        return await web_tools.init_browser_session.ainvoke({})
 
+    async def _bootstrap(self):
+        """
+        Run startup as a dependency graph without blocking UI: agent activation, Chrome key + cookie
+        preparation and Chromium pre-warm proceed in parallel, and readiness is shown per subsystem.
+        """
+        self._status("Инициализация агентов…")
+        self.preflight_label.configure(text="Запуск подсистем…")
+        metrics.metrics.start_export()
+        self.startup = (
+            startup.StartupPipeline(on_change=self._on_stage_change)
+            .add("imports", self._stage_import_modules, in_thread=True)
+            .add("agents", self._stage_build_agents, depends_on=["imports"])
+            .add("supervisor", self._stage_activate_supervisor, depends_on=["agents"])
+            .add("workers", self._stage_activate_workers, depends_on=["agents"])
+            .add("chrome_key", self._stage_chrome_key, in_thread=True)
+            .add("cookies", self._stage_sync_cookies, depends_on=["chrome_key"], in_thread=True)
+            .add("browser", self._stage_prewarm_browser, depends_on=["imports"])
+            .add("python_pool", lambda: win_tools.python_worker_pool.warm_up(), depends_on=["imports"])
+            .add("workspace", lambda: win_tools.file_index.start(), depends_on=["imports"])
+        )
+        stages = await self.startup.run()
+        failed = [STARTUP_STAGES[name] for name, stage in stages.items()
+                  if stage.status in (startup.FAILED, startup.SKIPPED)]
+        if failed:
+            self.preflight_label.configure(text=f"Готово с ошибками: {', '.join(failed)}")
+            for name, stage in stages.items():
+                if stage.error is not None:
+                    self._add_error_message(f"Bootstrap error ({STARTUP_STAGES[name]}): {stage.error}")
+            Toast(self.root, "Инициализация завершена с ошибками", "error")
+        else:
             self.preflight_label.configure(text="Окружение готово ✓")
-            self._status("Готово.")
             Toast(self.root, "Инициализация завершена", "success")
-        except Exception as e:  # noqa: BLE001
+        if stages["supervisor"].status == startup.DONE:
+            self._status("Готово.")
+        else:
             self._status("Ошибка инициализации")
-            self._add_error_message(f"Bootstrap error: {e}")
-            Toast(self.root, "Ошибка инициализации", "error")
+        if _import_profiler is not None:
+            self._print_startup_profile()
+
+    def _print_startup_profile(self):
+        """Startup report for --profile-startup: time-to-window, stage timings and the slowest imports."""
+        _import_profiler.uninstall()
+        print(f"Time to window: {self.time_to_window:.3f}s", file=sys.stderr)
+        print(self.startup.summary(), file=sys.stderr)
+        print(_import_profiler.report(), file=sys.stderr)
 
     async def _ask_supervisor(self, text: str):
         """Send a user query to the supervisor and stream back the final message."""
         try:
             # Directly ask the supervisor; it orchestrates subagents.
             # silent=True to avoid extra noise, but your worker should still return textual report.
-            resp: str = await self.supervisor.ainvoke(text, silent=True)  # type: ignore[union-attr]
+            # Everything the agents do for this query is recorded as one trace
+            with tracing.trace("user_query", query=text):
+                resp: str = await self.supervisor.ainvoke(text, silent=True)  # type: ignore[union-attr]
             self._add_agent_message(resp)
             if "[FINISHED]" in resp.upper():
                 Toast(self.root, "Задача завершена", "success")
@@ -3,7 +3,7 @@ from ai_agents.advance_ai_agent import AiAgentWorker
 from ai_agents_operator import Operator
 from ai_agents.tools.win_tools import *
 from ai_agents.tools.web_tools import *
-from langchain_openai.chat_models import ChatOpenAI
+from ai_agents.model_registry import get_model
 from utils.llm_utils import run_once_agent
 
 async def main():
@@ -11,7 +11,7 @@ async def main():
         "what on the image?"
     )
 
-    main_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.1)
+    main_model = get_model("gpt-4o-mini", provider="openai", temperature=0.1)
     worker = AiAgentWorker("MisterKnew", tools=[], model=main_model)
 
     worker.add_prompt(system_prompt)
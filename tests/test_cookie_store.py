@@ -0,0 +1,47 @@
+import pytest
+
+from utils.cookie_store import CookieStore
+
+
+def _cookie(name: str, domain: str = ".example.com", value: str = "v") -> dict:
+    return {"name": name, "value": value, "domain": domain, "path": "/", "expires": -1,
+            "httpOnly": False, "secure": True, "sameSite": "Lax"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CookieStore(str(tmp_path / "cookies.sqlite"), legacy_json_path=None)
+    yield store
+    store.close()
+
+
+def test_apply_writes_cookies_and_meta_together(store):
+    store.upsert([_cookie("a"), _cookie("b")])
+    version = store.stamp()
+    store.apply(upsert=[_cookie("c")], delete=[(".example.com", "a", "/")], meta={"sync": {"watermark": 5}})
+    assert sorted(c["name"] for c in store.cookies_for_site("example.com")) == ["b", "c"]
+    assert store.get_meta("sync") == {"watermark": 5}
+    assert store.stamp() != version
+
+
+def test_apply_rolls_back_everything_on_failure(store):
+    store.upsert([_cookie("a")])
+    store.set_meta("sync", {"watermark": 1})
+    with pytest.raises(TypeError):
+        store.apply(upsert=[_cookie("b")], delete=[(".example.com", "a", "/")], meta={"sync": object()})
+    assert [c["name"] for c in store.cookies_for_site("example.com")] == ["a"]
+    assert store.get_meta("sync") == {"watermark": 1}
+
+
+def test_meta_alone_does_not_change_the_stamp(store):
+    store.upsert([_cookie("a")])
+    version = store.stamp()
+    store.apply(meta={"sync": {"watermark": 2}})
+    assert store.stamp() == version
+
+
+def test_replace_drops_cookies_not_in_the_new_set(store):
+    store.upsert([_cookie("a"), _cookie("b", domain="other.org")])
+    store.apply(upsert=[_cookie("c")], replace=True)
+    assert store.sites() == ["example.com"]
+    assert [c["name"] for c in store.cookies_for_site("example.com")] == ["c"]
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from utils import db_decoder
+from utils.db_decoder import open_db_snapshot
+
+ROWS = [(f"host{i}.example.com", f"name{i}") for i in range(5)]
+
+
+@pytest.fixture(params=["delete", "wal"])
+def locked_db(request, tmp_path):
+    """A cookies-like database held under BEGIN EXCLUSIVE by another connection, with an uncommitted row."""
+    path = str(tmp_path / "Cookies")
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute(f"PRAGMA journal_mode={request.param}")
+    con.execute("CREATE TABLE cookies (host_key TEXT, name TEXT)")
+    con.executemany("INSERT INTO cookies VALUES (?, ?)", ROWS)
+    if request.param == "wal":
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    con.execute("BEGIN EXCLUSIVE")
+    con.execute("INSERT INTO cookies VALUES ('uncommitted.example.com', 'x')")
+    yield path
+    con.execute("ROLLBACK")
+    con.close()
+
+
+def _rows(path: str) -> list[tuple]:
+    with open_db_snapshot(path) as con:
+        return con.execute("SELECT host_key, name FROM cookies ORDER BY rowid").fetchall()
+
+
+def _fail_copy(monkeypatch):
+    def copyfile(*args, **kwargs):
+        raise PermissionError("sharing violation")
+    monkeypatch.setattr(db_decoder.shutil, "copyfile", copyfile)
+
+
+def _fail_backup(monkeypatch):
+    connect = sqlite3.connect
+
+    def no_read_only(database, *args, **kwargs):
+        if isinstance(database, str) and database.endswith("?mode=ro"):
+            raise sqlite3.OperationalError("database is locked")
+        return connect(database, *args, **kwargs)
+    monkeypatch.setattr(db_decoder.sqlite3, "connect", no_read_only)
+
+
+def test_copy_snapshot(locked_db):
+    assert _rows(locked_db) == ROWS
+
+
+# Outside WAL mode an exclusive lock blocks every reader, so the backup can only succeed in WAL mode
+@pytest.mark.parametrize("locked_db", ["wal"], indirect=True)
+def test_backup_snapshot(locked_db, monkeypatch):
+    _fail_copy(monkeypatch)
+    assert _rows(locked_db) == ROWS
+
+
+def test_immutable_snapshot(locked_db, monkeypatch):
+    _fail_copy(monkeypatch)
+    _fail_backup(monkeypatch)
+    assert _rows(locked_db) == ROWS
+
+
+def test_all_strategies_failing_raises(tmp_path, monkeypatch):
+    _fail_copy(monkeypatch)
+    with pytest.raises(sqlite3.Error, match="Unable to snapshot"):
+        _rows(str(tmp_path / "missing"))
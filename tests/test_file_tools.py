@@ -0,0 +1,72 @@
+import pytest
+
+from ai_agents.tools.win_tools import file_tools
+
+# 9 characters + newline: with 16-byte chunks most chunks start in the middle of a line
+LINES = [f"line{i:05d}" for i in range(1, 41)]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_tools, "INDEX_CHUNK", 16)
+    file_tools._index_cache.clear()
+    path = tmp_path / "data.txt"
+    path.write_bytes("".join(f"{line}\n" for line in LINES).encode())
+    yield str(path)
+    file_tools._index_cache.clear()
+
+
+def test_line_offset_across_chunk_boundaries(small_chunks):
+    with file_tools.open_mmap(small_chunks) as mm:
+        index = file_tools.LineIndex(mm)
+        for number, line in enumerate(LINES, start=1):
+            offset = index.line_offset(mm, number)
+            assert mm[offset:offset + 9].decode() == line
+            assert index.line_at(mm, offset) == number
+        assert index.line_offset(mm, len(LINES) + 1) is None
+
+
+def test_read_lines_starts_on_line_boundaries(small_chunks):
+    result = file_tools.read_lines(small_chunks, start_line=2, num_lines=4).splitlines()
+    assert result[:4] == [f"{n:>6}| {LINES[n - 1]}" for n in range(2, 6)]
+
+
+def test_search_context_lines_are_whole_lines(small_chunks):
+    result = file_tools.search(small_chunks, "line00020", context_lines=2).splitlines()
+    assert result[:5] == [f"{'>' if n == 20 else ' '}{n:>5}| {LINES[n - 1]}" for n in range(18, 23)]
+
+
+@pytest.fixture
+def cyrillic_file(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("ошибка: диск\nINFO ok\nОШИБКА: сеть\nпривет мир\n", encoding="utf-8")
+    return str(path)
+
+
+def _marked(result: str) -> list[int]:
+    return [int(line[1:6]) for line in result.splitlines() if line.startswith(">")]
+
+
+def test_search_ignore_case_beyond_ascii(cyrillic_file):
+    assert _marked(file_tools.search(cyrillic_file, "ошибка", context_lines=0, ignore_case=True)) == [1, 3]
+    assert _marked(file_tools.search(cyrillic_file, "ошибка", context_lines=0)) == [1]
+
+
+def test_search_regex_matches_characters(cyrillic_file):
+    assert _marked(file_tools.search(cyrillic_file, r"^[а-я]+:", context_lines=0)) == [1]
+    assert _marked(file_tools.search(cyrillic_file, r"\w+ мир", context_lines=0)) == [4]
+    assert _marked(file_tools.search(cyrillic_file, r"^.{6}:", context_lines=0)) == [1, 3]
+
+
+def test_search_counts_lines_across_chunks(small_chunks, monkeypatch):
+    monkeypatch.setattr(file_tools, "SEARCH_CHUNK", 16)
+    result = file_tools.search(small_chunks, r"line0001\d|line0003[05]", context_lines=0, max_matches=11)
+    assert _marked(result) == list(range(10, 20)) + [30]
+    assert "more exist" in result
+    assert _marked(file_tools.search(small_chunks, "line", context_lines=0, max_matches=200)) == list(range(1, 41))
+
+
+def test_decode_tells_cut_characters_from_legacy_encodings(monkeypatch):
+    monkeypatch.setattr(file_tools.locale, "getpreferredencoding", lambda do_setlocale=True: "cp1251")
+    assert file_tools.decode("привет".encode()[1:-1]) == "�риве�"
+    assert file_tools.decode("привет".encode("cp1251")) == "привет"
@@ -0,0 +1,35 @@
+import pytest
+
+from ai_agents.tools.web_tools.link_engine import LinkIndex
+
+LINKS = [(f"https://example.com/docs/{i}", f"Doc {i}") for i in range(10)]
+
+
+def test_cursor_pages_through_all_links():
+    index = LinkIndex(1, LINKS)
+    first = index.page(limit=4)
+    second = index.page(first["next_cursor"], limit=4)
+    third = index.page(second["next_cursor"], limit=4)
+    urls = [link["url"] for page in (first, second, third) for link in page["links"]]
+    assert urls == [url for url, _ in LINKS]
+    assert third["next_cursor"] == ""
+
+
+def test_cursor_from_another_navigation_is_rejected():
+    cursor = LinkIndex(1, LINKS).page(limit=4)["next_cursor"]
+    with pytest.raises(ValueError, match="previous page"):
+        LinkIndex(2, LINKS).page(cursor, limit=4)
+
+
+def test_cursor_from_before_a_rescan_is_rejected():
+    cursor = LinkIndex(1, LINKS).page(limit=4)["next_cursor"]
+    rescanned = LinkIndex(1, [("https://example.com/new", "New")] + LINKS)
+    with pytest.raises(ValueError, match="rescanned"):
+        rescanned.page(cursor, limit=4)
+
+
+def test_cursor_for_other_filters_is_rejected():
+    index = LinkIndex(1, LINKS)
+    cursor = index.page(limit=4)["next_cursor"]
+    with pytest.raises(ValueError, match="different filters"):
+        index.page(cursor, limit=4, text="doc")
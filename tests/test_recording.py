@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from utils import ToolError, recording
+from utils.recording import RecordedError, Recorder, RecordStore
+
+
+class CustomError(Exception):
+    pass
+
+
+def flaky(x):
+    if x == "value":
+        raise ValueError("bad value")
+    if x == "custom":
+        raise CustomError("custom failure")
+    if x == "tool_error":
+        return ToolError("Error: not found")
+    return {"echo": x}
+
+
+async def aflaky(x):
+    return flaky(x)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordStore(str(tmp_path / "runs.sqlite"))
+    yield store
+    store.close()
+    recording.set_recorder(None)
+
+
+def _record(store, calls):
+    recording.set_recorder(Recorder(store, recording.RECORD, "run"))
+    for x in calls:
+        try:
+            recording.call_tool("flaky", flaky, (x,), {})
+        except Exception:
+            pass
+    recording.set_recorder(Recorder(store, recording.REPLAY, "run"))
+
+
+def test_no_recorder_is_active_on_import():
+    assert recording.recorder is None
+
+
+def test_results_and_tool_errors_replay(store):
+    _record(store, ["a", "tool_error"])
+    assert recording.call_tool("flaky", flaky, ("a",), {}) == {"echo": "a"}
+    result = recording.call_tool("flaky", flaky, ("tool_error",), {})
+    assert isinstance(result, ToolError) and result == "Error: not found"
+
+
+def test_exceptions_are_raised_again_on_replay(store):
+    _record(store, ["value", "custom"])
+    with pytest.raises(ValueError, match="bad value"):
+        recording.call_tool("flaky", flaky, ("value",), {})
+    with pytest.raises(RecordedError, match="CustomError: custom failure"):
+        recording.call_tool("flaky", flaky, ("custom",), {})
+    assert recording.recorder.remaining() == 0
+
+
+def test_async_exceptions_are_recorded(store):
+    recording.set_recorder(Recorder(store, recording.RECORD, "run"))
+    with pytest.raises(ValueError):
+        asyncio.run(recording.acall_tool("aflaky", aflaky, ("value",), {}))
+    recording.set_recorder(Recorder(store, recording.REPLAY, "run"))
+    with pytest.raises(ValueError, match="bad value"):
+        asyncio.run(recording.acall_tool("aflaky", aflaky, ("value",), {}))
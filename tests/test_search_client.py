@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ai_agents.tools.web_tools.search_client import AsyncSearchClient, parse_result_links
+from benchmarks.fixtures import SEARCH_RESULTS, FixtureServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FixtureServer() as server:
+        yield server
+
+
+def test_parse_result_links_on_fixture_page(server):
+    html = httpx.post(f"{server.url}/html/", data={"q": "python"}).text
+    links = parse_result_links(html)
+    assert links == [f"{server.url}/page/result-{i}?q=python" for i in range(SEARCH_RESULTS)]
+
+
+def test_search_returns_links_in_page_order(server):
+    async def scenario():
+        async with AsyncSearchClient(search_url=f"{server.url}/html/") as client:
+            return await client.search("agents")
+
+    links = asyncio.run(scenario())
+    assert links[0] == f"{server.url}/page/result-0?q=agents"
+    assert len(links) == SEARCH_RESULTS
+
+
+def test_search_many_interleaves_and_deduplicates(server):
+    async def scenario():
+        async with AsyncSearchClient(search_url=f"{server.url}/html/", per_host_limit=1) as client:
+            return await client.search_many(["a", "b", "a", " "])
+
+    links = asyncio.run(scenario())
+    assert links[:4] == [f"{server.url}/page/result-0?q=a", f"{server.url}/page/result-0?q=b",
+                         f"{server.url}/page/result-1?q=a", f"{server.url}/page/result-1?q=b"]
+    assert len(links) == len(set(links)) == 2 * SEARCH_RESULTS
+
+
+def test_search_many_raises_when_every_query_fails():
+    async def scenario():
+        async with AsyncSearchClient(search_url="http://127.0.0.1:9/html/", timeout=1.0) as client:
+            await client.search_many(["a"])
+
+    with pytest.raises(httpx.HTTPError):
+        asyncio.run(scenario())
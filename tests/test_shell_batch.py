@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ai_agents.tools.win_tools.shell_batch import parse_steps, run_batch
+
+
+class FakeEngine:
+    """Runs nothing: 'fail' exits with 1, 'boom' raises, anything else succeeds after a short delay."""
+
+    def __init__(self):
+        self.finished = []
+
+    async def run(self, command, timeout=None):
+        if command == "boom":
+            raise OSError("cannot start process")
+        await asyncio.sleep(0.05)
+        self.finished.append(command)
+        return SimpleNamespace(returncode=1 if command == "fail" else 0, timed_out=False, duration=0.05,
+                               output=command, truncated=False, output_path="", command_id="")
+
+
+def test_id_zero_is_kept():
+    steps = parse_steps([{"id": 0, "command": "a"}, {"command": "b", "after": [0]}])
+    assert [step.id for step in steps] == ["0", "2"]
+    assert steps[1].after == ("0",)
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        parse_steps([{"id": "a", "command": "x", "after": ["b"]}, {"id": "b", "command": "y", "after": ["a"]}])
+    with pytest.raises(ValueError, match="unknown step"):
+        parse_steps([{"id": "a", "command": "x", "after": ["missing"]}])
+
+
+def test_engine_error_fails_only_its_step():
+    engine = FakeEngine()
+    steps = parse_steps([
+        {"id": "a", "command": "boom", "after": []},
+        {"id": "b", "command": "slow", "after": []},
+        {"id": "c", "command": "next", "after": ["a"]},
+        {"id": "d", "command": "fail", "after": []},
+    ])
+    report = asyncio.run(run_batch(engine, steps))
+    statuses = {step["id"]: step["status"] for step in report["steps"]}
+    assert statuses == {"a": "error", "b": "ok", "c": "skipped", "d": "failed"}
+    assert "cannot start process" in report["steps"][0]["error"]
+    assert sorted(engine.finished) == ["fail", "slow"]
+    assert not report["ok"]
@@ -0,0 +1,23 @@
+import logging
+
+import utils
+
+
+def test_trace_level_falls_back_on_unknown_names(monkeypatch):
+    monkeypatch.setenv("MISTERKNEW_TRACE_LEVEL", "verbose")
+    assert utils._env_level("MISTERKNEW_TRACE_LEVEL", logging.DEBUG) == logging.DEBUG
+    monkeypatch.setenv("MISTERKNEW_TRACE_LEVEL", "info")
+    assert utils._env_level("MISTERKNEW_TRACE_LEVEL", logging.DEBUG) == logging.INFO
+    monkeypatch.setenv("MISTERKNEW_TRACE_LEVEL", "25")
+    assert utils._env_level("MISTERKNEW_TRACE_LEVEL", logging.DEBUG) == 25
+
+
+def test_sample_rates_skip_malformed_entries(monkeypatch):
+    monkeypatch.setenv("MISTERKNEW_TRACE_SAMPLE", "a=0.5,b=oops,c,=0.1,d=2,e=0")
+    rates = utils._env_sample_rates("MISTERKNEW_TRACE_SAMPLE", {"a": 1.0, "x": 0.2})
+    assert rates == {"a": 0.5, "x": 0.2, "e": 0.0}
+
+
+def test_max_chars_falls_back_on_non_integers(monkeypatch):
+    monkeypatch.setenv("MISTERKNEW_TRACE_MAX_CHARS", "lots")
+    assert utils._env_int("MISTERKNEW_TRACE_MAX_CHARS", 300) == 300
@@ -0,0 +1,22 @@
+import pytest
+
+from ai_agents.tools.win_tools import _validate_python_code
+
+
+@pytest.mark.parametrize("code", [
+    "open('/etc/passwd').read()",
+    "import shutil; shutil.rmtree('../../outside')",
+    "from pathlib import Path\nPath('data/../../secret.txt').write_text('x')",
+])
+def test_python_code_with_paths_outside_base_dir_is_rejected(code):
+    assert _validate_python_code(code).startswith("ERROR:")
+
+
+@pytest.mark.parametrize("code", [
+    "print(1 / 2)",
+    "open('data/report.csv').read()",
+    "import requests; requests.get('https://example.com/a/b')",
+    "def f(:",  # a syntax error is reported by the interpreter
+])
+def test_python_code_inside_base_dir_is_allowed(code):
+    assert _validate_python_code(code) is None
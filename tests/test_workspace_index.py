@@ -0,0 +1,34 @@
+import locale
+
+from ai_agents.tools.win_tools import workspace_index
+from ai_agents.tools.win_tools.workspace_index import WorkspaceIndex
+
+
+def _paths(result: dict) -> list[str]:
+    return sorted(entry["path"] for entry in result["files"])
+
+
+def test_contains_is_case_insensitive_for_cyrillic(tmp_path):
+    (tmp_path / "notes.txt").write_text("Отчёт по ПРОЕКТУ готов", encoding="utf-8")
+    (tmp_path / "other.txt").write_text("nothing here", encoding="utf-8")
+    index = WorkspaceIndex(str(tmp_path))
+    index.scan()
+    assert _paths(index.find(contains="проекту")) == ["notes.txt"]
+    assert _paths(index.find(contains="ОТЧЁТ")) == ["notes.txt"]
+    assert _paths(index.find(contains="Straße")) == []
+
+
+def test_contains_finds_matches_across_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace_index, "CONTAINS_CHUNK", 8)
+    (tmp_path / "big.txt").write_text("x" * 5 + "Привет, Мир" + "y" * 20, encoding="utf-8")
+    index = WorkspaceIndex(str(tmp_path))
+    index.scan()
+    assert _paths(index.find(contains="привет, мир")) == ["big.txt"]
+
+
+def test_contains_finds_legacy_encoded_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(locale, "getpreferredencoding", lambda do_setlocale=True: "cp1251")
+    (tmp_path / "report.txt").write_bytes("Отчёт по проекту готов".encode("cp1251"))
+    index = WorkspaceIndex(str(tmp_path))
+    index.scan()
+    assert _paths(index.find(contains="ПРОЕКТУ")) == ["report.txt"]
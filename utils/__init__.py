@@ -1,26 +1,171 @@
 import functools
 import inspect
+import logging
+import os
+import random
+import time
 from typing import Annotated
 
-def log_return(func):
+from logging_folder import Deferred, get_logger
+from logging_folder.metrics import metrics
+from logging_folder.tracing import span
+from utils import recording
+
+_trace_log = get_logger("tools")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        _trace_log.warning("%s=%r is not an integer, using %s", name, value, default)
+        return default
+
+
+def _env_level(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    # getLevelName maps unknown names to the string "Level <name>" instead of failing
+    level = int(value) if value.isdigit() else logging.getLevelName(value.upper())
+    if not isinstance(level, int):
+        _trace_log.warning("%s=%r is not a logging level, using %s", name, value, logging.getLevelName(default))
+        return default
+    return level
+
+
+def _env_sample_rates(name: str, rates: dict[str, float]) -> dict[str, float]:
+    """``rates`` updated from a "tool=rate,tool=rate" variable; malformed entries are skipped."""
+    for item in filter(None, os.environ.get(name, "").split(",")):
+        tool, _, rate = item.partition("=")
+        try:
+            value = float(rate)
+        except ValueError:
+            value = -1.0
+        if not tool.strip() or not 0 <= value <= 1:
+            _trace_log.warning("Ignoring %s entry %r: expected tool=rate with a rate from 0 to 1", name, item)
+            continue
+        rates[tool.strip()] = value
+    return rates
+
+
+# Tool results longer than this are truncated in traces
+TRACE_MAX_CHARS = _env_int("MISTERKNEW_TRACE_MAX_CHARS", 300)
+TRACE_LEVEL = _env_level("MISTERKNEW_TRACE_LEVEL", logging.DEBUG)
+# Share of calls traced per tool; tools that return whole pages are sampled by default
+TRACE_SAMPLE_RATES = _env_sample_rates("MISTERKNEW_TRACE_SAMPLE", {
+    "browser_get_html_by_part": 0.2,
+    "browser_get_readable_text": 0.2,
+    "browser_get_all_links": 0.2,
+})
+
+
+class _TruncatedRepr(Deferred):
+    """
+    A tool result clipped to max_chars plus its full size. Strings are immutable and formatted only
+    when the record is written; any other result may change after the call, so its repr is taken now.
     """
-    Decorator that logs the return value of any function to the console.
+
+    def __init__(self, value, max_chars: int):
+        self.max_chars = max_chars
+        if isinstance(value, str):
+            self.value, self.text = str(value), None
+        else:
+            self.value, self.text = None, repr(value)
+
+    def __str__(self):
+        if self.text is None:
+            if len(self.value) <= self.max_chars:
+                return repr(self.value)
+            size = len(self.value.encode("utf-8", errors="replace"))
+            return f"{self.value[:self.max_chars]!r}… [{size} bytes]"
+        if len(self.text) <= self.max_chars:
+            return self.text
+        return f"{self.text[:self.max_chars]}… [{len(self.text.encode('utf-8', errors='replace'))} bytes]"
+
+
+class ToolError(str):
+    """
+    A tool result that reports a failure. Tools hand the message to the model instead of raising;
+    returning it as ToolError marks the call as failed for tracing and ``tool_errors_total``.
+    """
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, ToolError)
+
+
+def _trace(name: str, result, elapsed: float, tool_span, level: int, max_chars: int, sample_rate: float):
+    metrics.histogram("tool_seconds", tool=name).observe(elapsed)
+    if _is_error(result):
+        metrics.counter("tool_errors_total", tool=name).inc()
+        tool_span.status = "error"
+        tool_span.set(error=str(result))
+        level = max(level, logging.WARNING)
+    elif not _trace_log.logger.isEnabledFor(level) or (sample_rate < 1 and random.random() >= sample_rate):
+        return
+    _trace_log.log(level, "%s returned in %.3fs: %s", name, elapsed, _TruncatedRepr(result, max_chars))
+
+
+def trace_tool(func=None, *, level: int | None = None, max_chars: int | None = None, sample_rate: float | None = None):
+    """
+    Decorator that traces a tool's return value and duration to the "tools" logger, records
+    the duration in the ``tool_seconds`` histogram and runs the call in a tracing span (and
+    through ``utils.recording`` while a run is recorded or replayed).
+
+    String results are formatted lazily in the logging thread and truncated to ``max_chars``
+    (with its full size in bytes). Calls are skipped unless ``level`` is enabled, and only a
+    ``sample_rate`` share of them is traced (``TRACE_SAMPLE_RATES`` / MISTERKNEW_TRACE_SAMPLE
+    per tool); ToolError results are always traced at WARNING, raised exceptions at ERROR.
     Supports both synchronous and asynchronous functions.
     """
+    if func is None:
+        return functools.partial(trace_tool, level=level, max_chars=max_chars, sample_rate=sample_rate)
+
+    name = func.__name__
+
+    def settings():
+        rate = sample_rate if sample_rate is not None else TRACE_SAMPLE_RATES.get(name, 1.0)
+        return (level if level is not None else TRACE_LEVEL,
+                max_chars if max_chars is not None else TRACE_MAX_CHARS, rate)
+
+    def failed(ex: BaseException, elapsed: float):
+        metrics.histogram("tool_seconds", tool=name).observe(elapsed)
+        metrics.counter("tool_errors_total", tool=name).inc()
+        _trace_log.error("%s raised after %.3fs: %r", name, elapsed, ex)
+
     if inspect.iscoroutinefunction(func):
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
-            result = await func(*args, **kwargs)
-            print(f"[log_return] {func.__name__} returned: {repr(result)}")
-            return result
+            with span(name, kind="tool", tool=name) as tool_span:
+                start = time.perf_counter()
+                try:
+                    result = await recording.acall_tool(name, func, args, kwargs)
+                except Exception as ex:
+                    failed(ex, time.perf_counter() - start)
+                    raise
+                _trace(name, result, time.perf_counter() - start, tool_span, *settings())
+                return result
 
         return async_wrapper
     else:
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
-            result = func(*args, **kwargs)
-            print(f"[log_return] {func.__name__} returned: {repr(result)}")
-            return result
+            with span(name, kind="tool", tool=name) as tool_span:
+                start = time.perf_counter()
+                try:
+                    result = recording.call_tool(name, func, args, kwargs)
+                except Exception as ex:
+                    failed(ex, time.perf_counter() - start)
+                    raise
+                _trace(name, result, time.perf_counter() - start, tool_span, *settings())
+                return result
 
         return sync_wrapper
 
+
+# Former name of trace_tool, used by the tool modules
+log_return = trace_tool
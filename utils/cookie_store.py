@@ -0,0 +1,227 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlsplit
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+WEB_TOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_agents", "tools", "web_tools")
+COOKIES_DB_PATH = os.path.join(WEB_TOOLS_DIR, "cookies.sqlite")
+LEGACY_COOKIES_PATH = os.path.join(WEB_TOOLS_DIR, "playwright_cookies.json")
+
+# Second-level labels under which sites register a third level (example.co.uk, example.msk.ru)
+SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "gov", "edu", "ac", "or", "ne", "msk", "spb"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cookies (
+    host TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    site TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    http_only INTEGER NOT NULL,
+    secure INTEGER NOT NULL,
+    same_site TEXT NOT NULL,
+    PRIMARY KEY (host, name, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cookies_site ON cookies (site);
+CREATE INDEX IF NOT EXISTS cookies_expires ON cookies (expires);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+_COLUMNS = "host, name, path, value, expires, http_only, secure, same_site"
+
+
+def registrable_domain(host: str) -> str:
+    """
+    Approximates the registrable domain (eTLD+1) of a host or cookie domain,
+    e.g. ``.mail.google.com`` -> ``google.com``, ``www.bbc.co.uk`` -> ``bbc.co.uk``.
+    """
+    labels = [label for label in host.lower().strip(".").split(".") if label]
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def url_site(url: str) -> str:
+    return registrable_domain(urlsplit(url).hostname or "")
+
+
+def _to_row(cookie: dict) -> tuple:
+    domain = cookie["domain"]
+    return (
+        domain, cookie["name"], cookie.get("path") or "/", registrable_domain(domain), cookie["value"],
+        cookie.get("expires", -1), int(bool(cookie.get("httpOnly"))), int(bool(cookie.get("secure"))),
+        cookie.get("sameSite", "Lax"),
+    )
+
+
+def _to_cookie(row) -> dict:
+    return {
+        "name": row[1],
+        "value": row[3],
+        "domain": row[0],
+        "path": row[2],
+        "expires": row[4],
+        "httpOnly": bool(row[5]),
+        "secure": bool(row[6]),
+        "sameSite": row[7],
+    }
+
+
+class CookieStore:
+    """
+    Playwright cookies in an SQLite file keyed by (host, name, path) and indexed by
+    registrable domain and expiry.
+
+    The database is opened on first use. Lookups read only the rows of one site, writes are
+    partial and atomic, and expired cookies are dropped on every write. ``stamp()`` returns a
+    version number bumped by every write that changed something, so readers can tell whether
+    the jar changed without reading it. A legacy ``playwright_cookies.json`` is imported once.
+    """
+
+    def __init__(self, path: str = COOKIES_DB_PATH, legacy_json_path: str | None = LEGACY_COOKIES_PATH):
+        self.path = path
+        self.legacy_json_path = legacy_json_path
+        self._con: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            with self._lock:
+                if self._con is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    con = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.execute("PRAGMA synchronous=NORMAL")
+                    con.executescript(SCHEMA)
+                    self._con = con
+                    self._import_legacy_json()
+        return self._con
+
+    def _import_legacy_json(self):
+        if not self.legacy_json_path or self.get_meta("legacy_imported") or not os.path.isfile(self.legacy_json_path):
+            return
+        try:
+            with open(self.legacy_json_path, encoding="utf-8") as f:
+                cookies = json.load(f)
+            self.upsert(cookies)
+            log.info(f"Imported {len(cookies)} cookies from {self.legacy_json_path}")
+        except Exception as ex:
+            log.error(f"Failed to import cookies from {self.legacy_json_path}: {ex!r}")
+        self.set_meta("legacy_imported", "1")
+
+    def close(self):
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        with self._lock:
+            self._connect().execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def stamp(self) -> str:
+        return str(self.get_meta("version", 0))
+
+    def _write(self, statements, meta: dict | None = None):
+        """
+        Runs ``statements(con)`` in one transaction, drops expired cookies and bumps the version if
+        anything changed. ``meta`` keys are written in the same transaction and do not bump the version.
+        """
+        with self._lock:
+            con = self._connect()
+            before = con.total_changes
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                statements(con)
+                con.execute("DELETE FROM cookies WHERE expires != -1 AND expires <= ?", (time.time(),))
+                changed = con.total_changes - before
+                if changed:
+                    version = con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                    con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                                (json.dumps(json.loads(version[0]) + 1 if version else 1),))
+                con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                [(key, json.dumps(value)) for key, value in (meta or {}).items()])
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        return changed
+
+    def apply(self, upsert: Iterable[dict] = (), delete: Iterable[tuple[str, str, str]] = (),
+              meta: dict | None = None, replace: bool = False) -> int:
+        """
+        Deletes cookies by (domain, name, path), upserts cookies and writes ``meta`` keys in one
+        transaction, so a failure leaves the store as it was. With ``replace`` every stored cookie
+        is dropped first and ``delete`` is not needed.
+        """
+        rows = [_to_row(cookie) for cookie in upsert]
+        keys = list(delete)
+
+        def statements(con):
+            if replace:
+                con.execute("DELETE FROM cookies")
+            con.executemany("DELETE FROM cookies WHERE host = ? AND name = ? AND path = ?", keys)
+            con.executemany(
+                f"INSERT OR REPLACE INTO cookies (host, name, path, site, value, expires, http_only, secure, same_site) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        return self._write(statements, meta)
+
+    def upsert(self, cookies: Iterable[dict]) -> int:
+        return self.apply(upsert=cookies)
+
+    def delete(self, keys: Iterable[tuple[str, str, str]]) -> int:
+        """Deletes cookies by (domain, name, path)."""
+        return self.apply(delete=keys)
+
+    def replace_all(self, cookies: Iterable[dict]) -> int:
+        return self.apply(upsert=cookies, replace=True)
+
+    def cookies_for_site(self, site: str) -> list[dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_COLUMNS} FROM cookies WHERE site = ? AND (expires = -1 OR expires > ?)",
+                (site, time.time()),
+            ).fetchall()
+        return [_to_cookie(row) for row in rows]
+
+    def cookies_for_url(self, url: str) -> list[dict]:
+        return self.cookies_for_site(url_site(url))
+
+    def sites(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT DISTINCT site FROM cookies")]
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT count(*) FROM cookies").fetchone()[0]
+
+    def export_playwright(self, output_path: str | None = None) -> list[dict]:
+        """Returns all live cookies in Playwright's format, optionally also writing them to a JSON file."""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_COLUMNS} FROM cookies WHERE expires = -1 OR expires > ?", (time.time(),)
+            ).fetchall()
+        cookies = [_to_cookie(row) for row in rows]
+        if output_path:
+            tmp_path = f"{output_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cookies, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, output_path)
+        return cookies
+
+
+cookie_store = CookieStore()
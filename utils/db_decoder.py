@@ -1,64 +1,119 @@
 import os
 import sqlite3
 import binascii
-import json
-import subprocess
-from datetime import datetime
+import contextlib
+import shutil
+import tempfile
+import time
 from Crypto.Cipher import AES
 from logging_folder import get_logger
+from utils.cookie_store import CookieStore, cookie_store
 
 log = get_logger(__name__)
 
-def kill_chrome_processes():
-    try:
-        log.info("Terminating all chrome.exe processes...")
-        subprocess.run(
-            ["taskkill", "/F", "/IM", "chrome.exe"],
-            check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        log.info("All chrome.exe processes have been terminated.")
-    except Exception as e:
-        log.error(f"Error terminating Chrome processes: {e!r}")
+# written by key_getter.extract_and_save_chrome_key
+KEY_PATH = "ai_agents\\tools\\web_tools\\key"
+
+def _connect_snapshot(db_path: str, tmp_dir: str, attempts: int) -> sqlite3.Connection:
+    errors = []
+    snapshot_path = os.path.join(tmp_dir, os.path.basename(db_path))
+    for attempt in range(attempts):
+        try:
+            shutil.copyfile(db_path, snapshot_path)
+            for suffix in ("-wal", "-journal"):
+                if os.path.exists(db_path + suffix):
+                    shutil.copyfile(db_path + suffix, snapshot_path + suffix)
+            con = sqlite3.connect(snapshot_path)
+            if con.execute("PRAGMA quick_check").fetchone()[0] == "ok":
+                return con
+            con.close()
+            errors.append(f"copy attempt {attempt + 1}: quick_check failed")
+        except (OSError, sqlite3.Error) as e:
+            errors.append(f"copy attempt {attempt + 1}: {e!r}")
+            break
+        for suffix in ("", "-wal", "-journal"):
+            if os.path.exists(snapshot_path + suffix):
+                os.remove(snapshot_path + suffix)
 
-def open_chrome():
     try:
-        chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        if not os.path.exists(chrome_path):
-            chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
-        if os.path.exists(chrome_path):
-            subprocess.Popen([chrome_path])
-            log.info("Chrome restarted.")
-        else:
-            log.warning("chrome.exe not found for auto-restart.")
-    except Exception as e:
-        log.error(f"Error starting Chrome: {e!r}")
+        source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            con = sqlite3.connect(":memory:")
+            source.backup(con)
+            return con
+        finally:
+            source.close()
+    except sqlite3.Error as e:
+        errors.append(f"backup: {e!r}")
 
-def is_file_modified_today(path: str) -> bool:
     try:
-        if not os.path.isfile(path):
-            return False
-        mtime = os.path.getmtime(path)
-        file_date = datetime.fromtimestamp(mtime).date()
-        return file_date == datetime.now().date()
-    except Exception as e:
-        log.error(f"Error checking file modification date: {e!r}")
-        return False
+        con = sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True)
+        con.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        return con
+    except sqlite3.Error as e:
+        errors.append(f"immutable: {e!r}")
+
+    raise sqlite3.OperationalError(f"Unable to snapshot {db_path}: " + "; ".join(errors))
+
+
+@contextlib.contextmanager
+def open_db_snapshot(db_path: str, attempts: int = 3):
+    """
+    Opens a private, read-only snapshot of an SQLite database that another process
+    (Chrome) may hold open or locked, without touching that process.
+
+    Strategies, in order:
+      1. copy the database with its -wal/-journal files into a temp dir and open the copy,
+         so the live browser's pending WAL pages are included;
+      2. SQLite online backup from a read-only connection into memory;
+      3. open the file with ``immutable=1``, which skips locking entirely.
+    A copy that fails ``PRAGMA quick_check`` (torn by a concurrent write) is retried.
+    Raises sqlite3.Error if no strategy works.
+    """
+    with tempfile.TemporaryDirectory(prefix="mk_cookies_") as tmp_dir:
+        con = _connect_snapshot(db_path, tmp_dir, attempts)
+        try:
+            yield con
+        finally:
+            con.close()
+
+
+def _domain_filter_sql(domains) -> tuple[str, list]:
+    """SQL condition matching cookies of the given domains and their subdomains."""
+    clauses, params = [], []
+    for domain in domains:
+        domain = domain.strip().lstrip(".").lower()
+        if domain:
+            clauses.append("(host_key = ? OR host_key = ? OR host_key LIKE ?)")
+            params.extend([domain, f".{domain}", f"%.{domain}"])
+    return " OR ".join(clauses), params
+
 
 def extract_cookies_for_playwright(
-    key_path="ai_agents\\tools\\web_tools\\key",
-    output_path="ai_agents\\tools\\web_tools\\playwright_cookies.json",
+    key_path=KEY_PATH,
+    store: CookieStore | None = None,
     chrome_profile="Default",
-    allow_retry=True
-):
-    # Step 1: Check if cookies file is present and updated today
-    if is_file_modified_today(output_path):
-        log.info(f"{output_path} is up-to-date. Skipping extraction.")
-        return
-
+    domains=None,
+    full_sync=False,
+    full_sync_interval=24 * 3600,
+) -> bool:
+    """
+    Syncs Chrome cookies into the Playwright cookie store.
+
+    Only rows whose ``last_update_utc`` is newer than the watermark kept in the store's metadata
+    are read and decrypted, and they are upserted into the store. Chrome deletes rows
+    instead of marking them, so a full sync (which also drops removed cookies) runs when there is
+    no watermark, the domain set changed, ``full_sync`` is set, or the last full sync is older
+    than ``full_sync_interval`` seconds.
+
+    :param store: cookie store to sync into; defaults to the shared store read by the web tools
+    :param domains: optional list of domains (subdomains included) to extract; None extracts all
+    :return: False if the cookies could not be synced (the store then keeps its previous cookies)
+    """
     user_profile = os.environ.get("USERPROFILE")
     if not user_profile:
         log.error("USERPROFILE environment variable not found.")
-        return
+        return False
 
     chrome_cookie_path = os.path.join(
         user_profile,
@@ -67,18 +122,37 @@ def extract_cookies_for_playwright(
 
     if not os.path.isfile(key_path):
         log.error(f"Key file not found: {key_path}")
-        return
+        return False
 
     if not os.path.isfile(chrome_cookie_path):
         log.error(f"Chrome cookie DB not found: {chrome_cookie_path}")
-        return
+        return False
+
+    store = store or cookie_store
+    state = store.get_meta("chrome_sync", {})
+    domain_list = sorted({d.strip().lstrip(".").lower() for d in domains or [] if d.strip()})
+    full_sync = (
+        full_sync
+        or "last_update_utc" not in state
+        or state.get("domains", []) != domain_list
+        or time.time() - state.get("last_full_sync", 0) > full_sync_interval
+    )
+    db_mtime_ns = max(
+        (os.stat(p).st_mtime_ns for p in (chrome_cookie_path, chrome_cookie_path + "-wal", chrome_cookie_path + "-journal")
+         if os.path.exists(p)),
+        default=0,
+    )
+    if not full_sync and db_mtime_ns == state.get("db_mtime_ns"):
+        log.info("Cookie store is up-to-date. Skipping extraction.")
+        return True
+    watermark = 0 if full_sync else state["last_update_utc"]
 
     try:
         with open(key_path, "rb") as f:
             key = binascii.a2b_base64(f.read().strip())
     except Exception as e:
         log.error(f"Failed to read key: {e!r}")
-        return
+        return False
 
     def decrypt_cookie_v20(encrypted_value: bytes) -> str:
         if not encrypted_value.startswith(b'v20'):
@@ -113,63 +187,47 @@ def extract_cookies_for_playwright(
             log.error(f"Failed to convert cookie {row[1]} ({row[0]}): {e!r}")
             return None
 
-    retry_attempted = False
-    chrome_restarted = False
-
-    while True:
-        try:
-            db_uri = f"file:{chrome_cookie_path}?mode=ro"
-            con = sqlite3.connect(db_uri, uri=True)
-            cur = con.cursor()
-            cur.execute("""
-                SELECT host_key, name, encrypted_value, path, expires_utc, is_secure, is_httponly, samesite
-                FROM cookies
-            """)
-            rows = cur.fetchall()
-            con.close()
-            break  # success
-        except sqlite3.OperationalError as e:
-            log.error(f"Error with cookies DB: {e!r}")
-            if "unable to open database file" in str(e) and allow_retry and not retry_attempted:
-                log.warning("[ACTION REQUIRED] Enter 'get' to kill all Chrome processes and retry, or 'pass' to skip this step:")
-                resp = input("[get/pass]> ").strip().lower()
-                if resp == "get":
-                    kill_chrome_processes()
-                    retry_attempted = True
-                    chrome_restarted = True
-                    continue
-                elif resp == "pass":
-                    log.warning("Cookies not saved, skipping.")
-                    return
-                else:
-                    log.warning("Invalid input, try again.")
-                    continue
-            else:
-                log.error("Unable to get cookies, unexpected error.")
-                return
-        except Exception as e:
-            log.error(f"Unexpected error with DB: {e!r}")
-            return
+    try:
+        with open_db_snapshot(chrome_cookie_path) as con:
+            domain_sql, domain_params = _domain_filter_sql(domain_list)
+            where = "last_update_utc > ?" + (f" AND ({domain_sql})" if domain_sql else "")
+            rows = con.execute(
+                "SELECT host_key, name, encrypted_value, path, expires_utc, is_secure, is_httponly, samesite, "
+                f"last_update_utc FROM cookies WHERE {where}",
+                [watermark, *domain_params],
+            ).fetchall()
+    except sqlite3.Error as e:
+        log.error(f"Unable to read cookies DB, keeping existing cookies: {e!r}")
+        return False
+    except Exception as e:
+        log.error(f"Unexpected error with DB: {e!r}")
+        return False
 
-    playwright_cookies = []
+    new_watermark = watermark
+    updated, removed = [], []
     for row in rows:
+        new_watermark = max(new_watermark, row[8] or 0)
         try:
-            if row[2][:3] == b"v20":
-                pw_cookie = chrome_to_playwright(row)
-                if pw_cookie and pw_cookie["value"]:
-                    playwright_cookies.append(pw_cookie)
+            pw_cookie = chrome_to_playwright(row) if row[2][:3] == b"v20" else None
+            if pw_cookie and pw_cookie["value"]:
+                updated.append(pw_cookie)
+            else:
+                removed.append((row[0], row[1], row[3] if row[3] else "/"))
         except Exception as e:
             log.error(f"Error processing cookie {row[1]} ({row[0]}): {e!r}")
 
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(playwright_cookies, f, indent=2, ensure_ascii=False)
-        log.info(f"Saved {len(playwright_cookies)} cookies for Playwright -> {output_path}")
+        now = time.time()
+        # cookies and the watermark change together, so a failed write cannot leave them out of step
+        store.apply(upsert=updated, delete=[] if full_sync else removed, replace=full_sync, meta={"chrome_sync": {
+            "last_update_utc": new_watermark,
+            "domains": domain_list,
+            "db_mtime_ns": db_mtime_ns,
+            "last_full_sync": now if full_sync else state.get("last_full_sync", now),
+        }})
+        log.info(f"{'Full' if full_sync else 'Incremental'} sync: {len(updated)} cookies updated, "
+                 f"{len(store)} in store -> {store.path}")
+        return True
     except Exception as e:
-        log.error(f"Failed to save playwright_cookies.json: {e!r}")
-
-    # Restore Chrome after cookies were extracted (if we killed it)
-    if chrome_restarted:
-        log.info("Restoring Chrome after cookie extraction...")
-        open_chrome()
+        log.error(f"Failed to save cookies to {store.path}: {e!r}")
+        return False
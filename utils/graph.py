@@ -0,0 +1,28 @@
+from typing import Iterable, Mapping
+
+
+def check_dependency_graph(dependencies: Mapping[str, Iterable[str]], kind: str = "node"):
+    """
+    Validates a dependency graph given as ``{name: names it depends on}``.
+    Raises ValueError on a dependency that is not in the graph and on cycles; ``kind`` names the
+    nodes in the error messages ("stage", "step", ...).
+    """
+    for name, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency not in dependencies:
+                raise ValueError(f"{kind.capitalize()} {name!r} depends on unknown {kind} {dependency!r}")
+    visiting, visited = set(), set()
+
+    def visit(name: str):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {kind} {name!r}")
+        visiting.add(name)
+        for dependency in dependencies[name]:
+            visit(dependency)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in dependencies:
+        visit(name)
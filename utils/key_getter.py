@@ -9,7 +9,8 @@ from logging_folder import get_logger
 
 log = get_logger(__name__)
 
-def extract_and_save_chrome_key(output_path: str = "ai_agents\\tools\\web_tools\\key"):
+def extract_and_save_chrome_key(output_path: str = "ai_agents\\tools\\web_tools\\key") -> bool:
+    """Decrypts Chrome's app-bound cookie key and saves it to ``output_path``; returns False if that failed."""
     def is_admin():
         try:
             return ctypes.windll.shell32.IsUserAnAdmin() != 0
@@ -36,7 +37,7 @@ def extract_and_save_chrome_key(output_path: str = "ai_agents\\tools\\web_tools\
                 local_state = json.load(f)
         except Exception as e:
             log.error(f"Ошибка чтения local state: {e!r}")
-            return
+            return False
 
         app_bound_encrypted_key = local_state["os_crypt"]["app_bound_encrypted_key"]
 
@@ -74,7 +75,7 @@ print(binascii.b2a_base64(encrypted_key[1]).decode())
 
         except Exception as e:
             log.error(f"Ошибка получения ключа через pypsexec: {e!r}")
-            return
+            return False
         finally:
             try:
                 c.remove_service()
@@ -97,7 +98,7 @@ print(binascii.b2a_base64(encrypted_key[1]).decode())
                 cipher = ChaCha20_Poly1305.new(key=chacha20_key, nonce=iv)
             else:
                 log.error(f"Unsupported flag: {flag}")
-                return
+                return False
 
             key = cipher.decrypt_and_verify(ciphertext, tag)
 
@@ -105,9 +106,12 @@ print(binascii.b2a_base64(encrypted_key[1]).decode())
                 f.write(binascii.b2a_base64(key))
 
             log.info(f"[+] Decryption key saved to '{output_path}'")
+            return True
         except Exception as e:
             log.error(f"Ошибка дешифровки мастер-ключа: {e!r}")
+            return False
 
 
     except Exception as e:
         log.error(f"Critical error in extract_and_save_chrome_key: {e!r}")
+        return False
@@ -0,0 +1,10 @@
+"""Filesystem locations shared by the agents and their tools."""
+import os
+
+# The os_worker's file, shell and Python tools are confined to this directory
+BASE_DIR = r"C:\Users\bratx\Desktop\MisterKnewData"
+# The persistent browser profile holds live session cookies, so it is kept outside BASE_DIR
+# where those tools cannot read it
+PROFILE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "MisterKnew", "browser_profile")
+# Where earlier versions kept the profile; moved to PROFILE_DIR on first use
+LEGACY_PROFILE_DIR = os.path.join(BASE_DIR, "browser_profile")
@@ -0,0 +1,300 @@
+import asyncio
+import builtins
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from logging_folder import get_logger
+
+log = get_logger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    request BLOB NOT NULL,
+    response BLOB NOT NULL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Values that differ between runs of the same scenario: uuids (also without dashes, as in agent
+# names), object addresses in reprs
+_VOLATILE = [
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"(?<![0-9a-fA-F])[0-9a-f]{32}(?![0-9a-fA-F])"), "<uuid>"),
+    (re.compile(r"0x[0-9a-fA-F]{6,16}"), "<addr>"),
+]
+
+
+class ReplayMiss(LookupError):
+    """The replayed run has no (more) recorded responses for a request."""
+
+
+class RecordedError(Exception):
+    """A recorded tool exception whose type is not a builtin exception, raised again on replay."""
+
+    def __init__(self, type_name: str, message: str):
+        super().__init__(f"{type_name}: {message}")
+        self.type_name = type_name
+        self.message = message
+
+
+def normalize(text: str) -> str:
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def request_key(kind: str, name: str, request) -> str:
+    """Stable key of a request: hash of its normalized JSON form."""
+    text = normalize(json.dumps(request, sort_keys=True, ensure_ascii=False, default=repr))
+    return hashlib.sha1(f"{kind}\0{name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, default=repr).encode("utf-8"), 6)
+
+
+def unpack(data: bytes):
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+class RecordStore:
+    """
+    Recorded runs in an SQLite file: one row per model call or tool call with the request key,
+    timing and zlib-compressed JSON request/response payloads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._con: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            with self._lock:
+                if self._con is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    con = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.execute("PRAGMA synchronous=NORMAL")
+                    con.executescript(SCHEMA)
+                    self._con = con
+        return self._con
+
+    def close(self):
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def create_run(self, name: str | None = None, meta: dict | None = None) -> tuple[int, str]:
+        name = name or time.strftime("run-%Y%m%d-%H%M%S")
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO runs (name, created, meta) VALUES (?, ?, ?)", (name, time.time(), json.dumps(meta or {})))
+        return cursor.lastrowid, name
+
+    def find_run(self, name: str | None = None) -> tuple[int, str] | None:
+        """Run id and name by name, or the latest run."""
+        with self._lock:
+            if name:
+                row = self._connect().execute("SELECT id, name FROM runs WHERE name = ?", (name,)).fetchone()
+            else:
+                row = self._connect().execute("SELECT id, name FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return tuple(row) if row else None
+
+    def runs(self) -> list[dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT r.id, r.name, r.created, count(e.seq), coalesce(sum(e.kind = 'model'), 0) "
+                "FROM runs r LEFT JOIN events e ON e.run_id = r.id GROUP BY r.id ORDER BY r.id").fetchall()
+        return [{"id": row[0], "name": row[1], "created": row[2], "events": row[3], "model_calls": row[4]}
+                for row in rows]
+
+    def add_event(self, run_id: int, seq: int, kind: str, name: str, key: str, started: float, duration: float,
+                  request, response):
+        row = (run_id, seq, kind, name, key, started, duration, pack(request), pack(response))
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO events (run_id, seq, kind, name, key, started, duration, request, response) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def events(self, run_id: int) -> list[tuple]:
+        """(kind, name, key, duration, response) of a run, in recording order."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT kind, name, key, duration, response FROM events WHERE run_id = ? ORDER BY seq",
+                (run_id,)).fetchall()
+        return [(kind, name, key, duration, unpack(response)) for kind, name, key, duration, response in rows]
+
+
+class Recorder:
+    """
+    Records model and tool calls of a run into a RecordStore, or serves them back.
+
+    In replay mode responses are looked up by request key (see ``normalize``); identical
+    requests get the recorded responses in their recorded order, and a request that was never
+    recorded raises ReplayMiss. Recorded durations are slept through multiplied by
+    ``latency_scale`` (0 by default, so a replay measures only orchestration overhead).
+    """
+
+    def __init__(self, store: RecordStore, mode: str = RECORD, run: str | None = None, latency_scale: float = 0.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown recorder mode {mode!r}")
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pending: dict[tuple[str, str], list[tuple[float, object]]] = {}
+        if mode == RECORD:
+            self.run_id, self.run_name = store.create_run(run)
+        else:
+            found = store.find_run(run)
+            if found is None:
+                raise ReplayMiss(f"No recorded run {run!r} in {store.path}" if run else f"No recorded runs in {store.path}")
+            self.run_id, self.run_name = found
+            for kind, _name, key, duration, response in store.events(self.run_id):
+                self._pending.setdefault((kind, key), []).append((duration, response))
+            for queue in self._pending.values():
+                queue.reverse()
+        log.info(f"Recorder: {mode} run {self.run_name!r} in {store.path}")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def record(self, kind: str, name: str, request, response, started: float, duration: float):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self.store.add_event(self.run_id, seq, kind, name, request_key(kind, name, request), started, duration,
+                             request, response)
+
+    def replay(self, kind: str, name: str, request) -> tuple[object, float]:
+        """Recorded (response, duration) for a request; the wait for ``latency_scale`` is up to the caller."""
+        key = request_key(kind, name, request)
+        with self._lock:
+            queue = self._pending.get((kind, key))
+            if not queue:
+                raise ReplayMiss(f"No recorded {kind} call {name!r} matching this request in run {self.run_name!r}")
+            duration, response = queue.pop()
+        return response, duration * self.latency_scale
+
+    def remaining(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._pending.values())
+
+
+def _tool_request(args, kwargs) -> dict:
+    return {"args": list(args), "kwargs": kwargs}
+
+
+def _tool_response(result=None, error: BaseException | None = None) -> dict:
+    """Stored form of a tool call's outcome: its result (and whether it was a ToolError), or its exception."""
+    if error is not None:
+        return {"exception": {"type": type(error).__name__, "message": str(error)}}
+    from utils import ToolError
+    return {"result": result, "tool_error": isinstance(result, ToolError)}
+
+
+def _tool_outcome(response: dict):
+    """The result of a recorded tool call; a recorded exception is raised again."""
+    if "exception" in response:
+        type_name, message = response["exception"]["type"], response["exception"]["message"]
+        error_class = getattr(builtins, type_name, None)
+        if isinstance(error_class, type) and issubclass(error_class, Exception):
+            raise error_class(message)
+        raise RecordedError(type_name, message)
+    if response.get("tool_error"):
+        from utils import ToolError
+        return ToolError(response["result"])
+    return response["result"]
+
+
+def call_tool(name: str, func, args, kwargs):
+    """Runs a sync tool function through the active recorder, if any."""
+    if recorder is None:
+        return func(*args, **kwargs)
+    request = _tool_request(args, kwargs)
+    if recorder.replaying:
+        response, delay = recorder.replay("tool", name, request)
+        if delay:
+            time.sleep(delay)
+        return _tool_outcome(response)
+    started, start = time.time(), time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception as ex:
+        recorder.record("tool", name, request, _tool_response(error=ex), started, time.perf_counter() - start)
+        raise
+    recorder.record("tool", name, request, _tool_response(result), started, time.perf_counter() - start)
+    return result
+
+
+async def acall_tool(name: str, func, args, kwargs):
+    """Runs an async tool function through the active recorder, if any."""
+    if recorder is None:
+        return await func(*args, **kwargs)
+    request = _tool_request(args, kwargs)
+    if recorder.replaying:
+        response, delay = recorder.replay("tool", name, request)
+        if delay:
+            await asyncio.sleep(delay)
+        return _tool_outcome(response)
+    started, start = time.time(), time.perf_counter()
+    try:
+        result = await func(*args, **kwargs)
+    except Exception as ex:
+        recorder.record("tool", name, request, _tool_response(error=ex), started, time.perf_counter() - start)
+        raise
+    recorder.record("tool", name, request, _tool_response(result), started, time.perf_counter() - start)
+    return result
+
+
+def set_recorder(value: Recorder | None):
+    """
+    Activates ``value`` for models created afterwards and for all tool calls (None disables recording).
+    No recorder is active until this is called; run.py calls it with ``recorder_from_env()``.
+    """
+    global recorder
+    recorder = value
+
+
+def recorder_from_env() -> Recorder | None:
+    """
+    MISTERKNEW_RECORD=<file.sqlite> records a new run, MISTERKNEW_REPLAY=<file.sqlite> replays one;
+    MISTERKNEW_RUN selects the run name (default: a timestamp / the latest run) and
+    MISTERKNEW_REPLAY_LATENCY scales recorded latencies during replay.
+    """
+    run = os.environ.get("MISTERKNEW_RUN") or None
+    if os.environ.get("MISTERKNEW_REPLAY"):
+        return Recorder(RecordStore(os.environ["MISTERKNEW_REPLAY"]), REPLAY, run,
+                        float(os.environ.get("MISTERKNEW_REPLAY_LATENCY", "0")))
+    if os.environ.get("MISTERKNEW_RECORD"):
+        return Recorder(RecordStore(os.environ["MISTERKNEW_RECORD"]), RECORD, run)
+    return None
+
+
+recorder: Recorder | None = None
@@ -0,0 +1,124 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from logging_folder import get_logger
+from utils.graph import check_dependency_graph
+
+log = get_logger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable
+    depends_on: tuple[str, ...] = ()
+    in_thread: bool = False
+    status: str = PENDING
+    started: float | None = None
+    finished: float | None = None
+    result: Any = None
+    error: BaseException | None = None
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def duration(self) -> float | None:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class StartupPipeline:
+    """
+    Runs startup stages concurrently as a dependency graph.
+
+    Each stage starts as soon as all of its dependencies are done; a stage whose dependency
+    failed is skipped. Sync callables run on the loop thread unless ``in_thread`` is set,
+    coroutine functions are awaited. ``on_change(stage)`` is called on every status change,
+    so a UI can show per-subsystem readiness, and ``wait_for(name)`` lets callers block on
+    a single stage instead of the whole pipeline.
+    """
+
+    def __init__(self, on_change: Callable[[Stage], None] | None = None):
+        self.stages: dict[str, Stage] = {}
+        self.on_change = on_change
+        self._started: float | None = None
+
+    def add(self, name: str, func: Callable, depends_on: Iterable[str] = (), in_thread: bool = False) -> "StartupPipeline":
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} already exists")
+        self.stages[name] = Stage(name, func, tuple(depends_on), in_thread)
+        return self
+
+    def _check_graph(self):
+        check_dependency_graph({name: stage.depends_on for name, stage in self.stages.items()}, "stage")
+
+    def _set_status(self, stage: Stage, status: str):
+        stage.status = status
+        if self.on_change:
+            try:
+                self.on_change(stage)
+            except Exception as ex:
+                log.error(f"Startup on_change callback failed for {stage.name}: {ex!r}")
+
+    async def _run_stage(self, stage: Stage):
+        try:
+            for dependency in stage.depends_on:
+                await self.stages[dependency]._done.wait()
+            failed = [d for d in stage.depends_on if self.stages[d].status != DONE]
+            if failed:
+                self._set_status(stage, SKIPPED)
+                log.warning(f"Startup stage {stage.name} skipped: dependency {', '.join(failed)} not ready")
+                return
+            stage.started = time.perf_counter()
+            self._set_status(stage, RUNNING)
+            try:
+                if stage.in_thread:
+                    result = await asyncio.to_thread(stage.func)
+                else:
+                    result = stage.func()
+                if inspect.isawaitable(result):
+                    result = await result
+                stage.result = result
+                stage.finished = time.perf_counter()
+                self._set_status(stage, DONE)
+                log.info(f"Startup stage {stage.name} done in {stage.duration:.3f}s")
+            except Exception as ex:
+                stage.error = ex
+                stage.finished = time.perf_counter()
+                self._set_status(stage, FAILED)
+                log.error(f"Startup stage {stage.name} failed after {stage.duration:.3f}s: {ex!r}")
+        finally:
+            stage._done.set()
+
+    async def run(self) -> dict[str, Stage]:
+        """Runs all stages and returns them once every stage has finished, failed or been skipped."""
+        self._check_graph()
+        self._started = time.perf_counter()
+        await asyncio.gather(*(self._run_stage(stage) for stage in self.stages.values()))
+        log.info(self.summary())
+        return self.stages
+
+    async def wait_for(self, name: str) -> Stage:
+        stage = self.stages[name]
+        await stage._done.wait()
+        return stage
+
+    def timings(self) -> dict[str, float | None]:
+        return {name: stage.duration for name, stage in self.stages.items()}
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self._started if self._started is not None else 0.0
+        parts = [
+            f"{stage.name}={stage.duration:.2f}s" if stage.duration is not None else f"{stage.name}={stage.status}"
+            for stage in self.stages.values()
+        ]
+        return f"Startup finished in {total:.2f}s: " + ", ".join(parts)